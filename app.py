@@ -7,9 +7,27 @@ import base64
 import io
 from datetime import datetime
 import json
+import uuid
+import hashlib
+import functools
+import time
 import numpy as np
-from resume_parser import ResumeParser
-from matcher import JobMatcher
+from resume_parser import DEFAULT_FIELDS
+from matcher import (JobMatcher, DEFAULT_WEIGHTS, DEFAULT_SEMANTIC_WEIGHT, COMPONENT_KEYS, EXPLANATION_KEYS,
+                     normalize_weights)
+from pipeline import process_batch, rescore_batch
+from profiling import BatchProfiler
+from storage import CandidateStore, PIPELINE_STAGES, make_job_id, make_batch_id
+from dedup import DuplicateDetector
+from ocr import OCR_AVAILABLE
+from embeddings import load_engine
+from model_server import get_model_client, RemoteEmbeddingEngine
+from similarity import SimilarCandidates
+from job_library import JobLibrary
+from batch_runner import BatchRunner
+from sandbox import get_sandbox_pool, FILE_TIMEOUT, FILE_MEMORY_MB
+from text_corpus import TextCorpus, find_snippet
+from candidate_features import CandidateFeatureIndex
 from utils import *
 
 # Page configuration
@@ -258,8 +276,152 @@ if 'parsed_resumes' not in st.session_state:
     st.session_state.parsed_resumes = []
 if 'job_description' not in st.session_state:
     st.session_state.job_description = ""
+    st.session_state.job_title = ""
+    st.session_state.required_skills = ""
 if 'processing_complete' not in st.session_state:
     st.session_state.processing_complete = False
+if 'current_job_id' not in st.session_state:
+    st.session_state.current_job_id = None
+if 'scoring_weights' not in st.session_state:
+    st.session_state.scoring_weights = (dict(DEFAULT_WEIGHTS), DEFAULT_SEMANTIC_WEIGHT)
+if 'session_owner' not in st.session_state:
+    st.session_state.session_owner = uuid.uuid4().hex
+if 'adopted_batches' not in st.session_state:
+    st.session_state.adopted_batches = set()
+if 'export_raw_text' not in st.session_state:
+    st.session_state.export_raw_text = False
+if 'extraction_fields' not in st.session_state:
+    st.session_state.extraction_fields = set(DEFAULT_FIELDS)
+
+# Seconds between refreshes of the background batch panel while batches run
+BATCH_POLL_INTERVAL = 2
+
+# Seconds the job title, description and skills must stay unchanged before
+# the current results are re-scored against them
+LIVE_RESCORE_DELAY = 1.0
+
+# Analytics charts: score histogram bins, and the candidate count above which
+# the experience scatter switches to a density view or a sample
+SCORE_HISTOGRAM_BINS = 20
+SCATTER_POINT_LIMIT = 2000
+
+@st.cache_resource
+def get_candidate_store():
+    """Shared persistent candidate store (one SQLite connection per server)"""
+    return CandidateStore()
+
+@st.cache_resource
+def get_embedding_engine():
+    """Shared sentence-embedding engine (on the model server if one runs), or None"""
+    client = get_model_client()
+    if client is not None:
+        try:
+            if client.info()['embedding_model']:
+                return RemoteEmbeddingEngine(client)
+        except ConnectionError:
+            pass
+    return load_engine()
+
+@st.cache_resource
+def get_similar_candidates():
+    """Shared nearest-neighbour index over stored candidates"""
+    return SimilarCandidates(get_candidate_store(), get_embedding_engine())
+
+@st.cache_resource
+def get_job_library():
+    """Shared library of stored job descriptions for reverse matching"""
+    return JobLibrary(get_candidate_store(), engine=get_embedding_engine())
+
+@st.cache_resource
+def get_text_corpus():
+    """Shared on-disk corpus of extracted resume texts"""
+    return TextCorpus()
+
+def load_candidate_texts(store, corpus, candidate_ids):
+    """Stored resume texts by candidate id, from the text corpus or else the search index"""
+    
+    texts = {}
+    for candidate_id, (document_key, indexed_text) in store.candidate_texts(candidate_ids).items():
+        text = corpus.get(document_key) or indexed_text
+        if text:
+            texts[candidate_id] = text
+    return texts
+
+def candidate_explanation(resume):
+    """
+    Matched and missing skills, keywords and recommendations of a stored candidate
+    
+    Returns:
+        Dictionary with the EXPLANATION_KEYS, or an empty one when no job
+        or resume text is available
+    """
+    
+    return candidate_explanations([resume])[0]
+
+def candidate_explanations(resumes):
+    """
+    Explanations of several stored candidates, in order
+    
+    Explanations are not computed while scoring; the first request computes
+    one from the kept resume text and the job it was scored against, and
+    stores it with the candidate. Candidates stored before job definitions
+    were kept are explained against the job in the inputs, which is only
+    stored when it is the job they were scored against. Missing texts are
+    loaded together and new explanations stored in one transaction.
+    
+    Returns:
+        One dictionary per resume, as candidate_explanation
+    """
+    
+    explanations = [{key: resume[key] for key in EXPLANATION_KEYS}
+                    if all(key in resume for key in EXPLANATION_KEYS) else {} for resume in resumes]
+    pending = [i for i, resume in enumerate(resumes)
+               if not explanations[i] and resume.get('candidate_id') is not None]
+    if not pending:
+        return explanations
+    
+    store = get_candidate_store()
+    jobs = {}
+    for i in pending:
+        job_id = resumes[i].get('job_id')
+        if job_id in jobs:
+            continue
+        job = store.job_definition(job_id)
+        scored_job = job is not None
+        if job is None:
+            job = {'title': st.session_state.job_title, 'description': st.session_state.job_description,
+                   'required_skills': st.session_state.required_skills}
+            scored_job = make_job_id(job['title'], job['description'], job['required_skills']) == job_id
+            if scored_job:
+                store.save_job_definition(job_id, job['title'], job['description'], job['required_skills'])
+        jobs[job_id] = (job, scored_job)
+    
+    texts = load_candidate_texts(store, get_text_corpus(), [resumes[i]['candidate_id'] for i in pending])
+    matcher = JobMatcher()
+    saved = []
+    for i in pending:
+        resume = resumes[i]
+        job, scored_job = jobs[resume.get('job_id')]
+        text = texts.get(resume['candidate_id'])
+        if not job['description'].strip() or not text:
+            continue
+        explanations[i] = matcher.explain_match(text, job['description'], job['required_skills'], scores=resume)
+        if scored_job:
+            saved.append((resume['candidate_id'], resume['job_id'], explanations[i]))
+            resume.update(explanations[i])
+    if saved:
+        store.save_explanations(saved)
+    return explanations
+
+@st.cache_resource
+def get_candidate_features():
+    """Shared resume-side scoring features of stored candidates, for live re-scoring"""
+    return CandidateFeatureIndex(functools.partial(load_candidate_texts, get_candidate_store(), get_text_corpus()))
+
+@st.cache_resource
+def get_batch_runner():
+    """Shared background runner for resume batches (survives reruns and page changes)"""
+    return BatchRunner()
 
 def main():
     # Header with animation
@@ -281,10 +443,11 @@ def main():
         )
         
         # Quick stats in sidebar
-        if st.session_state.parsed_resumes:
+        summary = get_candidate_store().score_summary(st.session_state.current_job_id)
+        if summary['total']:
             st.markdown("### 📈 Quick Stats")
-            total = len(st.session_state.parsed_resumes)
-            excellent = len([r for r in st.session_state.parsed_resumes if r['match_score'] >= 0.8])
+            total = summary['total']
+            excellent = summary['excellent']
             st.metric("Total Candidates", total)
             st.metric("Excellent Matches", excellent)
             st.metric("Success Rate", f"{(excellent/total*100):.1f}%" if total > 0 else "0%")
@@ -387,6 +550,18 @@ def upload_and_analyze_page():
         )
         
         st.session_state.job_description = job_description
+        st.session_state.job_title = job_title
+        st.session_state.required_skills = required_skills
+        
+        live_rescore = st.checkbox(
+            "⚡ Live Re-score Current Results", value=True,
+            help="Preview the candidates shown below re-scored against the job title, description or skills "
+                 "as they are edited, from their cached resume features; stored results change only when applied"
+        )
+        
+        if st.button("💾 Save to Job Library", disabled=not job_description.strip()):
+            get_job_library().save_job(job_title, job_description, required_skills)
+            st.success(f"💾 Saved '{job_title or 'Untitled job'}' to the job library")
     
     with tab3:
         st.markdown("### ⚙️ Advanced Configuration")
@@ -395,22 +570,58 @@ def upload_and_analyze_page():
         
         with col1:
             st.markdown("**🔍 Extraction Options**")
-            extract_projects = st.checkbox("📊 Extract Projects", value=True)
-            extract_certifications = st.checkbox("🏆 Extract Certifications", value=True)
-            extract_languages = st.checkbox("🌐 Extract Languages", value=True)
-            extract_publications = st.checkbox("📚 Extract Publications", value=False)
-            extract_awards = st.checkbox("🏅 Extract Awards", value=True)
+            # Only the extractors of the checked fields (and what they depend on) run
+            defaults = st.session_state.extraction_fields
+            extraction_options = {
+                'projects': st.checkbox("📊 Extract Projects", value='projects' in defaults),
+                'certifications': st.checkbox("🏆 Extract Certifications", value='certifications' in defaults),
+                'languages': st.checkbox("🌐 Extract Languages", value='languages' in defaults),
+                'publications': st.checkbox("📚 Extract Publications", value='publications' in defaults),
+                'awards': st.checkbox("🏅 Extract Awards", value='awards' in defaults),
+                'readability_score': st.checkbox("📖 Readability Score", value='readability_score' in defaults),
+            }
+            fields = sorted(field for field, checked in extraction_options.items() if checked)
+            use_ocr = st.checkbox(
+                "🖨️ OCR Scanned PDF Pages", value=OCR_AVAILABLE, disabled=not OCR_AVAILABLE,
+                help="Recognise text on PDF pages without a text layer" if OCR_AVAILABLE
+                else "Install pytesseract and the tesseract binary to enable OCR"
+            )
+            use_sandbox = st.checkbox(
+                "🧱 Sandbox Each File", value=True,
+                help=f"Extract and parse each file in a worker process limited to {FILE_TIMEOUT:g}s and "
+                     f"{FILE_MEMORY_MB} MB; files over the limits are quarantined"
+            )
+            
+            st.markdown("**🔬 Diagnostics**")
+            profile_choice = st.selectbox(
+                "⏱️ Profile this batch",
+                ["Off", "Sampling (low overhead)", "Deterministic (cProfile)"],
+                help="Record where processing time goes and offer the profile for download"
+            )
+            profile_mode = {"Sampling (low overhead)": "sampling",
+                            "Deterministic (cProfile)": "deterministic"}.get(profile_choice)
+            if profile_mode and use_sandbox:
+                st.caption("Profiled batches parse files in-process, without the sandbox, "
+                           "so extraction and parsing show up in the profile.")
         
         with col2:
             st.markdown("**⚖️ Scoring Weights**")
-            skills_weight = st.slider("🛠️ Skills Match Weight", 0, 100, 50, help="Weight for skills matching")
+            skills_weight = st.slider("🛠️ Skills Match Weight", 0, 100, 40, help="Weight for skills matching")
             experience_weight = st.slider("💼 Experience Weight", 0, 100, 30, help="Weight for experience matching")
             education_weight = st.slider("🎓 Education Weight", 0, 100, 20, help="Weight for education matching")
+            keywords_weight = st.slider("🔑 Keywords Weight", 0, 100, 10, help="Weight for TF-IDF keyword matching")
+            embeddings_available = get_embedding_engine() is not None
+            use_embeddings = st.checkbox(
+                "🧠 Embedding Semantic Similarity", value=embeddings_available,
+                disabled=not embeddings_available,
+                help="Score semantic similarity with a local sentence-embedding model" if embeddings_available
+                else "Install sentence-transformers and a model under models/ to enable embeddings"
+            )
             
             # Ensure weights add up to 100
-            total_weight = skills_weight + experience_weight + education_weight
+            total_weight = skills_weight + experience_weight + education_weight + keywords_weight
             if total_weight != 100:
-                st.warning(f"⚠️ Weights total: {total_weight}%. Recommended: 100%")
+                st.warning(f"⚠️ Weights total: {total_weight}%. Weights will be scaled to 100%")
     
     # Enhanced process button
     if uploaded_files and job_description:
@@ -419,120 +630,520 @@ def upload_and_analyze_page():
         with col2:
             if st.button("🚀 Analyze Resumes with AI", type="primary", use_container_width=True):
                 process_resumes(uploaded_files, job_description, job_title, required_skills, 
-                              skills_weight, experience_weight, education_weight)
+                              skills_weight, experience_weight, education_weight,
+                              keywords_weight=keywords_weight, profile_mode=profile_mode,
+                              use_ocr=use_ocr, use_embeddings=use_embeddings, use_sandbox=use_sandbox,
+                              fields=fields)
     else:
         st.info("📝 Please upload resume files and provide a job description to start analysis.")
+    
+    # Resumes stored under other jobs are scored against this one from their kept text
+    if job_description:
+        # Finding the stored documents scans every candidate, so it only runs on request
+        if st.button("♻️ Re-score stored resumes against this job", use_container_width=True,
+                     help="Scores resumes analyzed for other jobs without uploading them again"):
+            job_id = make_job_id(job_title, job_description, required_skills)
+            documents = get_candidate_store().stored_documents(exclude_job_id=job_id)
+            kept = get_text_corpus().stored_keys(key for _, key in documents)
+            stored = [doc for doc in documents if doc[1] in kept]
+            if stored:
+                rescore_resumes(stored, job_description, job_title, required_skills,
+                                skills_weight, experience_weight, education_weight,
+                                keywords_weight=keywords_weight, use_embeddings=use_embeddings, fields=fields)
+            else:
+                st.info("No stored resumes from other jobs are left to score against this one.")
+    
+    if live_rescore:
+        schedule_live_rescore(job_title, job_description, required_skills, use_embeddings)
+    else:
+        st.session_state.pop('live_rescore_pending', None)
+        st.session_state.pop('live_preview', None)
+    
+    display_interrupted_batches()
+    display_batch_jobs()
+    
+    if st.session_state.get('last_profile'):
+        display_profile(st.session_state.last_profile)
+    
+    # Keep previously processed candidates browsable across reruns and restarts
+    if get_candidate_store().count(st.session_state.current_job_id) > 0:
+        st.markdown("---")
+        display_results()
 
 def process_resumes(uploaded_files, job_description, job_title, required_skills, 
-                   skills_weight, experience_weight, education_weight):
-    """Process uploaded resumes with enhanced UI feedback"""
+                   skills_weight, experience_weight, education_weight, keywords_weight=10,
+                   profile_mode=None, use_ocr=False, use_embeddings=False, use_sandbox=True, fields=None):
+    """Queue uploaded resumes on the background runner"""
+    
+    weights = normalize_weights({
+        'skills': skills_weight,
+        'experience': experience_weight,
+        'education': education_weight,
+        'keywords': keywords_weight
+    })
+    files = [(uploaded_file.name, uploaded_file.read()) for uploaded_file in uploaded_files]
+    engine = get_embedding_engine() if use_embeddings else None
+    
+    # The same files, job and settings map to the same durable batch, which resumes from its log
+    job_id = make_job_id(job_title, job_description, required_skills)
+    manifest = [(name, hashlib.sha1(content).hexdigest()) for name, content in files]
+    batch_id = make_batch_id(job_id, manifest, {
+        'weights': weights, 'ocr': use_ocr, 'embeddings': engine.model_name if engine else None,
+        'fields': fields,
+    })
+    runner = get_batch_runner()
+    if batch_id in runner.active_keys():
+        st.warning("⏳ This batch is already running.")
+        return
     
-    # Create progress container
-    progress_container = st.container()
+    # Shared resources are resolved here, in the script thread, and handed to the worker
+    label = f"{job_title or 'Untitled job'} · {len(files)} resumes"
+    # The profiler only sees this process, so a profiled batch parses inline
+    sandbox = get_sandbox_pool() if use_sandbox and not profile_mode else None
+    work = functools.partial(
+        run_analysis_batch, files=files, job_description=job_description, job_title=job_title,
+        required_skills=required_skills, weights=weights, engine=engine,
+        profile_mode=profile_mode, use_ocr=use_ocr, store=get_candidate_store(),
+        library=get_job_library(), similar=get_similar_candidates(), features=get_candidate_features(),
+        batch_id=batch_id, label=label, manifest=manifest,
+        sandbox=sandbox, corpus=get_text_corpus(), fields=fields
+    )
+    runner.submit(st.session_state.session_owner, label, work, total=len(files), key=batch_id)
+    st.success(f"🚀 Queued {len(files)} resumes as batch `{batch_id}`. "
+               "You can keep working while it runs.")
+
+def schedule_live_rescore(job_title, job_description, required_skills, use_embeddings):
+    """
+    Debounce edits of the job inputs into one re-score of the current results
+    
+    Only runs once the inputs have matched the current results' job in
+    this session, so typing a new job from scratch never moves them.
+    """
+    
+    if st.session_state.get('live_rescore_note'):
+        st.caption(st.session_state.pop('live_rescore_note'))
+    
+    job_id = make_job_id(job_title, job_description, required_skills)
+    if job_id == st.session_state.current_job_id:
+        st.session_state.live_rescore_armed = True
+        st.session_state.pop('live_rescore_pending', None)
+        st.session_state.pop('live_preview', None)
+        return
+    if not job_description.strip():
+        st.session_state.live_rescore_armed = False
+    if not (st.session_state.get('live_rescore_armed') and st.session_state.current_job_id):
+        return
     
-    with progress_container:
-        st.markdown('<div class="progress-container">', unsafe_allow_html=True)
-        st.markdown("### 🔄 Processing Resumes...")
-        
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-        time_estimate = st.empty()
-        
-        parser = ResumeParser()
-        matcher = JobMatcher()
-        parsed_resumes = []
-        
-        total_files = len(uploaded_files)
-        start_time = datetime.now()
-        
-        for i, uploaded_file in enumerate(uploaded_files):
-            try:
-                # Update progress with enhanced feedback
-                progress = (i + 1) / total_files
-                progress_bar.progress(progress)
-                
-                elapsed_time = (datetime.now() - start_time).total_seconds()
-                estimated_total = elapsed_time / progress if progress > 0 else 0
-                remaining_time = max(0, estimated_total - elapsed_time)
-                
-                status_text.markdown(f"**Processing:** `{uploaded_file.name}` ({i+1}/{total_files})")
-                time_estimate.markdown(f"⏱️ Estimated time remaining: {remaining_time:.1f}s")
-                
-                # Extract text from file
-                file_content = uploaded_file.read()
-                extracted_text = extract_text_from_file(file_content, uploaded_file.name)
-                
-                # Parse resume
-                parsed_resume = parser.parse_resume(extracted_text, uploaded_file.name)
-                
-                # Calculate job match score
-                if job_description:
-                    match_score = matcher.calculate_match_score(
-                        extracted_text, job_description, job_title, required_skills
-                    )
-                    parsed_resume.update(match_score)
-                
-                # Add metadata
-                parsed_resume.update({
-                    'upload_time': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    'file_size': len(file_content),
-                    'starred': False,
-                    'notes': "",
-                    'status': 'completed'
-                })
-                
-                parsed_resumes.append(parsed_resume)
-                
-            except Exception as e:
-                st.error(f"❌ Error processing {uploaded_file.name}: {str(e)}")
-                # Add error entry
-                parsed_resumes.append({
-                    'filename': uploaded_file.name,
-                    'name': 'Error processing file',
-                    'status': 'error',
-                    'match_score': 0.0,
-                    'error_message': str(e)
-                })
-                continue
-        
-        # Complete processing
-        progress_bar.progress(1.0)
-        status_text.markdown("✅ **Processing Complete!**")
-        time_estimate.markdown(f"🎉 Total processing time: {(datetime.now() - start_time).total_seconds():.1f}s")
-        
-        st.markdown('</div>', unsafe_allow_html=True)
+    # Each new edit restarts the delay; an up-to-date preview needs no re-score
+    preview = st.session_state.get('live_preview')
+    if preview is not None and preview['job_id'] == job_id:
+        return
+    pending = st.session_state.get('live_rescore_pending')
+    if pending is None or pending['job_id'] != job_id:
+        st.session_state.live_rescore_pending = {
+            'job_id': job_id, 'job_title': job_title, 'job_description': job_description,
+            'required_skills': required_skills, 'use_embeddings': use_embeddings, 'since': time.monotonic(),
+        }
+    st.fragment(live_rescore_panel, run_every=LIVE_RESCORE_DELAY / 2)()
+
+def live_rescore_panel():
+    """Waits out the debounce delay, then previews the re-score and reruns the page"""
+    
+    pending = st.session_state.get('live_rescore_pending')
+    if pending is None:
+        return
+    if time.monotonic() - pending['since'] < LIVE_RESCORE_DELAY:
+        st.caption("⏳ Re-scoring the current results when you stop editing…")
+        return
     
-    # Store results and sort by match score
-    st.session_state.parsed_resumes = sorted(
-        [r for r in parsed_resumes if r.get('status') != 'error'], 
-        key=lambda x: x.get('match_score', 0), 
-        reverse=True
+    st.session_state.pop('live_rescore_pending')
+    started = time.perf_counter()
+    preview = live_rescore(pending)
+    if preview is not None:
+        preview['elapsed'] = time.perf_counter() - started
+        st.session_state.live_preview = preview
+    else:
+        st.session_state.live_rescore_armed = False
+        st.session_state.pop('live_preview', None)
+        st.session_state.live_rescore_note = "⚠️ No stored resume text to re-score; analyze the files again"
+    st.rerun()
+
+def live_rescore(pending):
+    """
+    Score the current results against an edited job from cached resume features
+    
+    Only the job-dependent features are computed. Nothing is written: the
+    scores are kept in the session as a preview of the draft job until the
+    user applies them (see display_live_preview).
+    
+    Returns:
+        Preview dictionary (the draft job, the current job it was made from,
+        candidate ids, their component scores and how many candidates had no
+        stored text), or None if no candidate could be re-scored
+    """
+    
+    store = get_candidate_store()
+    index = get_candidate_features()
+    weights, semantic_weight = st.session_state.scoring_weights
+    candidate_ids, _ = store.component_matrix(st.session_state.current_job_id)
+    engine = get_embedding_engine() if pending['use_embeddings'] else None
+    
+    ids, features = index.feature_matrix(candidate_ids, pending['job_description'], pending['job_title'],
+                                         pending['required_skills'], engine=engine)
+    if not len(ids):
+        return None
+    
+    scores = JobMatcher(weights, semantic_weight).score_batch(features)
+    return {
+        'job_id': pending['job_id'], 'job_title': pending['job_title'],
+        'job_description': pending['job_description'], 'required_skills': pending['required_skills'],
+        'base_job_id': st.session_state.current_job_id, 'candidate_ids': ids,
+        'components': np.column_stack([scores[key] for key in COMPONENT_KEYS]),
+        'skipped': len(candidate_ids) - len(ids),
+    }
+
+def display_live_preview():
+    """
+    Current results ranked against the edited job, with a button to apply the new scores
+    
+    The preview lives in this session only, so other sessions viewing the
+    current job are unaffected and half-typed job descriptions are never
+    stored. Applying moves the re-scored candidates to the edited job;
+    explanations are dropped and recomputed when a candidate is opened.
+    """
+    
+    preview = st.session_state.get('live_preview')
+    if preview is None:
+        return
+    if preview['base_job_id'] != st.session_state.current_job_id:
+        st.session_state.pop('live_preview')
+        return
+    
+    store = get_candidate_store()
+    weights, semantic_weight = st.session_state.scoring_weights
+    # Combined with the current weights, so re-ranking sliders apply to the preview too
+    scores = JobMatcher(weights, semantic_weight).combine_scores(preview['components'])
+    
+    st.markdown("### ⚡ Live Preview Against the Edited Job")
+    st.caption(f"Re-scored {len(scores)} candidates in {preview['elapsed']:.2f}s · "
+               f"average {scores.mean():.1%} · stored results are unchanged until applied")
+    if preview['skipped']:
+        st.warning(f"⚠️ {preview['skipped']} candidates have no stored resume text and cannot be re-scored; "
+                   "they stay under the current job when the preview is applied")
+    
+    top = np.argsort(-scores, kind='stable')[:10]
+    rows = []
+    for position in top:
+        candidate = store.get(int(preview['candidate_ids'][position])) or {}
+        rows.append({
+            'Name': candidate.get('name', 'Unknown'),
+            'File': candidate.get('filename', ''),
+            'Current Score': f"{candidate.get('match_score', 0):.1%}",
+            'Edited Job Score': f"{scores[position]:.1%}",
+        })
+    st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("✅ Apply to Stored Results", type="primary", use_container_width=True):
+            store.save_job_definition(preview['job_id'], preview['job_title'], preview['job_description'],
+                                      preview['required_skills'])
+            store.rescore_candidates(preview['candidate_ids'], preview['job_id'], preview['components'], scores)
+            st.session_state.current_job_id = preview['job_id']
+            st.session_state.pop('live_preview')
+            st.session_state.live_rescore_note = f"✅ Moved {len(scores)} candidates to the edited job"
+            st.rerun()
+    with col2:
+        if st.button("✖️ Discard Preview", use_container_width=True):
+            # Stays off until the job inputs match the current results again
+            st.session_state.live_rescore_armed = False
+            st.session_state.pop('live_preview')
+            st.rerun()
+
+def rescore_resumes(documents, job_description, job_title, required_skills,
+                    skills_weight, experience_weight, education_weight, keywords_weight=10,
+                    use_embeddings=False, fields=None):
+    """Queue stored resume texts on the background runner to be scored against a job"""
+    
+    weights = normalize_weights({
+        'skills': skills_weight,
+        'experience': experience_weight,
+        'education': education_weight,
+        'keywords': keywords_weight
+    })
+    engine = get_embedding_engine() if use_embeddings else None
+    
+    job_id = make_job_id(job_title, job_description, required_skills)
+    batch_id = make_batch_id(job_id, documents, {
+        'weights': weights, 'embeddings': engine.model_name if engine else None, 'rescore': True,
+        'fields': fields,
+    })
+    runner = get_batch_runner()
+    if batch_id in runner.active_keys():
+        st.warning("⏳ This batch is already running.")
+        return
+    
+    label = f"{job_title or 'Untitled job'} · re-score {len(documents)} resumes"
+    work = functools.partial(
+        run_analysis_batch, files=None, job_description=job_description, job_title=job_title,
+        required_skills=required_skills, weights=weights, engine=engine,
+        profile_mode=None, use_ocr=False, store=get_candidate_store(),
+        library=get_job_library(), similar=get_similar_candidates(), features=get_candidate_features(),
+        batch_id=batch_id, label=label, manifest=documents,
+        corpus=get_text_corpus(), documents=documents, fields=fields
     )
+    runner.submit(st.session_state.session_owner, label, work, total=len(documents), key=batch_id)
+    st.success(f"♻️ Queued {len(documents)} stored resumes as batch `{batch_id}`.")
+
+def run_analysis_batch(job, files, job_description, job_title, required_skills, weights,
+                       engine, profile_mode, use_ocr, store, library, similar,
+                       batch_id, label, manifest, sandbox=None, corpus=None, documents=None, features=None,
+                       fields=None):
+    """
+    Process one queued batch on a runner thread (no Streamlit calls)
+    
+    Each successful result is ranked against the job library and appended
+    to the batch log as soon as it finishes, so a batch interrupted by a
+    restart or crash resumes where it stopped; logged files are neither
+    extracted nor scored again. Files the sandbox had to kill are added to
+    the quarantine list. When the job is cancelled the files processed so
+    far are still stored.
+    
+    Extracted texts are kept in corpus. A batch given documents instead of
+    files re-scores (filename, document_key) pairs from the corpus. Only the
+    optional resume fields in fields are extracted.
+    
+    Returns:
+        Outcome dictionary read by the UI when the batch finishes
+    """
+    
+    matcher = JobMatcher(weights, semantic_engine=engine)
+    
+    # Near-duplicates of this batch or of stored candidates reuse earlier results
+    job_id = make_job_id(job_title, job_description, required_skills)
+    store.save_job_definition(job_id, job_title, job_description, required_skills)
+    detector = DuplicateDetector(store)
+    logged = store.open_batch(batch_id, job_id, label, manifest)
+    
+    def record_result(i, result, text):
+        if result.get('quarantine_reason'):
+            store.quarantine_file(result['document_key'], result['filename'], result['quarantine_reason'],
+                                  result['quarantine_stage'], result.get('error_message', ''))
+        elif i not in logged and result.get('status') != 'error':
+            # Route each resume to its best-fitting stored jobs
+            if len(library):
+                result['best_fit_jobs'] = [
+                    {'job_id': fit['job_id'], 'title': fit['title'], 'match_score': fit['match_score']}
+                    for fit in library.rank(text, top_k=3, weights=weights)
+                ]
+            store.log_result(batch_id, i, result, text)
+        job.add_result(i, result, text)
+    
+    if documents is not None:
+        run = functools.partial(
+            rescore_batch, documents, corpus, job_description, job_title, required_skills,
+            matcher=matcher, progress_callback=job.progress, result_callback=record_result,
+            should_stop=lambda: job.cancelled, completed=logged, fields=fields
+        )
+    else:
+        run = functools.partial(
+            process_batch, files, job_description, job_title, required_skills,
+            matcher=matcher, progress_callback=job.progress, detector=detector, job_id=job_id,
+            ocr=use_ocr, result_callback=record_result, should_stop=lambda: job.cancelled,
+            completed=logged, sandbox=sandbox, quarantined=store.quarantined_keys(), corpus=corpus,
+            fields=fields
+        )
+    profile = None
+    if profile_mode:
+        with BatchProfiler(profile_mode) as profiler:
+            parsed_resumes, resume_texts = run()
+        profile = {
+            'mode': profiler.mode,
+            'elapsed': profiler.elapsed,
+            'summary': profiler.summary(),
+            'artifact': profiler.artifact(),
+            'created_at': datetime.now().strftime('%Y%m%d_%H%M%S'),
+        }
+    else:
+        parsed_resumes, resume_texts = run()
+    
+    # Persist successful results (closing the batch log) and keep this batch's ranking for the session
+    completed = [(r, t) for r, t in zip(parsed_resumes, resume_texts) if r.get('status') != 'error']
+    candidate_ids = store.add_candidates(
+        [r for r, _ in completed], job_id=job_id, resume_texts=[t for _, t in completed],
+        batch_id=batch_id
+    )
+    similar.add(candidate_ids, [t for _, t in completed])
+    if features is not None:
+        features.add(candidate_ids, [t for _, t in completed])
+    
+    return {
+        'job_id': job_id,
+        'weights': weights,
+        'semantic_weight': matcher.semantic_weight,
+        'resumes': sorted([r for r, _ in completed], key=lambda x: x.get('match_score', 0), reverse=True),
+        'errors': [(r['filename'], r.get('error_message', '')) for r in parsed_resumes
+                   if r.get('status') == 'error'],
+        'duplicates': len([r for r, _ in completed if r.get('duplicate_similarity')]),
+        'skipped': len(manifest) - len(parsed_resumes),
+        'resumed': len(logged),
+        'profile': profile,
+    }
+
+def adopt_batch(snapshot):
+    """Make a finished batch the session's current results"""
+    
+    outcome = snapshot['outcome']
+    st.session_state.adopted_batches.add(snapshot['job_id'])
+    if not outcome.get('resumes'):
+        return
+    
+    st.session_state.scoring_weights = (outcome['weights'], outcome['semantic_weight'])
+    for key in ['rerank_applied', 'rerank_skills', 'rerank_experience', 'rerank_education',
+                'rerank_keywords', 'rerank_semantic']:
+        st.session_state.pop(key, None)
+    st.session_state.current_job_id = outcome['job_id']
+    st.session_state.parsed_resumes = outcome['resumes']
     st.session_state.processing_complete = True
+    if outcome.get('profile'):
+        st.session_state.last_profile = outcome['profile']
+
+def display_interrupted_batches():
+    """Batches stopped by a restart or crash before their results were stored"""
+    
+    active = get_batch_runner().active_keys()
+    store = get_candidate_store()
+    for batch in store.interrupted_batches():
+        if batch['batch_id'] in active:
+            continue
+        col1, col2 = st.columns([5, 1])
+        with col1:
+            st.warning(f"⏸️ Batch **{batch['label']}** was interrupted after {batch['logged']}/{batch['total']} "
+                       "files. Upload the same files with the same job and settings to resume it.")
+        with col2:
+            st.button("🗑️ Discard", key=f"discard_batch_{batch['batch_id']}",
+                      on_click=store.discard_batch, args=(batch['batch_id'],))
+
+def display_batch_jobs():
+    """Background batches of this session, refreshed while any of them runs"""
     
-    # Show success message with stats
-    successful = len([r for r in parsed_resumes if r.get('status') != 'error'])
-    failed = len(parsed_resumes) - successful
+    jobs = get_batch_runner().jobs(st.session_state.session_owner)
+    if not jobs:
+        return
+    active = any(not job.finished for job in jobs)
+    st.fragment(batch_jobs_panel, run_every=BATCH_POLL_INTERVAL if active else None)()
+
+def batch_jobs_panel():
+    """Progress, partial results and cancellation of each queued or running batch"""
     
-    if successful > 0:
-        st.success(f"🎉 Successfully processed {successful} resumes!")
-        if failed > 0:
-            st.warning(f"⚠️ {failed} files failed to process")
+    runner = get_batch_runner()
+    snapshots = [job.snapshot() for job in runner.jobs(st.session_state.session_owner)]
+    
+    st.markdown("---")
+    st.markdown("### 🔄 Background Batches")
+    
+    newly_finished = False
+    for snapshot in reversed(snapshots):
+        batch_id = snapshot['job_id']
+        state = snapshot['state']
+        processed, total = snapshot['processed'], snapshot['total']
         
-        # Show results immediately
-        display_results()
-    else:
-        st.error("❌ No resumes were successfully processed. Please check your files and try again.")
+        if state in ('queued', 'running'):
+            st.markdown(f"**{snapshot['label']}** · `{batch_id}`")
+            if state == 'queued':
+                st.caption("⏳ Waiting for a free worker")
+            else:
+                st.progress(processed / total if total else 0.0)
+                elapsed = snapshot['elapsed']
+                remaining = elapsed / processed * (total - processed) if processed else 0
+                st.caption(f"Processing `{snapshot['current_file']}` ({min(processed + 1, total)}/{total}) · "
+                           f"⏱️ {elapsed:.1f}s elapsed, ~{remaining:.1f}s remaining")
+            
+            if snapshot['results']:
+                with st.expander(f"📄 Partial results ({len(snapshot['results'])}/{total})"):
+                    st.dataframe(pd.DataFrame([{
+                        'File': r.get('filename', ''),
+                        'Name': r.get('name', ''),
+                        'Match Score': f"{r.get('match_score', 0):.1%}",
+                        'Status': r.get('status', ''),
+                    } for r in snapshot['results']]), use_container_width=True, hide_index=True)
+            
+            if snapshot['cancel_requested']:
+                st.caption("🛑 Cancelling after the current file…")
+            else:
+                st.button("🛑 Cancel", key=f"cancel_batch_{batch_id}", on_click=runner.cancel, args=(batch_id,))
+            continue
+        
+        if batch_id not in st.session_state.adopted_batches:
+            adopt_batch(snapshot)
+            newly_finished = True
+        
+        outcome = snapshot['outcome']
+        icon = {'completed': '✅', 'cancelled': '🛑', 'failed': '❌'}[state]
+        with st.expander(f"{icon} {snapshot['label']} · {state} in {snapshot['elapsed']:.1f}s",
+                         expanded=snapshot is snapshots[-1]):
+            if state == 'failed':
+                st.error(f"❌ Batch failed: {snapshot['error']}")
+                continue
+            if not outcome:
+                st.info("🛑 Cancelled before processing started")
+                continue
+            successful = len(outcome.get('resumes', []))
+            if successful > 0:
+                st.success(f"🎉 Successfully processed {successful} resumes!")
+            else:
+                st.error("❌ No resumes were successfully processed. Please check your files and try again.")
+            if outcome.get('resumed'):
+                st.info(f"⏯️ Resumed an interrupted run: {outcome['resumed']} results came from the batch log")
+            if outcome.get('skipped'):
+                st.warning(f"🛑 Cancelled with {outcome['skipped']} files not processed")
+            if outcome.get('errors'):
+                st.warning(f"⚠️ {len(outcome['errors'])} files failed to process")
+                for filename, message in outcome['errors']:
+                    st.error(f"❌ Error processing {filename}: {message}")
+            if outcome.get('duplicates'):
+                st.info(f"📑 {outcome['duplicates']} near-duplicate resumes reused earlier results and are grouped with their originals")
+    
+    # Show a newly finished batch's results on the full page
+    if newly_finished:
+        st.rerun()
+
+def display_profile(profile):
+    """Show the latest batch profile with a download button for the artifact"""
+    
+    with st.expander(f"⏱️ Batch Profile ({profile['mode']}, {profile['elapsed']:.1f}s)", expanded=False):
+        if profile['summary']:
+            st.dataframe(pd.DataFrame(profile['summary']), use_container_width=True, hide_index=True)
+        else:
+            st.info("No samples were recorded for this batch")
+        
+        st.download_button(
+            label="📥 Download Profile (pstats + flamegraph stacks)",
+            data=profile['artifact'],
+            file_name=f"batch_profile_{profile['created_at']}.zip",
+            mime="application/zip",
+            key=f"profile_download_{profile['created_at']}"
+        )
 
 def display_results():
     """Display parsed resume results with enhanced UI"""
     
-    if not st.session_state.parsed_resumes:
+    store = get_candidate_store()
+    job_id = st.session_state.current_job_id
+    total_candidates = store.count(job_id)
+    
+    if not total_candidates:
         st.info("📭 No resumes processed yet.")
         return
     
     st.markdown("## 📊 Analysis Results")
     
+    # Re-rank stored candidates when the scoring weights change
+    display_reranking_controls()
+    
+    # Scores against a job being edited, kept in the session until applied
+    display_live_preview()
+    
     # Enhanced summary metrics
     display_summary_metrics()
     
@@ -560,23 +1171,45 @@ def display_results():
         placeholder="Search by name, email, skills, company...",
         help="Search across all candidate information"
     )
+    group_duplicates = st.checkbox(
+        "📑 Group near-duplicates", value=True,
+        help="Show one card per group of near-identical resumes"
+    )
     
-    # Apply filters
-    filtered_resumes = filter_resumes(
-        st.session_state.parsed_resumes, 
-        min_score, max_score, skill_filter, search_term
+    # Filters, sorting and pagination are pushed down to the candidate store
+    filters = dict(
+        job_id=job_id,
+        min_score=min_score / 100,
+        max_score=max_score / 100,
+        skill_filter=skill_filter,
+        search_term=search_term,
+        collapse_duplicates=group_duplicates
     )
+    filtered_count = store.count(**filters)
     
-    # Sort results
-    filtered_resumes = sort_resumes(filtered_resumes, sort_by)
+    col1, col2 = st.columns([3, 1])
+    with col2:
+        per_page = st.selectbox("📄 Per page", [10, 25, 50, 100], index=0)
+    total_pages = max(1, -(-filtered_count // per_page))
+    with col1:
+        page_number = st.number_input("Page", min_value=1, max_value=total_pages, value=1, step=1)
+    
+    filtered_resumes = store.query(
+        **filters, sort_by=sort_by, limit=per_page, offset=(page_number - 1) * per_page
+    )
     
     # Results header with count
-    st.markdown(f"### 👥 Candidates ({len(filtered_resumes)} of {len(st.session_state.parsed_resumes)})")
+    st.markdown(f"### 👥 Candidates ({filtered_count} of {total_candidates}) · page {page_number}/{total_pages}")
     
     # Display candidates with enhanced cards
     if filtered_resumes:
+        corpus = get_text_corpus()
         for i, resume in enumerate(filtered_resumes):
             display_candidate_card(resume, i)
+            # Only the texts of the page shown are read back from the corpus
+            snippet = find_snippet(corpus.get(resume.get('document_key', '')), search_term) if search_term else ''
+            if snippet:
+                st.caption(f"🔎 …{snippet}…")
     else:
         st.markdown("""
         <div style="text-align: center; padding: 3rem; color: #64748b;">
@@ -592,35 +1225,101 @@ def display_results():
         
         with col1:
             if st.button("📊 Export CSV", use_container_width=True):
-                export_to_csv(filtered_resumes)
+                export_to_csv(store.query(**filters, sort_by=sort_by))
         
         with col2:
             if st.button("📋 Export JSON", use_container_width=True):
-                export_to_json(filtered_resumes)
+                export_to_json(store.query(**filters, sort_by=sort_by))
         
         with col3:
             if st.button("📄 Generate Report", use_container_width=True):
-                generate_report(filtered_resumes)
+                generate_report(store.query(**filters, sort_by=sort_by))
         
         with col4:
             if st.button("📧 Email Top Candidates", use_container_width=True):
                 st.info("📧 Email functionality would be implemented here")
 
+def display_reranking_controls():
+    """Weight sliders that re-rank all stored candidates without re-parsing"""
+    
+    weights, semantic_weight = st.session_state.scoring_weights
+    
+    # Slider state starts from the weights the current ranking was computed with
+    initial = {
+        'rerank_skills': weights['skills'], 'rerank_experience': weights['experience'],
+        'rerank_education': weights['education'], 'rerank_keywords': weights['keywords'],
+        'rerank_semantic': semantic_weight
+    }
+    if 'rerank_applied' not in st.session_state:
+        st.session_state.rerank_applied = {key: int(round(value * 100)) for key, value in initial.items()}
+    for key, value in st.session_state.rerank_applied.items():
+        if key not in st.session_state:
+            st.session_state[key] = value
+    
+    with st.expander("⚖️ Re-rank with Different Weights", expanded=False):
+        col1, col2, col3, col4, col5 = st.columns(5)
+        with col1:
+            skills = st.slider("🛠️ Skills", 0, 100, key="rerank_skills")
+        with col2:
+            experience = st.slider("💼 Experience", 0, 100, key="rerank_experience")
+        with col3:
+            education = st.slider("🎓 Education", 0, 100, key="rerank_education")
+        with col4:
+            keywords = st.slider("🔑 Keywords", 0, 100, key="rerank_keywords")
+        with col5:
+            semantic = st.slider("🧠 Semantic Blend", 0, 100, key="rerank_semantic",
+                                 help="Share of the final score taken by semantic similarity")
+        
+        selected = {'rerank_skills': skills, 'rerank_experience': experience,
+                    'rerank_education': education, 'rerank_keywords': keywords,
+                    'rerank_semantic': semantic}
+        if selected != st.session_state.rerank_applied:
+            new_weights = normalize_weights({
+                'skills': skills, 'experience': experience, 'education': education, 'keywords': keywords
+            })
+            reranked = rerank_candidates(new_weights, semantic / 100)
+            st.session_state.scoring_weights = (new_weights, semantic / 100)
+            st.session_state.rerank_applied = selected
+            if reranked:
+                st.caption("✅ Candidates re-ranked with the new weights")
+            else:
+                st.caption("ℹ️ Weights saved for new analyses; analyze or re-score against a job to re-rank its candidates")
+
+def rerank_candidates(weights, semantic_weight):
+    """
+    Recompute the current job's match scores from stored component scores as one weighted sum
+    
+    Returns:
+        False if there is no current job: results of every job are shown
+        then, and their stored scores are left alone
+    """
+    
+    job_id = st.session_state.current_job_id
+    if job_id is None:
+        return False
+    
+    store = get_candidate_store()
+    candidate_ids, components = store.component_matrix(job_id)
+    if len(candidate_ids):
+        scores = JobMatcher(weights, semantic_weight).combine_scores(components)
+        store.update_scores(candidate_ids, scores)
+    return True
+
 def display_summary_metrics():
     """Display enhanced summary metrics with animations"""
     
-    resumes = st.session_state.parsed_resumes
+    summary = get_candidate_store().score_summary(st.session_state.current_job_id)
     
-    if not resumes:
+    if not summary['total']:
         return
     
-    # Calculate comprehensive metrics
-    total_candidates = len(resumes)
-    excellent_matches = len([r for r in resumes if r.get('match_score', 0) >= 0.8])
-    good_matches = len([r for r in resumes if 0.6 <= r.get('match_score', 0) < 0.8])
-    fair_matches = len([r for r in resumes if 0.4 <= r.get('match_score', 0) < 0.6])
-    poor_matches = len([r for r in resumes if r.get('match_score', 0) < 0.4])
-    avg_score = np.mean([r.get('match_score', 0) for r in resumes]) * 100
+    # Bucket counts and average are aggregated in SQL
+    total_candidates = summary['total']
+    excellent_matches = summary['excellent']
+    good_matches = summary['good']
+    fair_matches = summary['fair']
+    poor_matches = summary['poor']
+    avg_score = summary['average'] * 100
     
     # Display metrics in enhanced cards
     col1, col2, col3, col4 = st.columns(4)
@@ -713,8 +1412,26 @@ def display_candidate_card(resume, index):
         </div>
         """, unsafe_allow_html=True)
         
-        # Expandable details with enhanced content
-        with st.expander(f"📋 Detailed Analysis - {resume.get('name', 'Candidate')}", expanded=False):
+        if resume.get('duplicate_of'):
+            st.caption(f"📑 Near-duplicate ({resume.get('duplicate_similarity') or 0:.0%} similar) of "
+                       f"{resume.get('duplicate_of_filename') or 'candidate #' + str(resume['duplicate_of'])}")
+        if resume.get('duplicate_count'):
+            with st.expander(f"📑 {resume['duplicate_count']} near-duplicate copies", expanded=False):
+                for duplicate in get_candidate_store().duplicates(resume['candidate_id']):
+                    st.write(f"• `{duplicate.get('filename', '')}` uploaded {duplicate.get('upload_time', '')} "
+                             f"({duplicate.get('duplicate_similarity') or 0:.0%} similar)")
+        
+        if resume.get('best_fit_jobs'):
+            st.caption("🧭 Best-fit open roles: " + ", ".join(
+                f"{job['title'] or 'Untitled job'} ({job['match_score']:.0%})" for job in resume['best_fit_jobs']
+            ))
+        
+        candidate_id = resume.get('candidate_id')
+        key_id = candidate_id if candidate_id is not None else index
+        
+        # Details on demand: a closed card neither renders them nor computes the candidate's explanation
+        if st.toggle(f"📋 Detailed Analysis - {resume.get('name', 'Candidate')}", key=f"details_{key_id}"):
+            explanation = candidate_explanation(resume)
             
             # Score breakdown with visual indicators
             st.markdown("#### 📊 Score Breakdown")
@@ -742,14 +1459,19 @@ def display_candidate_card(resume, index):
                 st.markdown("**Technical Skills**")
                 skills = resume.get('skills', [])
                 if skills:
+                    keywords_matched = {k.lower() for k in explanation.get('keywords_matched', [])}
                     skills_html = ""
                     for skill in skills:
-                        is_matched = skill.lower() in [k.lower() for k in resume.get('keywords_matched', [])]
+                        is_matched = skill.lower() in keywords_matched
                         class_name = "matched-skill" if is_matched else ""
                         skills_html += f'<span class="skill-tag {class_name}">{skill}</span>'
                     st.markdown(skills_html, unsafe_allow_html=True)
                 else:
                     st.info("No skills extracted")
+                if explanation.get('missing_skills'):
+                    st.markdown(f"**❌ Missing required skills:** {', '.join(explanation['missing_skills'])}")
+                for recommendation in explanation.get('recommendations', []):
+                    st.caption(f"💡 {recommendation}")
             
             with tab2:
                 st.markdown("**Work Experience**")
@@ -812,7 +1534,7 @@ def display_candidate_card(resume, index):
             col1, col2, col3 = st.columns([2, 1, 1])
             
             with col1:
-                notes_key = f"notes_{index}"
+                notes_key = f"notes_{key_id}"
                 notes = st.text_area(
                     "📝 Recruiter Notes:", 
                     value=resume.get('notes', ''), 
@@ -822,20 +1544,37 @@ def display_candidate_card(resume, index):
                 )
             
             with col2:
-                if st.button(f"💾 Save Notes", key=f"save_{index}"):
-                    st.session_state.parsed_resumes[index]['notes'] = notes
+                if st.button(f"💾 Save Notes", key=f"save_{key_id}"):
+                    resume['notes'] = notes
+                    if candidate_id is not None:
+                        get_candidate_store().update_candidate(candidate_id, notes=notes)
                     st.success("✅ Notes saved!")
                 
-                star_key = f"star_{index}"
+                star_key = f"star_{key_id}"
                 starred = st.checkbox(
                     "⭐ Star Candidate", 
                     value=resume.get('starred', False), 
                     key=star_key
                 )
-                st.session_state.parsed_resumes[index]['starred'] = starred
+                if starred != resume.get('starred', False):
+                    resume['starred'] = starred
+                    if candidate_id is not None:
+                        get_candidate_store().update_candidate(candidate_id, starred=starred)
+                
+                stage = st.selectbox(
+                    "🔄 Pipeline Stage",
+                    PIPELINE_STAGES,
+                    index=PIPELINE_STAGES.index(resume.get('pipeline_stage') or 'new'),
+                    format_func=str.title,
+                    key=f"stage_{key_id}"
+                )
+                if stage != (resume.get('pipeline_stage') or 'new'):
+                    resume['pipeline_stage'] = stage
+                    if candidate_id is not None:
+                        get_candidate_store().update_candidate(candidate_id, pipeline_stage=stage)
             
             with col3:
-                if st.button(f"📧 Contact", key=f"contact_{index}"):
+                if st.button(f"📧 Contact", key=f"contact_{key_id}"):
                     email = resume.get('email', '')
                     if email:
                         st.success(f"📧 Email: {email}")
@@ -843,7 +1582,7 @@ def display_candidate_card(resume, index):
                     else:
                         st.warning("No email found")
                 
-                if st.button(f"📄 View Resume", key=f"view_{index}"):
+                if st.button(f"📄 View Resume", key=f"view_{key_id}"):
                     st.info("Resume viewer would open here")
 
 def analytics_dashboard_page():
@@ -851,7 +1590,10 @@ def analytics_dashboard_page():
     
     st.markdown("## 📊 Advanced Analytics Dashboard")
     
-    if not st.session_state.parsed_resumes:
+    store = get_candidate_store()
+    job_id = st.session_state.current_job_id
+    total_candidates = store.count(job_id)
+    if not total_candidates:
         st.markdown("""
         <div style="text-align: center; padding: 3rem;">
             <h3>📊 No Data Available</h3>
@@ -860,7 +1602,8 @@ def analytics_dashboard_page():
         """, unsafe_allow_html=True)
         return
     
-    resumes = st.session_state.parsed_resumes
+    # Charts are aggregated in SQL, so their size does not grow with the candidate count
+    skill_counts = store.skill_counts(job_id)
     
     # Key metrics overview
     st.markdown("### 📈 Key Performance Indicators")
@@ -870,18 +1613,23 @@ def analytics_dashboard_page():
     col1, col2 = st.columns(2)
     
     with col1:
-        # Score distribution histogram
+        # Score distribution histogram, binned server-side
         st.markdown("### 📊 Score Distribution Analysis")
-        scores = [r.get('match_score', 0) * 100 for r in resumes]
+        counts = store.score_histogram(job_id, bins=SCORE_HISTOGRAM_BINS)
+        bin_width = 100 / SCORE_HISTOGRAM_BINS
         
-        fig = px.histogram(
-            x=scores,
-            nbins=20,
-            title="Candidate Score Distribution",
-            labels={'x': 'Match Score (%)', 'y': 'Number of Candidates'},
-            color_discrete_sequence=['#667eea']
-        )
+        fig = go.Figure(go.Bar(
+            x=np.arange(SCORE_HISTOGRAM_BINS) * bin_width + bin_width / 2,
+            y=counts,
+            width=bin_width,
+            marker_color='#667eea',
+            hovertemplate='%{x:.0f}%: %{y} candidates<extra></extra>'
+        ))
         fig.update_layout(
+            title="Candidate Score Distribution",
+            xaxis_title='Match Score (%)',
+            yaxis_title='Number of Candidates',
+            bargap=0,
             plot_bgcolor='rgba(0,0,0,0)',
             paper_bgcolor='rgba(0,0,0,0)',
             showlegend=False
@@ -891,20 +1639,17 @@ def analytics_dashboard_page():
     with col2:
         # Skills analysis
         st.markdown("### 🛠️ Top Skills Analysis")
-        all_skills = []
-        for resume in resumes:
-            all_skills.extend(resume.get('skills', []))
         
-        if all_skills:
-            skill_counts = pd.Series(all_skills).value_counts().head(15)
+        if skill_counts:
+            top_skills = pd.Series(dict(skill_counts[:15]))
             
             fig = px.bar(
-                x=skill_counts.values,
-                y=skill_counts.index,
+                x=top_skills.values,
+                y=top_skills.index,
                 orientation='h',
                 title="Most Common Skills",
                 labels={'x': 'Number of Candidates', 'y': 'Skills'},
-                color=skill_counts.values,
+                color=top_skills.values,
                 color_continuous_scale='Viridis'
             )
             fig.update_layout(
@@ -918,19 +1663,48 @@ def analytics_dashboard_page():
     # Experience vs Score analysis
     st.markdown("### 📊 Experience vs Performance Analysis")
     
-    # Create DataFrame for analysis
-    df_analysis = pd.DataFrame([
-        {
-            'name': r.get('name', 'Unknown'),
-            'score': r.get('match_score', 0) * 100,
-            'experience': r.get('years_experience', 0),
-            'skills_count': len(r.get('skills', [])),
-            'education_level': get_education_level(r.get('education', []))
-        }
-        for r in resumes
-    ])
+    view = "Scatter"
+    if total_candidates > SCATTER_POINT_LIMIT:
+        view = st.radio(
+            "View", ["Density", f"Sample of {SCATTER_POINT_LIMIT:,}"], horizontal=True,
+            help=f"{total_candidates:,} candidates are too many to plot one by one"
+        )
     
-    if not df_analysis.empty:
+    if view == "Density":
+        density = store.experience_score_density(job_id, score_bins=SCORE_HISTOGRAM_BINS)
+        bin_width = 100 / SCORE_HISTOGRAM_BINS
+        
+        fig = go.Figure(go.Heatmap(
+            x=np.arange(density.shape[0]),
+            y=np.arange(SCORE_HISTOGRAM_BINS) * bin_width + bin_width / 2,
+            z=np.where(density.T > 0, density.T, np.nan),
+            colorscale='Viridis',
+            colorbar={'title': 'Candidates'},
+            hovertemplate='%{x} years, %{y:.0f}%: %{z} candidates<extra></extra>'
+        ))
+        fig.update_layout(
+            title=f"Match Score vs Years of Experience ({total_candidates:,} candidates)",
+            xaxis_title='Years of Experience',
+            yaxis_title='Match Score (%)',
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)'
+        )
+        st.plotly_chart(fig, use_container_width=True)
+    else:
+        df_analysis = pd.DataFrame([
+            {
+                'name': r['name'] or 'Unknown',
+                'score': r['match_score'] * 100,
+                'experience': r['years_experience'],
+                'skills_count': r['skills_count'],
+                'education_level': get_education_level(r['education'])
+            }
+            for r in store.chart_sample(job_id, limit=SCATTER_POINT_LIMIT)
+        ])
+        
+        title = "Match Score vs Years of Experience"
+        if total_candidates > SCATTER_POINT_LIMIT:
+            title += f" (sample of {len(df_analysis):,} of {total_candidates:,})"
         fig = px.scatter(
             df_analysis,
             x='experience',
@@ -938,12 +1712,13 @@ def analytics_dashboard_page():
             size='skills_count',
             color='education_level',
             hover_name='name',
-            title="Match Score vs Years of Experience",
+            title=title,
             labels={
                 'experience': 'Years of Experience', 
                 'score': 'Match Score (%)',
                 'skills_count': 'Number of Skills'
-            }
+            },
+            render_mode='webgl'
         )
         fig.update_layout(
             plot_bgcolor='rgba(0,0,0,0)',
@@ -958,11 +1733,12 @@ def analytics_dashboard_page():
         # Extract required skills from job description
         required_skills = extract_skills_from_text(st.session_state.job_description)
         
-        # Calculate skill coverage
-        skill_coverage = {}
-        for skill in required_skills:
-            count = sum(1 for resume in resumes if skill.lower() in [s.lower() for s in resume.get('skills', [])])
-            skill_coverage[skill] = (count / len(resumes)) * 100
+        # Calculate skill coverage from the per-skill candidate counts
+        candidates_with_skill = {skill.lower(): count for skill, count in skill_counts}
+        skill_coverage = {
+            skill: candidates_with_skill.get(skill.lower(), 0) / total_candidates * 100
+            for skill in required_skills
+        }
         
         if skill_coverage:
             coverage_df = pd.DataFrame(list(skill_coverage.items()), columns=['Skill', 'Coverage %'])
@@ -988,12 +1764,15 @@ def candidate_management_page():
     
     st.markdown("## 👥 Advanced Candidate Management")
     
-    if not st.session_state.parsed_resumes:
+    store = get_candidate_store()
+    job_id = st.session_state.current_job_id
+    
+    if not store.count(job_id):
         st.info("📭 No candidates available. Please process some resumes first.")
         return
     
     # Starred candidates section
-    starred_candidates = [r for r in st.session_state.parsed_resumes if r.get('starred', False)]
+    starred_candidates = store.query(job_id=job_id, starred=True)
     
     if starred_candidates:
         st.markdown("### ⭐ Starred Candidates")
@@ -1020,31 +1799,28 @@ def candidate_management_page():
                 if st.button(f"📄 View", key=f"view_starred_{i}"):
                     st.session_state.selected_candidate = candidate
     
+    # Nearest neighbours of one candidate across all stored candidates
+    display_similar_candidates(job_id)
+    
     # Candidate pipeline management
     st.markdown("### 🔄 Candidate Pipeline")
     
-    # Pipeline stages
-    pipeline_stages = {
-        "📥 New": [r for r in st.session_state.parsed_resumes if not r.get('pipeline_stage')],
-        "📞 Contacted": [r for r in st.session_state.parsed_resumes if r.get('pipeline_stage') == 'contacted'],
-        "📋 Interviewed": [r for r in st.session_state.parsed_resumes if r.get('pipeline_stage') == 'interviewed'],
-        "✅ Hired": [r for r in st.session_state.parsed_resumes if r.get('pipeline_stage') == 'hired'],
-        "❌ Rejected": [r for r in st.session_state.parsed_resumes if r.get('pipeline_stage') == 'rejected']
-    }
+    # Pipeline stages (bucketed with a single GROUP BY)
+    stage_counts = store.stage_counts(job_id)
     
     # Display pipeline metrics
     col1, col2, col3, col4, col5 = st.columns(5)
     
     with col1:
-        st.metric("📥 New", len(pipeline_stages["📥 New"]))
+        st.metric("📥 New", stage_counts['new'])
     with col2:
-        st.metric("📞 Contacted", len(pipeline_stages["📞 Contacted"]))
+        st.metric("📞 Contacted", stage_counts['contacted'])
     with col3:
-        st.metric("📋 Interviewed", len(pipeline_stages["📋 Interviewed"]))
+        st.metric("📋 Interviewed", stage_counts['interviewed'])
     with col4:
-        st.metric("✅ Hired", len(pipeline_stages["✅ Hired"]))
+        st.metric("✅ Hired", stage_counts['hired'])
     with col5:
-        st.metric("❌ Rejected", len(pipeline_stages["❌ Rejected"]))
+        st.metric("❌ Rejected", stage_counts['rejected'])
     
     # Bulk operations
     st.markdown("### 🔄 Bulk Operations")
@@ -1053,7 +1829,7 @@ def candidate_management_page():
     
     with col1:
         if st.button("📊 Export All Data", use_container_width=True):
-            export_to_csv(st.session_state.parsed_resumes)
+            export_to_csv(store.query(job_id=job_id))
     
     with col2:
         if st.button("⭐ Export Starred", use_container_width=True):
@@ -1064,8 +1840,7 @@ def candidate_management_page():
     
     with col3:
         if st.button("📧 Email Top 5", use_container_width=True):
-            top_candidates = sorted(st.session_state.parsed_resumes, 
-                                  key=lambda x: x.get('match_score', 0), reverse=True)[:5]
+            top_candidates = store.query(job_id=job_id, sort_by="Match Score", limit=5)
             emails = [c.get('email', '') for c in top_candidates if c.get('email')]
             if emails:
                 st.success(f"📧 Would email: {', '.join(emails)}")
@@ -1075,11 +1850,52 @@ def candidate_management_page():
     with col4:
         if st.button("🗑️ Clear All Data", use_container_width=True):
             if st.button("⚠️ Confirm Clear All"):
+                store.clear()
+                get_similar_candidates().reload()
+                get_candidate_features().reload()
                 st.session_state.parsed_resumes = []
+                st.session_state.current_job_id = None
                 st.session_state.processing_complete = False
                 st.success("🗑️ All data cleared!")
                 st.experimental_rerun()
 
+def display_similar_candidates(job_id):
+    """Pick a candidate and list the most similar stored candidates"""
+    
+    st.markdown("### 🔍 Find Similar Candidates")
+    
+    candidates = get_candidate_store().query(job_id=job_id, sort_by="Match Score", limit=500)
+    if not candidates:
+        return
+    
+    col1, col2, col3 = st.columns([3, 1, 1])
+    with col1:
+        selected = st.selectbox(
+            "Similar to",
+            candidates,
+            format_func=lambda c: f"{c.get('name', 'Unknown')} ({c.get('filename', '')}) - {c.get('match_score', 0):.1%}"
+        )
+    with col2:
+        top_k = st.number_input("Top K", min_value=1, max_value=50, value=5)
+    with col3:
+        this_job_only = st.checkbox("This job only", value=True)
+    
+    results = get_similar_candidates().similar(
+        selected['candidate_id'], k=int(top_k), job_id=job_id if this_job_only else None
+    )
+    if not results:
+        st.info("No similar candidates found yet.")
+        return
+    
+    st.dataframe(pd.DataFrame([{
+        'Name': candidate.get('name', 'Unknown'),
+        'File': candidate.get('filename', ''),
+        'Similarity': f"{similarity:.1%}",
+        'Match Score': f"{candidate.get('match_score', 0):.1%}",
+        'Experience': f"{candidate.get('years_experience', 0)} years",
+        'Stage': candidate.get('pipeline_stage', 'new'),
+    } for candidate, similarity in results]), use_container_width=True, hide_index=True)
+
 def settings_page():
     """Enhanced settings and configuration page"""
     
@@ -1092,21 +1908,30 @@ def settings_page():
     
     with col1:
         st.markdown("**⚖️ Default Scoring Weights**")
-        default_skills_weight = st.slider("🛠️ Skills Weight", 0, 100, 50)
+        default_skills_weight = st.slider("🛠️ Skills Weight", 0, 100, 40)
         default_experience_weight = st.slider("💼 Experience Weight", 0, 100, 30)
         default_education_weight = st.slider("🎓 Education Weight", 0, 100, 20)
+        default_keywords_weight = st.slider("🔑 Keywords Weight", 0, 100, 10)
         
-        total_weight = default_skills_weight + default_experience_weight + default_education_weight
+        total_weight = (default_skills_weight + default_experience_weight +
+                        default_education_weight + default_keywords_weight)
         if total_weight != 100:
             st.warning(f"⚠️ Total weight: {total_weight}%. Recommended: 100%")
     
     with col2:
         st.markdown("**🔍 Extraction Options**")
-        extract_projects = st.checkbox("📊 Extract Projects by Default", value=True)
-        extract_certifications = st.checkbox("🏆 Extract Certifications by Default", value=True)
-        extract_languages = st.checkbox("🌐 Extract Languages by Default", value=True)
-        extract_awards = st.checkbox("🏅 Extract Awards by Default", value=True)
-        extract_publications = st.checkbox("📚 Extract Publications by Default", value=False)
+        defaults = st.session_state.extraction_fields
+        default_options = {
+            'projects': st.checkbox("📊 Extract Projects by Default", value='projects' in defaults),
+            'certifications': st.checkbox("🏆 Extract Certifications by Default",
+                                          value='certifications' in defaults),
+            'languages': st.checkbox("🌐 Extract Languages by Default", value='languages' in defaults),
+            'awards': st.checkbox("🏅 Extract Awards by Default", value='awards' in defaults),
+            'publications': st.checkbox("📚 Extract Publications by Default", value='publications' in defaults),
+            'readability_score': st.checkbox("📖 Readability Score by Default",
+                                             value='readability_score' in defaults),
+        }
+        st.session_state.extraction_fields = {field for field, checked in default_options.items() if checked}
     
     # Export settings
     st.markdown("### 📥 Export Settings")
@@ -1115,7 +1940,10 @@ def settings_page():
     
     with col1:
         export_format = st.selectbox("📄 Default Export Format", ["CSV", "JSON", "Excel"])
-        include_raw_text = st.checkbox("📝 Include Raw Resume Text in Exports", value=False)
+        st.session_state.export_raw_text = st.checkbox(
+            "📝 Include Raw Resume Text in Exports", value=st.session_state.export_raw_text,
+            help="Adds each resume's extracted text, read from the text corpus"
+        )
         include_notes = st.checkbox("📋 Include Recruiter Notes in Exports", value=True)
     
     with col2:
@@ -1153,7 +1981,97 @@ def settings_page():
         max_file_size = st.slider("📁 Max File Size (MB)", 1, 200, 50)
         parallel_processing = st.checkbox("⚡ Enable Parallel Processing", value=True)
         cache_results = st.checkbox("💾 Cache Processing Results", value=True)
-    
+
+    # Stored jobs that new resumes are ranked against
+    st.markdown("### 📚 Job Library")
+    library = get_job_library()
+    jobs = library.jobs()
+    if jobs:
+        st.dataframe(pd.DataFrame([{
+            'ID': job['job_id'],
+            'Title': job['title'] or 'Untitled job',
+            'Required Skills': job['required_skills'],
+            'Updated': job['updated_at'],
+        } for job in jobs]), use_container_width=True, hide_index=True)
+        
+        selected_job = st.selectbox("✏️ Edit Job", jobs,
+                                    format_func=lambda job: f"#{job['job_id']} {job['title'] or 'Untitled job'}")
+        edited_title = st.text_input("🎯 Title", value=selected_job['title'],
+                                     key=f"library_title_{selected_job['job_id']}")
+        edited_skills = st.text_input("🛠️ Required Skills", value=selected_job['required_skills'],
+                                      key=f"library_skills_{selected_job['job_id']}")
+        edited_description = st.text_area("📋 Description", value=selected_job['description'], height=150,
+                                          key=f"library_description_{selected_job['job_id']}")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("💾 Update Job", use_container_width=True):
+                library.save_job(edited_title, edited_description, edited_skills, job_id=selected_job['job_id'])
+                st.rerun()
+        with col2:
+            if st.button("🗑️ Delete Job", use_container_width=True):
+                library.remove_job(selected_job['job_id'])
+                st.rerun()
+    else:
+        st.info("No stored jobs yet. Use 💾 Save to Job Library on the Job Configuration tab.")
+
+    # Extracted texts kept for re-scoring and exports
+    st.markdown("### 🗄️ Resume Text Corpus")
+    corpus_stats = get_text_corpus().stats()
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("📄 Stored Texts", corpus_stats['documents'])
+    with col2:
+        st.metric("💾 On Disk", f"{corpus_stats['stored_bytes'] / 1024:.0f} KB")
+    with col3:
+        ratio = corpus_stats['text_length'] / corpus_stats['stored_bytes'] if corpus_stats['stored_bytes'] else 0
+        st.metric("🗜️ Compression", f"{ratio:.1f}x")
+
+    # Files the per-file sandbox killed; later batches skip them until released
+    st.markdown("### 🧱 Quarantined Files")
+    store = get_candidate_store()
+    quarantined = store.quarantined()
+    if quarantined:
+        st.dataframe(pd.DataFrame([{
+            'File': entry['filename'],
+            'Reason': entry['reason'],
+            'Stage': entry['stage'],
+            'Detail': entry['detail'],
+            'SHA-1': entry['document_key'],
+            'Quarantined': entry['created_at'],
+        } for entry in quarantined]), use_container_width=True, hide_index=True)
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            released = st.selectbox("🔓 Release File", quarantined,
+                                    format_func=lambda entry: f"{entry['filename']} ({entry['document_key'][:10]})")
+            if st.button("🔓 Release", use_container_width=True):
+                store.release_quarantine(released['document_key'])
+                st.rerun()
+        with col2:
+            if st.button("🧹 Release All", use_container_width=True):
+                store.release_quarantine()
+                st.rerun()
+    else:
+        st.info("No quarantined files")
+
+    # Format detection counters since the server started
+    st.markdown("### 📁 Extraction Statistics")
+    extraction_stats = get_extraction_stats()
+    if extraction_stats:
+        stats_df = pd.DataFrame([
+            {'Format': file_format, **{column: counts.get(column, 0)
+                                       for column in ('files', 'mismatches', 'unsupported', 'failures')}}
+            for file_format, counts in sorted(extraction_stats.items())
+        ])
+        st.dataframe(stats_df, use_container_width=True, hide_index=True)
+        st.caption("Formats are detected from file content; mismatches are files whose extension disagreed")
+        if st.button("🔄 Reset Statistics"):
+            reset_extraction_stats()
+            st.rerun()
+    else:
+        st.info("No files extracted yet")
+
     # Save settings
     if st.button("💾 Save All Settings", type="primary", use_container_width=True):
         # Here you would save settings to a config file or database
@@ -1161,58 +2079,6 @@ def settings_page():
         st.balloons()
 
 # Helper functions (continued in next part due to length)
-def filter_resumes(resumes, min_score, max_score, skill_filter, search_term):
-    """Enhanced resume filtering with multiple criteria"""
-    
-    filtered = []
-    
-    for resume in resumes:
-        score = resume.get('match_score', 0) * 100
-        
-        # Score filter
-        if score < min_score or score > max_score:
-            continue
-        
-        # Skill filter
-        if skill_filter:
-            skills = [s.lower() for s in resume.get('skills', [])]
-            filter_skills = [s.strip().lower() for s in skill_filter.split(',')]
-            if not any(fs in ' '.join(skills) for fs in filter_skills):
-                continue
-        
-        # Search filter (enhanced to search multiple fields)
-        if search_term:
-            search_fields = [
-                resume.get('name', ''),
-                resume.get('email', ''),
-                ' '.join(resume.get('skills', [])),
-                ' '.join([exp.get('company', '') if isinstance(exp, dict) else str(exp) 
-                         for exp in resume.get('experience', [])]),
-                ' '.join([edu.get('institution', '') if isinstance(edu, dict) else str(edu) 
-                         for edu in resume.get('education', [])])
-            ]
-            search_text = ' '.join(search_fields).lower()
-            if search_term.lower() not in search_text:
-                continue
-        
-        filtered.append(resume)
-    
-    return filtered
-
-def sort_resumes(resumes, sort_by):
-    """Enhanced resume sorting with multiple criteria"""
-    
-    if sort_by == "Match Score":
-        return sorted(resumes, key=lambda x: x.get('match_score', 0), reverse=True)
-    elif sort_by == "Name":
-        return sorted(resumes, key=lambda x: x.get('name', '').lower())
-    elif sort_by == "Experience":
-        return sorted(resumes, key=lambda x: x.get('years_experience', 0), reverse=True)
-    elif sort_by == "Upload Time":
-        return sorted(resumes, key=lambda x: x.get('upload_time', ''), reverse=True)
-    
-    return resumes
-
 def get_score_class(score):
     """Get CSS class for score styling"""
     if score >= 0.8:
@@ -1279,6 +2145,12 @@ def export_to_csv(resumes):
             'Filename': resume.get('filename', '')
         })
     
+    # Texts are read from the corpus only when the export asks for them
+    if st.session_state.export_raw_text:
+        corpus = get_text_corpus()
+        for row, resume in zip(data, resumes):
+            row['Resume Text'] = corpus.get(resume.get('document_key', '')) or ''
+    
     df = pd.DataFrame(data)
     csv = df.to_csv(index=False)
     
@@ -1292,6 +2164,14 @@ def export_to_csv(resumes):
 def export_to_json(resumes):
     """Enhanced JSON export with full data structure"""
     
+    # Explanations are computed on demand; fill in those not yet stored
+    resumes = [{**resume, **explanation} for resume, explanation in zip(resumes, candidate_explanations(resumes))]
+    
+    if st.session_state.export_raw_text:
+        corpus = get_text_corpus()
+        resumes = [{**resume, 'resume_text': corpus.get(resume.get('document_key', '')) or ''}
+                   for resume in resumes]
+    
     # Clean and prepare data for JSON export
     export_data = {
         'export_info': {
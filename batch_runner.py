@@ -0,0 +1,213 @@
+import os
+import time
+import uuid
+import queue
+import logging
+import threading
+from collections import Counter
+from typing import Dict, List, Any, Callable, Optional, Set
+
+# Worker threads running submitted batches (override with RESUME_ANALYZER_BATCH_WORKERS)
+BATCH_WORKERS = int(os.environ.get('RESUME_ANALYZER_BATCH_WORKERS', '2'))
+
+# Finished jobs kept per owner so their outcome can still be shown
+MAX_FINISHED_JOBS = 10
+
+# Finished jobs kept across all owners, and seconds a finished job is kept
+# (sessions that end never come back for theirs)
+MAX_FINISHED_JOBS_TOTAL = 200
+FINISHED_JOB_TTL = float(os.environ.get('RESUME_ANALYZER_FINISHED_JOB_TTL', 3600))
+
+JOB_STATES = ('queued', 'running', 'completed', 'cancelled', 'failed')
+FINISHED_STATES = ('completed', 'cancelled', 'failed')
+
+
+class BatchJob:
+    """
+    A submitted batch and its progress
+
+    The work function runs on a runner thread and reports through
+    progress() and add_result(); the UI reads consistent copies with
+    snapshot(). Cancellation is cooperative: work checks `cancelled`
+    between files and returns the results it has so far.
+    """
+
+    def __init__(self, owner: str, label: str, total: int,
+                 work: Callable[['BatchJob'], Dict[str, Any]], key: Optional[str] = None):
+        self.job_id = uuid.uuid4().hex[:12]
+        self.owner = owner
+        self.label = label
+        self.key = key
+        self.total = total
+        self.work = work
+        self.state = 'queued'
+        self.processed = 0
+        self.current_file = ''
+        self.results: List[Dict[str, Any]] = []
+        self.outcome: Dict[str, Any] = {}
+        self.error = ''
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    @property
+    def finished(self) -> bool:
+        return self.state in FINISHED_STATES
+
+    def progress(self, index: int, total: int, filename: str) -> None:
+        """Progress callback: called before file `index` of `total` starts"""
+        with self._lock:
+            self.processed = index
+            self.total = total
+            self.current_file = filename
+
+    def add_result(self, index: int, result: Dict[str, Any], text: str = '') -> None:
+        """Result callback: record a finished file's result"""
+        with self._lock:
+            self.results.append(result)
+            self.processed = index + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Consistent copy of the job's state for display"""
+
+        with self._lock:
+            now = self.finished_at or time.time()
+            return {
+                'job_id': self.job_id,
+                'label': self.label,
+                'state': self.state,
+                'processed': self.processed,
+                'total': self.total,
+                'current_file': self.current_file,
+                'results': list(self.results),
+                'outcome': dict(self.outcome),
+                'error': self.error,
+                'submitted_at': self.submitted_at,
+                'elapsed': now - self.started_at if self.started_at else 0.0,
+                'cancel_requested': self.cancelled,
+            }
+
+
+class BatchRunner:
+    """
+    Run resume batches on background threads, independent of UI reruns
+
+    Jobs are queued in submission order and run by a fixed pool of worker
+    threads, so a user can queue several batches and keep using the app
+    while they run. Threads (not processes) are used so the work shares
+    the process's candidate store, indexes and loaded models.
+    """
+
+    def __init__(self, workers: int = BATCH_WORKERS):
+        self._queue: "queue.Queue[BatchJob]" = queue.Queue()
+        self._jobs: Dict[str, BatchJob] = {}
+        self._lock = threading.Lock()
+        for i in range(max(1, workers)):
+            threading.Thread(target=self._worker, name=f'batch-runner-{i}', daemon=True).start()
+
+    def submit(self, owner: str, label: str, work: Callable[[BatchJob], Dict[str, Any]],
+               total: int = 0, key: Optional[str] = None) -> str:
+        """
+        Queue a batch
+
+        Args:
+            owner: Session that submitted the job
+            label: Short description shown with the job
+            work: Called with the BatchJob on a worker thread; returns the
+                job's outcome dictionary
+            total: Number of files in the batch
+            key: Optional caller identifier of the work (e.g. a durable batch id)
+
+        Returns:
+            Job id
+        """
+
+        job = BatchJob(owner, label, total, work, key)
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._prune()
+        self._queue.put(job)
+        return job.job_id
+
+    def get(self, job_id: str) -> Optional[BatchJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self, owner: str) -> List[BatchJob]:
+        """Jobs of an owner, oldest first"""
+        with self._lock:
+            return [job for job in self._jobs.values() if job.owner == owner]
+
+    def active_keys(self) -> Set[str]:
+        """Keys of all unfinished jobs, whoever submitted them"""
+        with self._lock:
+            return {job.key for job in self._jobs.values() if job.key and not job.finished}
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Request cancellation of a queued or running job
+
+        Returns:
+            True if the job exists and had not finished
+        """
+
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return False
+        job._cancel.set()
+        return True
+
+    def _prune(self) -> None:
+        """
+        Forget finished jobs older than FINISHED_JOB_TTL, and the oldest ones
+        beyond MAX_FINISHED_JOBS per owner or MAX_FINISHED_JOBS_TOTAL overall
+        """
+
+        now = time.time()
+        finished = sorted((job for job in self._jobs.values() if job.finished),
+                          key=lambda job: job.finished_at or 0.0)
+        per_owner = Counter(job.owner for job in finished)
+        remaining = len(finished)
+        for job in finished:
+            if (now - (job.finished_at or 0.0) > FINISHED_JOB_TTL or per_owner[job.owner] > MAX_FINISHED_JOBS
+                    or remaining > MAX_FINISHED_JOBS_TOTAL):
+                del self._jobs[job.job_id]
+                per_owner[job.owner] -= 1
+                remaining -= 1
+
+    def _worker(self) -> None:
+        while True:
+            job = self._queue.get()
+            with job._lock:
+                if job.cancelled:
+                    job.state = 'cancelled'
+                    job.finished_at = time.time()
+                else:
+                    job.state = 'running'
+                    job.started_at = time.time()
+            if job.finished:
+                with self._lock:
+                    self._prune()
+                continue
+
+            try:
+                outcome = job.work(job)
+                state, error = ('cancelled' if job.cancelled else 'completed'), ''
+            except Exception as e:
+                logging.error(f"Batch {job.job_id} ({job.label}) failed: {str(e)}")
+                outcome, state, error = {}, 'failed', str(e)
+
+            with job._lock:
+                job.outcome = outcome or {}
+                job.state = state
+                job.error = error
+                job.finished_at = time.time()
+            # Pruned as jobs finish too, since sessions that end never submit again
+            with self._lock:
+                self._prune()
@@ -0,0 +1,534 @@
+"""Reproducible synthetic resume and job description corpus.
+
+Documents are generated from a seeded RNG so the same seed always yields
+byte-identical files.  PDF and DOCX files are written directly (no extra
+dependencies) and are readable by pdfplumber, PyPDF2 and python-docx.
+
+    python -m benchmarks.corpus --count 100 --formats pdf,docx,txt --out corpus/
+"""
+
+import io
+import os
+import random
+import zipfile
+import argparse
+from typing import Dict, List, Tuple
+from xml.sax.saxutils import escape
+
+FIRST_NAMES = [
+    'James', 'Mary', 'Robert', 'Patricia', 'John', 'Jennifer', 'Michael', 'Linda', 'David',
+    'Elizabeth', 'William', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica', 'Thomas', 'Sarah',
+    'Priya', 'Wei', 'Carlos', 'Fatima', 'Olga', 'Kenji', 'Amara', 'Luca', 'Sofia', 'Mateo'
+]
+LAST_NAMES = [
+    'Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez',
+    'Martinez', 'Hernandez', 'Lopez', 'Wilson', 'Anderson', 'Taylor', 'Moore', 'Patel', 'Chen',
+    'Kim', 'Nguyen', 'Okafor', 'Rossi', 'Ivanova', 'Tanaka', 'Schmidt', 'Silva'
+]
+CITIES = [
+    ('San Francisco', 'CA'), ('Austin', 'TX'), ('Seattle', 'WA'), ('Boston', 'MA'), ('Denver', 'CO'),
+    ('Chicago', 'IL'), ('Atlanta', 'GA'), ('Portland', 'OR'), ('Raleigh', 'NC'), ('Miami', 'FL')
+]
+TITLES = [
+    'Software Engineer', 'Senior Software Engineer', 'Data Scientist', 'DevOps Engineer',
+    'Frontend Developer', 'Backend Developer', 'Machine Learning Engineer', 'Engineering Manager',
+    'Data Analyst', 'Solutions Architect', 'QA Engineer', 'Mobile Developer', 'Technical Lead'
+]
+COMPANIES = [
+    'Acme Corp', 'Globex', 'Initech', 'Umbrella Systems', 'Stark Industries', 'Wayne Enterprises',
+    'Hooli', 'Pied Piper', 'Vandelay Industries', 'Cyberdyne', 'Soylent Labs', 'Tyrell Corporation',
+    'Wonka Analytics', 'Oscorp', 'Massive Dynamic', 'Aperture Science'
+]
+SKILLS = [
+    'Python', 'Java', 'JavaScript', 'TypeScript', 'Go', 'Rust', 'C++', 'React', 'Angular',
+    'Node.js', 'Django', 'Flask', 'Spring', 'PostgreSQL', 'MySQL', 'MongoDB', 'Redis', 'AWS',
+    'Azure', 'Google Cloud', 'Docker', 'Kubernetes', 'Terraform', 'Jenkins', 'Git', 'Kafka',
+    'Machine Learning', 'Deep Learning', 'TensorFlow', 'PyTorch', 'Pandas', 'NumPy', 'GraphQL',
+    'Microservices', 'Agile', 'Scrum', 'CI/CD', 'Elasticsearch', 'Apache Spark', 'Hadoop'
+]
+DEGREES = [
+    'Bachelor of Science in Computer Science', 'Bachelor of Arts in Mathematics',
+    'Master of Science in Data Science', 'Master of Science in Software Engineering',
+    'MBA', 'PhD in Computer Science', 'B.S. in Electrical Engineering'
+]
+UNIVERSITIES = [
+    'Stanford University', 'University of Texas', 'Georgia Institute of Technology',
+    'University of Washington', 'Carnegie Mellon University', 'Boston University',
+    'University of Michigan', 'Purdue University', 'Ohio State University'
+]
+CERTIFICATIONS = [
+    'AWS Certified Solutions Architect', 'Microsoft Certified Azure Developer', 'PMP',
+    'Certified Scrum Master', 'Google Cloud Professional Data Engineer', 'CompTIA Security+'
+]
+LANGUAGES = ['English', 'Spanish', 'French', 'German', 'Chinese', 'Japanese', 'Hindi', 'Portuguese']
+VERBS = [
+    'Designed', 'Built', 'Led', 'Implemented', 'Optimized', 'Migrated', 'Automated', 'Scaled',
+    'Maintained', 'Delivered', 'Refactored', 'Architected', 'Mentored', 'Launched'
+]
+OBJECTS = [
+    'a distributed data pipeline', 'customer-facing web applications', 'the payments platform',
+    'internal developer tooling', 'real-time analytics dashboards', 'a recommendation engine',
+    'REST and GraphQL APIs', 'the CI/CD infrastructure', 'a mobile banking app',
+    'search and ranking services', 'the observability stack', 'batch ETL jobs'
+]
+OUTCOMES = [
+    'reducing latency by {n}%', 'serving {n}k daily users', 'cutting costs by {n}%',
+    'improving throughput {n}x', 'with {n} engineers', 'increasing conversion by {n}%'
+]
+
+# Number of experience entries, bullets per entry and projects for each size
+SIZES = {
+    'small': (2, 2, 1),
+    'medium': (4, 4, 2),
+    'large': (8, 8, 5),
+}
+
+
+def generate_resume_text(rng: random.Random, size: str = 'medium') -> str:
+    """
+    Generate the plain text of one realistic resume
+
+    Args:
+        rng: Seeded random generator
+        size: One of 'small', 'medium', 'large'
+
+    Returns:
+        Resume text with section headers and line structure
+    """
+
+    n_jobs, n_bullets, n_projects = SIZES[size]
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    city, state = rng.choice(CITIES)
+    skills = rng.sample(SKILLS, rng.randint(5, 15))
+    years = rng.randint(1, 20)
+
+    lines = [
+        f"{first} {last}",
+        f"{first.lower()}.{last.lower()}@example.com | ({rng.randint(200, 999)}) "
+        f"{rng.randint(200, 999)}-{rng.randint(1000, 9999)} | {city}, {state}",
+        f"linkedin.com/in/{first.lower()}-{last.lower()} | github.com/{first.lower()}{last.lower()}",
+        "",
+        "SUMMARY",
+        f"{rng.choice(TITLES)} with {years} years of experience in {', '.join(skills[:3])}. "
+        f"Passionate about building reliable systems and mentoring teams.",
+        "",
+        "EXPERIENCE",
+    ]
+
+    end_year = 2024
+    for _ in range(n_jobs):
+        start_year = end_year - rng.randint(1, 4)
+        end_label = 'Present' if end_year == 2024 else str(end_year)
+        lines.append(f"{rng.choice(TITLES)} at {rng.choice(COMPANIES)} | {start_year} - {end_label}")
+        for _ in range(n_bullets):
+            outcome = rng.choice(OUTCOMES).format(n=rng.randint(2, 90))
+            lines.append(f"- {rng.choice(VERBS)} {rng.choice(OBJECTS)} using "
+                         f"{rng.choice(skills)}, {outcome}")
+        end_year = start_year
+
+    lines += ["", "EDUCATION"]
+    for _ in range(rng.randint(1, 2)):
+        lines.append(f"{rng.choice(DEGREES)} from {rng.choice(UNIVERSITIES)}, {rng.randint(1995, 2020)}")
+
+    lines += ["", "SKILLS", ', '.join(skills), "", "PROJECTS"]
+    for i in range(n_projects):
+        lines.append(f"Project {rng.choice(OBJECTS).title()} {i + 1}")
+        lines.append(f"Open source tool built with {rng.choice(skills)} and {rng.choice(skills)}.")
+        lines.append("")
+
+    lines += ["CERTIFICATIONS"] + rng.sample(CERTIFICATIONS, rng.randint(0, 3))
+    lines += ["", "AWARDS", f"Employee of the Year {rng.randint(2010, 2023)} award for outstanding delivery"]
+    lines += ["", "LANGUAGES", ', '.join(rng.sample(LANGUAGES, rng.randint(1, 3)))]
+
+    return '\n'.join(lines) + '\n'
+
+
+# Contact header layouts of the labelled name/location set: the plain layout
+# of generate_resume_text and variants that make the name or location ambiguous
+HEADER_LAYOUTS = [
+    'plain', 'caps', 'middle_initial', 'credentials', 'title_line', 'labelled', 'contact_first',
+    'headline_first', 'email_only', 'initial_email', 'same_line', 'no_location', 'city_country',
+]
+DOUBLE_LAST_NAMES = ["O'Brien", 'Garcia-Lopez', 'McDonald', 'Smith-Jones']
+COUNTRY_CITIES = [('London', 'United Kingdom'), ('Toronto', 'Canada'), ('Berlin', 'Germany'), ('Madrid', 'Spain')]
+
+
+def generate_labelled_resume(rng: random.Random, size: str = 'small') -> Tuple[str, Dict[str, str]]:
+    """
+    Generate a resume whose contact header follows one of HEADER_LAYOUTS
+
+    Returns:
+        Tuple of (resume text, labels with the true 'name' and 'location'
+        ('' when the resume gives none) and the 'layout')
+    """
+
+    layout = rng.choice(HEADER_LAYOUTS)
+    first = rng.choice(FIRST_NAMES)
+    last = rng.choice(LAST_NAMES + DOUBLE_LAST_NAMES)
+    name = f"{first} {last}"
+    email = f"{first}.{last}@example.com".lower().replace("'", '')
+    initial_email = f"{first[0]}{last}@example.com".lower().replace("'", '')
+    phone = f"({rng.randint(200, 999)}) {rng.randint(200, 999)}-{rng.randint(1000, 9999)}"
+    city, region = rng.choice(COUNTRY_CITIES if layout == 'city_country' else CITIES)
+    location = f"{city}, {region}"
+    title = rng.choice(TITLES)
+
+    header = {
+        'plain': [name, f"{email} | {phone} | {location}"],
+        'caps': [name.upper(), f"{email} | {phone} | {location}"],
+        'credentials': [f"{name}, {rng.choice(['PhD', 'MBA', 'PMP'])}", f"{email} | {phone} | {location}"],
+        'title_line': [rng.choice(['RESUME', 'CURRICULUM VITAE']), name, f"{email} | {phone} | {location}"],
+        'labelled': [f"Name: {name}", f"Email: {email}", f"Phone: {phone}", f"Location: {location}"],
+        'contact_first': [f"{email} | {phone}", name, location],
+        'headline_first': [title, f"{name} | {location}", f"{email} | {phone}"],
+        'email_only': [f"{email} | {phone} | {location}"],
+        'initial_email': [name, f"{initial_email} | {phone}", location],
+        'same_line': [f"{name} {location}", f"{email} | {phone}"],
+        'no_location': [name, f"{email} | {phone}"],
+        'city_country': [name, f"{email} | {phone} | {location}"],
+    }
+    if layout == 'middle_initial':
+        name = f"{first} {rng.choice('ABCDEFGHJKLMNPRSTW')}. {last}"
+        lines = [name, f"{email} | {phone} | {location}"]
+    else:
+        lines = header[layout]
+    if layout == 'no_location':
+        location = ''
+
+    body = generate_resume_text(rng, size)
+    body = body[body.index('\nSUMMARY\n'):]
+    return '\n'.join(lines) + '\n' + body, {'name': name, 'location': location, 'layout': layout}
+
+
+# Hand-written contact headers, kept apart from HEADER_LAYOUTS: the parser's
+# name and location heuristics were not tuned on them, so they are the set
+# confidence thresholds are calibrated on. Each is (header lines, name,
+# location), with '' where the header gives none.
+HOLDOUT_HEADERS = [
+    (["Priya Raghunathan", "Bengaluru, India · priya.r@gmail.com · +91 98450 12345"],
+     "Priya Raghunathan", "Bengaluru, India"),
+    (["THOMAS J. WHITFIELD", "1234 Oak Street, Portland, OR 97205", "(503) 555-0182 | tjwhitfield@outlook.com"],
+     "Thomas J. Whitfield", "Portland, OR"),
+    (["Machine Learning", "Python, Django, Flask, PostgreSQL", "contact: ml.jobs@example.com"], "", ""),
+    (["Senior Data Engineer", "Maria Gonzalez", "Austin, TX | 512-555-0147 | maria@gonzalez.dev"],
+     "Maria Gonzalez", "Austin, TX"),
+    (["Kevin O'Connor", "kevin.oconnor@mail.com", "Boston, MA"], "Kevin O'Connor", "Boston, MA"),
+    (["Li Wei", "Shanghai, China", "wei.li@example.cn"], "Li Wei", "Shanghai, China"),
+    (["Jean-Luc Picard", "Paris, France", "captain@enterprise.org"], "Jean-Luc Picard", "Paris, France"),
+    (["Full Stack Developer", "React, Node.js, TypeScript", "San Diego, CA"], "", "San Diego, CA"),
+    (["Ana María López", "Madrid, Spain | ana.lopez@correo.es"], "Ana María López", "Madrid, Spain"),
+    (["Robert Chen, CPA", "Chicago, IL", "rchen@cpafirm.com"], "Robert Chen", "Chicago, IL"),
+    (["Jordan Taylor", "Product Manager", "Denver, CO · jordan@taylor.io"], "Jordan Taylor", "Denver, CO"),
+    (["Data Science Portfolio", "Samuel Okafor", "Lagos, Nigeria", "sam.okafor@gmail.com"],
+     "Samuel Okafor", "Lagos, Nigeria"),
+    (["Cloud Computing Enthusiast", "Emily Zhang", "emily.zhang@icloud.com"], "Emily Zhang", ""),
+    (["Hiroshi Tanaka", "Tokyo, Japan", "+81 90 1234 5678"], "Hiroshi Tanaka", "Tokyo, Japan"),
+    (["Aisha Bello", "aisha.bello@protonmail.com"], "Aisha Bello", ""),
+    (["Michael Brown Jr.", "Atlanta, GA", "mbrown@gmail.com"], "Michael Brown Jr.", "Atlanta, GA"),
+    (["Sofia Rossi", "Milan, Italy", "info@rossidesign.it"], "Sofia Rossi", "Milan, Italy"),
+    (["Contact Information", "Daniel Kim", "Seattle, WA", "dkim@uw.edu"], "Daniel Kim", "Seattle, WA"),
+    (["Natalie Portman-Smith", "Phoenix, AZ | nps@mail.com"], "Natalie Portman-Smith", "Phoenix, AZ"),
+    (["Ryan Mitchell", "DevOps | AWS | Kubernetes", "Dallas, TX", "ryan.m@devops.io"], "Ryan Mitchell", "Dallas, TX"),
+    (["Big Data Analytics", "Hadoop, Spark, Hive"], "", ""),
+    (["Olga Petrova", "olga.petrova@yandex.ru", "Moscow, Russia"], "Olga Petrova", "Moscow, Russia"),
+    (["Carlos Mendes", "São Paulo, Brazil", "carlos.mendes@gmail.com"], "Carlos Mendes", "São Paulo, Brazil"),
+    (["Emma Wilson", "Nashville, TN", "emma.wilson@gmail.com"], "Emma Wilson", "Nashville, TN"),
+    (["Software Engineering Intern", "Noah Davis", "noah.davis@student.edu", "Ann Arbor, MI"],
+     "Noah Davis", "Ann Arbor, MI"),
+    (["Grace Lee", "grace@lee.com"], "Grace Lee", ""),
+    (["William Harris", "Raleigh, NC 27601", "919-555-0123"], "William Harris", "Raleigh, NC"),
+    (["Fatima Khan", "Dubai, United Arab Emirates", "fatima.khan@mail.ae"],
+     "Fatima Khan", "Dubai, United Arab Emirates"),
+    (["Chris Evans", "Orlando, FL", "cevans@gmail.com"], "Chris Evans", "Orlando, FL"),
+    (["Customer Success Manager", "Lauren Scott", "Columbus, OH"], "Lauren Scott", "Columbus, OH"),
+    (["Benjamin Clark", "Minneapolis, MN", "ben.clark@gmail.com"], "Benjamin Clark", "Minneapolis, MN"),
+    (["Digital Marketing Specialist", "Social Media, SEO, Content Strategy"], "", ""),
+    (["Isabella Martinez", "Miami, FL | (305) 555-0199"], "Isabella Martinez", "Miami, FL"),
+    (["Ethan Wright", "Pittsburgh, PA", "e.wright@cmu.edu"], "Ethan Wright", "Pittsburgh, PA"),
+    (["Zoe Adams", "zoe.adams@gmail.com | Portland, ME"], "Zoe Adams", "Portland, ME"),
+    (["Henry Ford", "Detroit, MI", "h.ford@motors.com"], "Henry Ford", "Detroit, MI"),
+    (["Amelia Turner", "Sacramento, CA", "amelia.t@gmail.com"], "Amelia Turner", "Sacramento, CA"),
+    (["Research Interests", "Natural Language Processing, Computer Vision"], "", ""),
+    (["Lucas Moreau", "Lyon, France", "lucas.moreau@orange.fr"], "Lucas Moreau", "Lyon, France"),
+    (["Mia Johnson", "Salt Lake City, UT", "mia.johnson@gmail.com"], "Mia Johnson", "Salt Lake City, UT"),
+]
+
+
+def holdout_labelled_resumes(rng: random.Random, size: str = 'small') -> List[Tuple[str, Dict[str, str]]]:
+    """
+    HOLDOUT_HEADERS as resumes, each followed by a generated body
+
+    Returns:
+        (resume text, labels with 'name', 'location' and 'layout' 'holdout') pairs
+    """
+
+    resumes = []
+    for lines, name, location in HOLDOUT_HEADERS:
+        body = generate_resume_text(rng, size)
+        body = body[body.index('\nSUMMARY\n'):]
+        resumes.append(('\n'.join(lines) + '\n' + body, {'name': name, 'location': location, 'layout': 'holdout'}))
+    return resumes
+
+
+# Worst-case line shapes for the parser's patterns: long comma-free lines of
+# capitals and of the separators the job and education patterns backtrack over
+ADVERSARIAL_UNITS = {
+    'capitals': 'A',
+    'capitalized_words': 'Abc ',
+    'at_chain': 'Ab at ',
+    'dash_chain': 'Ab - ',
+    'degree_chain': 'Master ',
+    'email_chain': 'a.',
+}
+ADVERSARIAL_KINDS = tuple(ADVERSARIAL_UNITS) + ('single_line',)
+
+
+def generate_adversarial_text(rng: random.Random, kind: str, length: int = 20000,
+                              line_length: int = 4000) -> str:
+    """
+    Generate resume text built to make backtracking regex engines slow
+
+    Args:
+        rng: Seeded random generator
+        kind: One of ADVERSARIAL_KINDS; 'single_line' is an at_chain document
+            without headings or line breaks
+        length: Approximate number of characters
+        line_length: Characters per adversarial line
+
+    Returns:
+        Text with a contact block and experience and education sections
+        made of adversarial lines (one unbroken line for 'single_line')
+    """
+
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    if kind == 'single_line':
+        return (name + ' ' + ADVERSARIAL_UNITS['at_chain'] * (length // 6))[:length]
+
+    unit = ADVERSARIAL_UNITS[kind]
+    line = (unit * (line_length // len(unit) + 1))[:line_length]
+    if kind == 'email_chain':
+        # An address whose domain never reaches a top-level domain
+        line = 'x@' + line[2:]
+    lines_per_section = max(1, length // (2 * line_length))
+
+    lines = [name, f"{name.split()[0].lower()}@example.com", "", "EXPERIENCE"]
+    lines += [line] * lines_per_section
+    lines += ["", "EDUCATION"]
+    lines += [line] * lines_per_section
+    return '\n'.join(lines) + '\n'
+
+
+def generate_job_description(rng: random.Random) -> Dict[str, str]:
+    """
+    Generate a job posting
+
+    Returns:
+        Dictionary with 'job_title', 'job_description' and 'required_skills'
+    """
+
+    title = rng.choice(TITLES)
+    skills = rng.sample(SKILLS, rng.randint(4, 8))
+    years = rng.randint(2, 10)
+    description = '\n'.join([
+        f"We are hiring a {title} to join {rng.choice(COMPANIES)}.",
+        "",
+        "Responsibilities",
+        f"- {rng.choice(VERBS)} {rng.choice(OBJECTS)}",
+        f"- {rng.choice(VERBS)} {rng.choice(OBJECTS)}",
+        f"- Collaborate with product and design using {', '.join(skills[:3])}",
+        "",
+        "Requirements",
+        f"{years}+ years of experience in software development.",
+        f"{rng.choice(['Bachelor', 'Master'])} degree in Computer Science or related field.",
+        f"Strong knowledge of {', '.join(skills)}.",
+    ])
+    return {
+        'job_title': title,
+        'job_description': description,
+        'required_skills': ', '.join(skills),
+    }
+
+
+def _pdf_escape(line: str) -> str:
+    return line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def render_pdf(text: str, lines_per_page: int = 55) -> bytes:
+    """Render text into a minimal multi-page PDF with a Helvetica text layer"""
+
+    lines = text.split('\n')
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # Pages tree, filled in once page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_refs = []
+    for page_lines in pages:
+        stream = "BT /F1 10 Tf 12 TL 50 770 Td\n" + ''.join(
+            f"({_pdf_escape(line)}) '\n" for line in page_lines
+        ) + "ET"
+        stream_bytes = stream.encode('latin-1', errors='replace')
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream_bytes) + stream_bytes + b"\nendstream")
+        content_ref = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_ref
+        )
+        page_refs.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b' '.join(b"%d 0 R" % ref for ref in page_refs), len(page_refs)
+    )
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-'
+    'officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/'
+    'relationships/officeDocument" Target="word/document.xml"/>'
+    '</Relationships>'
+)
+_W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+
+
+def _docx_paragraph(line: str) -> str:
+    return f'<w:p><w:r><w:t xml:space="preserve">{escape(line)}</w:t></w:r></w:p>'
+
+
+def render_docx(text: str, table_rows: int = 0) -> bytes:
+    """
+    Render text into a minimal DOCX package
+
+    Args:
+        text: Resume text, one paragraph per line
+        table_rows: Number of extra skill-matrix table rows to append, for
+            table-heavy documents; every fourth row has a cell merged across
+            two grid columns
+
+    Returns:
+        DOCX file content
+    """
+
+    body = [_docx_paragraph(line) for line in text.split('\n')]
+
+    if table_rows:
+        rows = []
+        for i in range(table_rows):
+            if i % 4 == 3:
+                cells = [f'<w:tc><w:tcPr><w:gridSpan w:val="2"/></w:tcPr>'
+                         f'{_docx_paragraph(SKILLS[i % len(SKILLS)] + " stack")}</w:tc>']
+                values = [SKILLS[(i + 2) % len(SKILLS)], f"{(i % 10) + 1} years"]
+            else:
+                cells = []
+                values = [SKILLS[(i + j) % len(SKILLS)] for j in range(3)] + [f"{(i % 10) + 1} years"]
+            cells += [f'<w:tc>{_docx_paragraph(value)}</w:tc>' for value in values]
+            rows.append('<w:tr>' + ''.join(cells) + '</w:tr>')
+        grid = '<w:tblGrid>' + '<w:gridCol w:w="2000"/>' * 4 + '</w:tblGrid>'
+        body.append('<w:tbl>' + grid + ''.join(rows) + '</w:tbl>')
+
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        f'<w:document xmlns:w="{_W_NS}"><w:body>' + ''.join(body) + '<w:sectPr/></w:body></w:document>'
+    )
+
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, 'w', zipfile.ZIP_DEFLATED) as package:
+        package.writestr('[Content_Types].xml', _CONTENT_TYPES)
+        package.writestr('_rels/.rels', _RELS)
+        package.writestr('word/document.xml', document)
+    return out.getvalue()
+
+
+def render_txt(text: str, encoding: str = 'utf-8') -> bytes:
+    """Encode resume text as a TXT file"""
+    return text.encode(encoding, errors='replace')
+
+
+def generate_corpus(count: int, formats: Tuple[str, ...] = ('pdf', 'docx', 'txt'), seed: int = 42,
+                    size: str = 'medium', table_rows: int = 0) -> List[Tuple[str, bytes]]:
+    """
+    Generate a list of resume files
+
+    Args:
+        count: Number of documents
+        formats: File formats to cycle through
+        seed: RNG seed; the same seed always yields the same corpus
+        size: One of 'small', 'medium', 'large'
+        table_rows: Skill-matrix table rows added to DOCX files
+
+    Returns:
+        List of (filename, file content) pairs
+    """
+
+    rng = random.Random(seed)
+    files = []
+
+    for i in range(count):
+        fmt = formats[i % len(formats)]
+        text = generate_resume_text(rng, size)
+        if fmt == 'pdf':
+            content = render_pdf(text)
+        elif fmt == 'docx':
+            content = render_docx(text, table_rows)
+        else:
+            content = render_txt(text, rng.choice(['utf-8', 'utf-8', 'latin-1']))
+        files.append((f"resume_{i:06d}.{fmt}", content))
+
+    return files
+
+
+def write_corpus(directory: str, files: List[Tuple[str, bytes]]) -> None:
+    """Write generated files to a directory"""
+
+    os.makedirs(directory, exist_ok=True)
+    for filename, content in files:
+        with open(os.path.join(directory, filename), 'wb') as fh:
+            fh.write(content)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Generate a synthetic resume corpus")
+    arg_parser.add_argument('--count', type=int, default=100)
+    arg_parser.add_argument('--formats', default='pdf,docx,txt')
+    arg_parser.add_argument('--size', choices=sorted(SIZES), default='medium')
+    arg_parser.add_argument('--table-rows', type=int, default=0)
+    arg_parser.add_argument('--seed', type=int, default=42)
+    arg_parser.add_argument('--out', default='corpus')
+    args = arg_parser.parse_args()
+
+    files = generate_corpus(args.count, tuple(args.formats.split(',')), args.seed,
+                            args.size, args.table_rows)
+    write_corpus(args.out, files)
+
+    job = generate_job_description(random.Random(args.seed))
+    with open(os.path.join(args.out, 'job_description.txt'), 'w', encoding='utf-8') as fh:
+        fh.write(f"{job['job_title']}\n{job['required_skills']}\n\n{job['job_description']}\n")
+
+    print(f"Wrote {len(files)} files to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
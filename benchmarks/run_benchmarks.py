@@ -0,0 +1,675 @@
+"""Per-stage benchmark suite for the resume analyzer.
+
+Times text extraction, each resume parser extractor, each job matcher
+component and end-to-end batches on a synthetic corpus, then reports
+throughput, latency percentiles and peak memory.  Results can be stored as
+a baseline and later runs compared against it.
+
+    python -m benchmarks.run_benchmarks --sizes 10,1000 --save-baseline
+    python -m benchmarks.run_benchmarks --sizes 10,1000 --fail-on-regression
+"""
+
+import gc
+import os
+import json
+import time
+import random
+import logging
+import argparse
+import numpy as np
+import platform
+import tracemalloc
+from typing import Callable, Dict, List, Any, Sequence, Tuple
+
+from benchmarks.corpus import (generate_corpus, generate_job_description, generate_adversarial_text,
+                               generate_labelled_resume, holdout_labelled_resumes,
+                               ADVERSARIAL_KINDS)
+from utils import (extract_text_from_pdf, extract_text_from_docx, extract_text_from_txt,
+                   _docx_text_streaming, _docx_text_python_docx)
+from resume_parser import ResumeParser, OPTIONAL_FIELDS, NER_CONFIDENCE, named_entities
+from matcher import JobMatcher
+from document import AnalyzedDocument
+from sections import segment_sections
+from pipeline import process_batch
+from profiling import BatchProfiler, PROFILE_MODES
+from similarity import TextVectorizer, IVFIndex
+from candidate_features import CandidateFeatureIndex
+from sandbox import SandboxPool, SANDBOX_WORKERS
+from regex_engine import RE2_AVAILABLE
+
+DEFAULT_BASELINE = 'benchmarks/baseline.json'
+
+# Parser extractors timed individually on cleaned text
+PARSER_EXTRACTORS = [
+    '_extract_name', '_extract_email', '_extract_phone', '_extract_location', '_extract_skills',
+    '_extract_experience', '_extract_education', '_extract_certifications', '_extract_projects',
+    '_extract_languages', '_extract_awards', '_extract_publications', '_readability_score',
+]
+
+# Extraction profiles timed by the parse stage: optional fields to extract
+PARSE_PROFILES = {
+    'core': (),
+    'all': tuple(OPTIONAL_FIELDS),
+}
+
+# Share of heuristic names that must be right above a confidence for it to skip NER
+CALIBRATION_PRECISION = 0.95
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of a non-empty sequence"""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def measure(name: str, func: Callable[[Any], Any], inputs: Sequence[Any],
+            memory_sample: int = 50) -> Dict[str, Any]:
+    """
+    Time func over every input and measure peak traced memory on a sample
+
+    Timing and memory are measured in separate passes because tracemalloc
+    slows allocation-heavy code considerably.
+
+    Returns:
+        Dictionary of stage metrics
+    """
+
+    latencies = []
+    gc.collect()
+    start = time.perf_counter()
+    for item in inputs:
+        t0 = time.perf_counter()
+        func(item)
+        latencies.append(time.perf_counter() - t0)
+    total = time.perf_counter() - start
+
+    tracemalloc.start()
+    for item in inputs[:memory_sample]:
+        func(item)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'stage': name,
+        'count': len(inputs),
+        'total_s': round(total, 4),
+        'throughput_per_s': round(len(inputs) / total, 2) if total > 0 else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'peak_mem_kb': round(peak / 1024, 1),
+    }
+
+
+def bench_extraction(files: List[tuple]) -> List[Dict[str, Any]]:
+    """Benchmark the per-format text extractors"""
+
+    extractors = {
+        'pdf': extract_text_from_pdf,
+        'docx': extract_text_from_docx,
+        'txt': extract_text_from_txt,
+    }
+    results = []
+    for fmt, func in extractors.items():
+        contents = [content for name, content in files if name.endswith('.' + fmt)]
+        if contents:
+            results.append(measure(f"extract.{func.__name__}", func, contents))
+    return results
+
+
+def bench_docx(count: int, seed: int, table_rows: int) -> List[Dict[str, Any]]:
+    """
+    Compare the streaming DOCX reader with the python-docx object model
+
+    Runs on large resumes with table_rows skill-matrix rows (including
+    merged cells) appended to each document.
+    """
+
+    contents = [content for name, content in
+                generate_corpus(count, formats=('docx',), seed=seed, size='large', table_rows=table_rows)]
+    return [
+        measure('docx.streaming', _docx_text_streaming, contents),
+        measure('docx.python_docx', _docx_text_python_docx, contents),
+    ]
+
+
+def bench_parser(texts: List[str]) -> List[Dict[str, Any]]:
+    """
+    Benchmark parse_resume as a whole, section segmentation and each extractor on its own
+
+    parse_resume is timed with the default fields and with each of
+    PARSE_PROFILES, to show what turning optional fields off saves.
+    """
+
+    parser = ResumeParser()
+    documents = [AnalyzedDocument(parser._clean_text(text)) for text in texts]
+    results = [
+        measure('parse.parse_resume', lambda t: parser.parse_resume(t, 'bench.txt'), texts),
+        *(measure(f"parse.parse_resume.{name}", lambda t, f=fields: parser.parse_resume(t, 'bench.txt', fields=f),
+                  texts) for name, fields in PARSE_PROFILES.items()),
+        measure('parse.AnalyzedDocument', lambda t: AnalyzedDocument(t).tokens, texts),
+        measure('parse.segment_sections', segment_sections, [document.text for document in documents]),
+    ]
+
+    for name in PARSER_EXTRACTORS:
+        results.append(measure(f"parse.{name}", getattr(parser, name), documents))
+    return results
+
+
+def bench_contact(count: int, seed: int) -> List[Dict[str, Any]]:
+    """
+    Benchmark the name and location cascade on labelled resumes
+
+    Two labelled sets are parsed with the heuristics alone, with the
+    cascade (NER only below NER_CONFIDENCE) and with NER on every resume:
+    `count` generated resumes with varied contact headers
+    (generate_labelled_resume, written alongside the heuristics) and the
+    hand-written HOLDOUT_HEADERS, which the heuristics were not tuned on.
+    Each result also holds the fraction of resumes NER ran on and the name
+    and location accuracy. The heuristics' confidence is checked against
+    their accuracy per confidence band, and on the holdout the lowest
+    confidence from which the heuristic name is right at least
+    CALIBRATION_PRECISION of the time is printed next to NER_CONFIDENCE.
+    """
+
+    rng = random.Random(seed)
+    labelled_sets = {
+        'contact': [generate_labelled_resume(rng) for _ in range(count)],
+        'contact.holdout': holdout_labelled_resumes(rng),
+    }
+    cleaner = ResumeParser()
+    ner_available = bool(named_entities("Barack Obama was born in Hawaii."))
+
+    def same(found: str, expected: str) -> bool:
+        found = '' if found == "Name not found" else found
+        return ' '.join(found.lower().split()) == ' '.join(expected.lower().split())
+
+    def contact(parser: ResumeParser, text: str) -> Tuple[str, str, bool]:
+        document = AnalyzedDocument(text)
+        name, location = parser._extract_name(document), parser._extract_location(document)
+        return name, location, document.has_derived('entities')
+
+    results = []
+    for prefix, labelled in labelled_sets.items():
+        texts = [cleaner._clean_text(text) for text, _ in labelled]
+        accuracy = {}
+        for mode, threshold in (('heuristics', 0.0), ('cascade', NER_CONFIDENCE), ('ner', float('inf'))):
+            parser = ResumeParser(ner_confidence=threshold)
+            found = [contact(parser, text) for text in texts]
+            result = measure(f"{prefix}.{mode}", lambda t: contact(parser, t), texts)
+            result['ner_fraction'] = round(sum(ner for _, _, ner in found) / len(texts), 4)
+            result['name_accuracy'] = round(sum(same(name, labels['name']) for (name, _, _), (_, labels)
+                                                in zip(found, labelled)) / len(texts), 4)
+            result['location_accuracy'] = round(sum(same(location, labels['location'])
+                                                    for (_, location, _), (_, labels)
+                                                    in zip(found, labelled)) / len(texts), 4)
+            accuracy[mode] = result
+            results.append(result)
+            print(f"{prefix}.{mode}: NER on {result['ner_fraction']:.1%} of resumes, name accuracy "
+                  f"{result['name_accuracy']:.1%}, location accuracy {result['location_accuracy']:.1%}")
+
+        cascade, ner = accuracy['cascade'], accuracy['ner']
+        print(f"{prefix}: cascade vs NER on every resume: name accuracy "
+              f"{cascade['name_accuracy'] - ner['name_accuracy']:+.1%}, "
+              f"location accuracy {cascade['location_accuracy'] - ner['location_accuracy']:+.1%}, "
+              f"p50 {cascade['p50_ms']:.3f} vs {ner['p50_ms']:.3f} ms"
+              + ("" if ner_available else " (no NER model loaded: install spaCy and en_core_web_sm to compare)"))
+
+        # Calibration: how often the heuristic name is right at each confidence
+        scored = []
+        for text, (_, labels) in zip(texts, labelled):
+            name, confidence = cleaner._name_from_header(AnalyzedDocument(text))
+            scored.append((confidence, same(name, labels['name'])))
+        bands: Dict[float, List[bool]] = {}
+        for confidence, correct in scored:
+            bands.setdefault(min(0.9, int(round(confidence * 10, 6)) / 10), []).append(correct)
+        for band in sorted(bands):
+            print(f"{prefix}.calibration: confidence {band:.1f}-{band + 0.1:.1f}: {len(bands[band])} resumes, "
+                  f"heuristic name correct {np.mean(bands[band]):.1%}")
+
+    # Threshold from the set the heuristics were not tuned on
+    for threshold in sorted({confidence for confidence, _ in scored}):
+        trusted = [correct for confidence, correct in scored if confidence >= threshold]
+        if np.mean(trusted) >= CALIBRATION_PRECISION:
+            print(f"contact.holdout: heuristic names are right {np.mean(trusted):.1%} of the time from confidence "
+                  f"{threshold:.2f} ({len(trusted)}/{len(scored)} resumes skip NER); "
+                  f"NER_CONFIDENCE is {NER_CONFIDENCE:g}")
+            break
+    return results
+
+
+def bench_adversarial(lengths: Sequence[int], count: int, seed: int,
+                      budget_ms: float) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Benchmark parse_resume on worst-case inputs for its regex patterns
+
+    Every adversarial kind is parsed at each length with Python's re engine
+    and, when google-re2 is installed, with RE2. Parse time should grow
+    linearly with length for both.
+
+    Returns:
+        Tuple of (stage results, messages for documents whose parse took
+        longer than budget_ms)
+    """
+
+    engines = ['re'] + (['re2'] if RE2_AVAILABLE else [])
+    results, over_budget = [], []
+
+    for engine in engines:
+        parser = ResumeParser(regex_engine=engine)
+        parser.parse_resume(generate_adversarial_text(random.Random(seed), 'capitals', 1000), 'warm-up.txt')
+        per_1k = []
+        for kind in ADVERSARIAL_KINDS:
+            for length in lengths:
+                rng = random.Random(seed)
+                texts = [generate_adversarial_text(rng, kind, length) for _ in range(count)]
+                result = measure(f"adversarial.{engine}.{kind}.{length // 1000}k",
+                                 lambda t: parser.parse_resume(t, 'adversarial.txt'), texts,
+                                 memory_sample=min(count, 5))
+                results.append(result)
+                per_1k.append(result['p99_ms'] / (length / 1000))
+                if result['p99_ms'] > budget_ms:
+                    over_budget.append(f"{result['stage']}: p99 {result['p99_ms']}ms "
+                                       f"exceeds the {budget_ms:g}ms per-resume budget")
+
+        print(f"adversarial.{engine}: worst p99 {max(per_1k):.2f}ms per 1k characters")
+
+    return results, over_budget
+
+
+def bench_matcher(texts: List[str], job: Dict[str, str]) -> List[Dict[str, Any]]:
+    """
+    Benchmark calculate_match_score as a whole, explain_match and each scoring component
+
+    Components run on prebuilt AnalyzedDocuments, as they do inside
+    calculate_match_score.
+    """
+
+    matcher = JobMatcher()
+    description, title = job['job_description'], job['job_title']
+    skills = [s.strip() for s in job['required_skills'].split(',') if s.strip()]
+    job_doc = matcher._job_document(description)
+    documents = [AnalyzedDocument(text) for text in texts]
+
+    components = {
+        '_calculate_skills_match': lambda d: matcher._calculate_skills_match(d, skills, job_doc),
+        '_calculate_experience_match': lambda d: matcher._calculate_experience_match(d, job_doc, title),
+        '_calculate_education_match': lambda d: matcher._calculate_education_match(d, job_doc),
+        '_calculate_keyword_match': lambda d: matcher._calculate_keyword_match(d, job_doc),
+        '_calculate_semantic_similarity': lambda d: matcher._calculate_semantic_similarity(d, job_doc),
+        '_extract_matched_keywords': lambda d: matcher._extract_matched_keywords(d, job_doc),
+    }
+    results = [measure('match.calculate_match_score', lambda t: matcher.calculate_match_score(
+        t, description, title, job['required_skills']), texts)]
+    # Explanations are computed on demand, when a candidate is opened or exported
+    results.append(measure('match.explain_match', lambda d: matcher.explain_match(
+        d.text, description, job['required_skills'], document=d), documents))
+    return results + [measure(f"match.{name}", func, documents) for name, func in components.items()]
+
+
+def bench_scoring(texts: List[str], job: Dict[str, str], rows: int) -> List[Dict[str, Any]]:
+    """
+    Benchmark batch scoring of a feature matrix
+
+    Features are extracted from the stage texts once and tiled to rows
+    candidates, so only the vectorized scoring itself is timed.
+    """
+
+    matcher = JobMatcher()
+    features = matcher.feature_matrix(texts, job['job_description'], job['job_title'],
+                                      job['required_skills'])
+    matrix = np.resize(features, (rows, features.shape[1]))
+
+    results = [measure('score.feature_matrix', lambda t: matcher.feature_matrix(
+        [t], job['job_description'], job['job_title'], job['required_skills']), texts)]
+
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    matcher.score_batch(matrix)
+    total = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    results.append({
+        'stage': f"score.score_batch.{rows}",
+        'count': rows,
+        'total_s': round(total, 4),
+        'throughput_per_s': round(rows / total, 2) if total > 0 else 0.0,
+        'p50_ms': None,
+        'p95_ms': None,
+        'p99_ms': None,
+        'peak_mem_kb': round(peak / 1024, 1),
+    })
+    return results
+
+
+def bench_live_rescore(texts: List[str], job: Dict[str, str], size: int) -> List[Dict[str, Any]]:
+    """
+    Benchmark re-scoring size stored candidates as the job is edited
+
+    The stage texts are tiled to size candidates and profiled once; each
+    timed edit changes the title, the required skills or the description
+    and recomputes only the job side (features and scores).
+    """
+
+    matcher = JobMatcher()
+    index = CandidateFeatureIndex(lambda candidate_ids: {})
+    start = time.perf_counter()
+    index.add(list(range(size)), [texts[i % len(texts)] for i in range(size)])
+    build = time.perf_counter() - start
+    candidate_ids = list(range(size))
+
+    title, skills, description = job['job_title'], job['required_skills'], job['job_description']
+    edits = [(title, skills, description)]
+    for i in range(20):
+        if i % 3 == 0:
+            title = f"{job['job_title']} {i}"
+        elif i % 3 == 1:
+            skills = f"{skills}, Skill{i}"
+        else:
+            description = f"{description}\nNice to have: tool{i} and practice{i}."
+        edits.append((title, skills, description))
+
+    def rescore(edit):
+        _, features = index.feature_matrix(candidate_ids, edit[2], edit[0], edit[1])
+        return matcher.score_batch(features)
+
+    # The first edit builds the stacked matrices; the rest hit the cached resume side
+    rescore(edits[0])
+    result = measure(f"rescore.edit.{size}", rescore, edits[1:], memory_sample=3)
+    full = measure('rescore.full_feature_matrix', lambda t: matcher.feature_matrix(
+        [t], description, title, skills), texts)
+    print(f"rescore.edit.{size}: resume features built in {build:.2f}s; one edit re-scores in "
+          f"{result['p50_ms']:.0f} ms vs ~{full['p50_ms'] * size / 1000:.1f}s with full feature extraction")
+    return [result, full]
+
+
+def bench_similarity(texts: List[str], size: int, seed: int, queries: int = 200) -> List[Dict[str, Any]]:
+    """
+    Benchmark "find similar candidates" on an index of size vectors
+
+    Lexical vectors of the stage texts are replicated with random
+    perturbations up to size candidates; queries are timed against the
+    IVF index and recall@10 is measured against exact search.
+    """
+
+    vectorizer = TextVectorizer()
+    results = [measure('similar.TextVectorizer', lambda t: vectorizer.transform([t]), texts)]
+
+    rng = np.random.default_rng(seed)
+    base = vectorizer.transform(texts)
+    vectors = base[rng.integers(0, len(base), size)] + rng.normal(scale=0.05, size=(size, base.shape[1]))
+    vectors = (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+    index = IVFIndex(vectors.shape[1])
+    start = time.perf_counter()
+    for offset in range(0, size, 50000):
+        index.add(np.arange(offset, min(size, offset + 50000)), vectors[offset:offset + 50000])
+    build = time.perf_counter() - start
+
+    query_ids = rng.choice(size, min(queries, size), replace=False)
+    result = measure(f"similar.search.{size}", lambda q: index.search(vectors[q], 10, exclude=[q]),
+                     list(query_ids))
+
+    recall = []
+    for q in query_ids[:20]:
+        exact = set(np.argsort(-(vectors @ vectors[q]))[:11].tolist()) - {q}
+        found = {candidate_id for candidate_id, _ in index.search(vectors[q], 10, exclude=[q])}
+        recall.append(len(exact & found) / max(1, len(exact)))
+    print(f"similar.search.{size}: index built in {build:.2f}s, recall@10 {np.mean(recall):.3f}")
+
+    return results + [result]
+
+
+def bench_end_to_end(sizes: List[int], job: Dict[str, str], seed: int, size: str,
+                     profile_mode: str = None, profile_dir: str = '.',
+                     sandbox: SandboxPool = None) -> List[Dict[str, Any]]:
+    """
+    Benchmark whole batches through pipeline.process_batch
+
+    With profile_mode set, each batch runs under BatchProfiler and the
+    profile artifact is written to profile_dir as batch_<count>_profile.zip.
+    With a sandbox, extraction and parsing run in its worker processes
+    (stages are named sandbox.<count>; the pool is warmed up first and peak
+    memory covers the parent process only).
+    """
+
+    prefix = 'sandbox' if sandbox else 'batch'
+    if sandbox:
+        list(sandbox.run(generate_corpus(sandbox.workers, seed=seed, size=size)))
+
+    results = []
+    for count in sizes:
+        files = generate_corpus(count, seed=seed, size=size)
+        gc.collect()
+        tracemalloc.start()
+        start = time.perf_counter()
+        if profile_mode:
+            with BatchProfiler(profile_mode) as profiler:
+                process_batch(files, job['job_description'], job['job_title'], job['required_skills'],
+                              sandbox=sandbox)
+        else:
+            process_batch(files, job['job_description'], job['job_title'], job['required_skills'],
+                          sandbox=sandbox)
+        total = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        if profile_mode:
+            os.makedirs(profile_dir, exist_ok=True)
+            path = os.path.join(profile_dir, f"{prefix}_{count}_profile.zip")
+            with open(path, 'wb') as fh:
+                fh.write(profiler.artifact())
+            print(f"Profile for {prefix}.{count} written to {path}")
+
+        results.append({
+            'stage': f"{prefix}.{count}",
+            'count': count,
+            'total_s': round(total, 4),
+            'throughput_per_s': round(count / total, 2) if total > 0 else 0.0,
+            'p50_ms': None,
+            'p95_ms': None,
+            'p99_ms': None,
+            'peak_mem_kb': round(peak / 1024, 1),
+        })
+    return results
+
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any],
+            tolerance: float) -> List[str]:
+    """
+    Compare results with a baseline run
+
+    Returns:
+        List of regression messages (throughput or p95 worse than tolerance)
+    """
+
+    previous = {r['stage']: r for r in baseline.get('results', [])}
+    regressions = []
+
+    for result in results:
+        base = previous.get(result['stage'])
+        if not base:
+            continue
+        if base['throughput_per_s'] and result['throughput_per_s'] < base['throughput_per_s'] * (1 - tolerance):
+            regressions.append(
+                f"{result['stage']}: throughput {result['throughput_per_s']}/s "
+                f"vs baseline {base['throughput_per_s']}/s"
+            )
+        if base.get('p95_ms') and result.get('p95_ms') and result['p95_ms'] > base['p95_ms'] * (1 + tolerance):
+            regressions.append(
+                f"{result['stage']}: p95 {result['p95_ms']}ms vs baseline {base['p95_ms']}ms"
+            )
+    return regressions
+
+
+def format_table(results: List[Dict[str, Any]], baseline: Dict[str, Any] = None) -> str:
+    """Format results as a fixed-width table, with speedup against baseline"""
+
+    previous = {r['stage']: r for r in (baseline or {}).get('results', [])}
+    header = f"{'stage':<48}{'n':>7}{'docs/s':>11}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'peak KB':>11}{'vs base':>9}"
+    lines = [header, '-' * len(header)]
+
+    for r in results:
+        base = previous.get(r['stage'])
+        speedup = (f"{r['throughput_per_s'] / base['throughput_per_s']:.2f}x"
+                   if base and base['throughput_per_s'] else '')
+        cells = [f"{r[k]:.3f}" if r[k] is not None else '-' for k in ('p50_ms', 'p95_ms', 'p99_ms')]
+        lines.append(
+            f"{r['stage']:<48}{r['count']:>7}{r['throughput_per_s']:>11.2f}"
+            f"{cells[0]:>10}{cells[1]:>10}{cells[2]:>10}{r['peak_mem_kb']:>11.1f}{speedup:>9}"
+        )
+    return '\n'.join(lines)
+
+
+def run(sizes: List[int], stage_docs: int = 200, seed: int = 42, size: str = 'medium',
+        stages: Sequence[str] = ('extract', 'docx', 'parse', 'contact', 'adversarial', 'match', 'score',
+                                 'rescore', 'similar', 'batch'),
+        profile_mode: str = None, profile_dir: str = '.',
+        docx_table_rows: int = 300, score_rows: int = 1000000,
+        similar_size: int = 500000, rescore_size: int = 5000, sandbox_workers: int = SANDBOX_WORKERS,
+        adversarial_lengths: Sequence[int] = (5000, 50000), adversarial_budget_ms: float = 1000.0) -> Dict[str, Any]:
+    """
+    Run the benchmark suite
+
+    Args:
+        sizes: Document counts for end-to-end batches
+        stage_docs: Documents used for each per-stage benchmark
+        seed: Corpus seed
+        size: Resume size ('small', 'medium', 'large')
+        stages: Which groups of benchmarks to run
+        profile_mode: Profile end-to-end batches ('sampling' or 'deterministic')
+        profile_dir: Directory for profile artifacts
+        docx_table_rows: Table rows per document in the DOCX comparison
+        score_rows: Candidates in the vectorized scoring benchmark
+        similar_size: Candidates in the similarity index benchmark
+        rescore_size: Stored candidates re-scored per job edit in the live re-score benchmark
+        sandbox_workers: Worker processes for the sandboxed batch benchmark
+        adversarial_lengths: Characters per document in the adversarial parse benchmark
+        adversarial_budget_ms: Per-resume parse time the adversarial documents must stay under
+
+    Returns:
+        Report dictionary with environment info and per-stage results
+    """
+
+    files = generate_corpus(stage_docs, seed=seed, size=size)
+    texts = [extract_text_from_txt(content) for name, content in
+             generate_corpus(stage_docs, formats=('txt',), seed=seed, size=size)]
+    job = generate_job_description(random.Random(seed))
+
+    results = []
+    budget_violations = []
+    if 'extract' in stages:
+        results += bench_extraction(files)
+    if 'docx' in stages:
+        results += bench_docx(stage_docs, seed, docx_table_rows)
+    if 'parse' in stages:
+        results += bench_parser(texts)
+    if 'contact' in stages:
+        results += bench_contact(stage_docs, seed)
+    if 'adversarial' in stages:
+        adversarial, budget_violations = bench_adversarial(adversarial_lengths, max(1, stage_docs // 20),
+                                                           seed, adversarial_budget_ms)
+        results += adversarial
+    if 'match' in stages:
+        results += bench_matcher(texts, job)
+    if 'score' in stages:
+        results += bench_scoring(texts, job, score_rows)
+    if 'rescore' in stages:
+        results += bench_live_rescore(texts, job, rescore_size)
+    if 'similar' in stages:
+        results += bench_similarity(texts, similar_size, seed)
+    if 'batch' in stages:
+        results += bench_end_to_end(sizes, job, seed, size, profile_mode, profile_dir)
+    if 'sandbox' in stages:
+        pool = SandboxPool(workers=sandbox_workers)
+        try:
+            results += bench_end_to_end(sizes, job, seed, size, profile_mode, profile_dir, pool)
+        finally:
+            pool.close()
+
+    return {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'seed': seed,
+        'size': size,
+        'stage_docs': stage_docs,
+        'results': results,
+        'budget_violations': budget_violations,
+    }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark the resume analyzer")
+    arg_parser.add_argument('--sizes', default='10,1000,10000',
+                            help="Comma-separated end-to-end batch sizes")
+    arg_parser.add_argument('--stage-docs', type=int, default=200,
+                            help="Documents per per-stage benchmark")
+    arg_parser.add_argument('--stages',
+                            default='extract,docx,parse,contact,adversarial,match,score,rescore,similar,batch')
+    arg_parser.add_argument('--docx-table-rows', type=int, default=300,
+                            help="Table rows per document in the DOCX reader comparison")
+    arg_parser.add_argument('--score-rows', type=int, default=1000000,
+                            help="Candidates in the vectorized scoring benchmark")
+    arg_parser.add_argument('--similar-size', type=int, default=500000,
+                            help="Candidates in the similarity index benchmark")
+    arg_parser.add_argument('--rescore-size', type=int, default=5000,
+                            help="Stored candidates in the live re-score benchmark")
+    arg_parser.add_argument('--sandbox-workers', type=int, default=SANDBOX_WORKERS,
+                            help="Worker processes for the sandbox stage (not run by default)")
+    arg_parser.add_argument('--adversarial-lengths', default='5000,50000',
+                            help="Comma-separated characters per adversarial document")
+    arg_parser.add_argument('--adversarial-budget-ms', type=float, default=1000.0,
+                            help="Per-resume parse time adversarial documents must stay under")
+    arg_parser.add_argument('--size', choices=['small', 'medium', 'large'], default='medium')
+    arg_parser.add_argument('--seed', type=int, default=42)
+    arg_parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    arg_parser.add_argument('--save-baseline', action='store_true',
+                            help="Store this run as the new baseline")
+    arg_parser.add_argument('--tolerance', type=float, default=0.10,
+                            help="Allowed relative slowdown before flagging a regression")
+    arg_parser.add_argument('--fail-on-regression', action='store_true')
+    arg_parser.add_argument('--output', help="Also write the JSON report to this path")
+    arg_parser.add_argument('--profile', choices=PROFILE_MODES,
+                            help="Profile end-to-end batches and write artifacts")
+    arg_parser.add_argument('--profile-dir', default='.')
+    args = arg_parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    report = run([int(s) for s in args.sizes.split(',') if s], args.stage_docs, args.seed,
+                 args.size, tuple(args.stages.split(',')), args.profile, args.profile_dir,
+                 args.docx_table_rows, args.score_rows, args.similar_size, args.rescore_size, args.sandbox_workers,
+                 [int(n) for n in args.adversarial_lengths.split(',') if n], args.adversarial_budget_ms)
+
+    try:
+        with open(args.baseline, encoding='utf-8') as fh:
+            baseline = json.load(fh)
+    except (OSError, ValueError):
+        baseline = None
+
+    print(format_table(report['results'], baseline))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fh:
+            json.dump(report, fh, indent=2)
+
+    regressions = compare(report['results'], baseline, args.tolerance) if baseline else []
+    for message in regressions:
+        print(f"REGRESSION {message}")
+    for message in report['budget_violations']:
+        print(f"OVER BUDGET {message}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as fh:
+            json.dump(report, fh, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+
+    if (regressions or report['budget_violations']) and args.fail_on_regression:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,276 @@
+import threading
+from typing import Callable, Dict, List, Any, Optional, Sequence, Tuple
+import numpy as np
+from fuzzywuzzy import fuzz
+from matcher import JobMatcher, FEATURE_KEYS
+from document import AnalyzedDocument
+from job_library import _SINGLE_DOC_IDF_SQ, _sparse_rows
+
+class CandidateFeatureIndex:
+    """
+    Resume-side scoring inputs of stored candidates, for re-scoring against edited jobs
+
+    The counterpart of job_library.JobLibrary: each candidate's resume is
+    analyzed once (keyword-vectorizer term counts, vocabulary, whitespace
+    words, title lines, years of experience, degree level and lowercased
+    text) and the profiles are stacked into sparse matrices. Scoring the
+    candidates against a job then only computes the job side: pairwise
+    features are sparse matrix-vector products, and required skills, job
+    skills and titles are matched once against the distinct words and
+    titles of all resumes and cached. Features equal
+    JobMatcher.feature_matrix against the same job (the keyword score is
+    exact unless a pair has more than the vectorizer's 5000 features).
+    """
+
+    def __init__(self, text_loader: Callable[[Sequence[int]], Dict[int, str]],
+                 matcher: Optional[JobMatcher] = None):
+        """
+        Args:
+            text_loader: Returns stored resume texts by candidate id, for
+                candidates not added with add() and for embeddings
+            matcher: Matcher whose extractors and vectorizer define the features
+        """
+
+        self.text_loader = text_loader
+        self.matcher = matcher or JobMatcher()
+        self._lock = threading.RLock()
+        self._rows: Dict[int, int] = {}
+        self._profiles: List[Dict[str, Any]] = []
+        self._missing: set = set()
+        self._stacked = None
+        self._vectors: Dict[str, Dict[int, np.ndarray]] = {}
+
+    def __len__(self) -> int:
+        return len(self._profiles)
+
+    def _profile(self, text: str) -> Dict[str, Any]:
+        """Resume-side inputs of every scoring feature"""
+
+        matcher = self.matcher
+        document = AnalyzedDocument(text)
+        return {
+            'lower': document.lower,
+            'terms': matcher.tfidf_terms(document.text),
+            'vocabulary': document.vocabulary,
+            'words': document.whitespace_words,
+            'titles': frozenset(title.strip() for title in matcher._resume_titles(document)),
+            'years': matcher._extract_years_experience(document),
+            'degree_level': matcher._candidate_degree_level(document),
+        }
+
+    def add(self, candidate_ids: Sequence[int], texts: Sequence[str]) -> None:
+        """Profile newly stored candidates (already profiled ids are skipped)"""
+
+        profiles = [(int(candidate_id), self._profile(text or ''))
+                    for candidate_id, text in zip(candidate_ids, texts)
+                    if int(candidate_id) not in self._rows]
+        if not profiles:
+            return
+        with self._lock:
+            for candidate_id, profile in profiles:
+                if candidate_id not in self._rows:
+                    self._rows[candidate_id] = len(self._profiles)
+                    self._profiles.append(profile)
+                    self._missing.discard(candidate_id)
+            self._stacked = None
+
+    def reload(self) -> None:
+        """Drop every profile (after stored candidates were deleted); they are rebuilt on demand"""
+
+        with self._lock:
+            self._rows = {}
+            self._profiles = []
+            self._missing = set()
+            self._stacked = None
+            self._vectors = {}
+
+    def _ensure(self, candidate_ids: Sequence[int]) -> None:
+        """Profile candidates stored before this index existed, from their stored texts"""
+
+        missing = [int(cid) for cid in candidate_ids
+                   if int(cid) not in self._rows and int(cid) not in self._missing]
+        if not missing:
+            return
+        texts = self.text_loader(missing)
+        self.add([cid for cid in missing if cid in texts], [texts[cid] for cid in missing if cid in texts])
+        # Candidates without a stored text cannot be re-scored; remember them
+        self._missing.update(cid for cid in missing if cid not in texts)
+
+    def _stack(self) -> Dict[str, Any]:
+        """Stack profiles into sparse matrices (rebuilt after additions, dropping cached lookups)"""
+
+        if self._stacked is None:
+            profiles = self._profiles
+            terms, term_index = _sparse_rows([p['terms'] for p in profiles])
+            vocabulary, vocabulary_index = _sparse_rows([dict.fromkeys(p['vocabulary'], 1.0) for p in profiles])
+            words, word_index = _sparse_rows([dict.fromkeys(p['words'], 1.0) for p in profiles])
+            titles, title_index = _sparse_rows([dict.fromkeys(p['titles'], 1.0) for p in profiles])
+            squared = terms.multiply(terms).tocsr()
+
+            self._stacked = {
+                'terms': terms,
+                'terms_squared': squared,
+                'term_presence': (terms > 0).astype(float),
+                'terms_norm_sq': np.asarray(squared.sum(axis=1)).ravel(),
+                'term_index': term_index,
+                'vocabulary': vocabulary,
+                'vocabulary_size': np.asarray(vocabulary.sum(axis=1)).ravel(),
+                'vocabulary_index': vocabulary_index,
+                'words': words,
+                'word_list': list(word_index),
+                'titles': titles,
+                'title_list': list(title_index),
+                'years': np.array([p['years'] for p in profiles], dtype=float),
+                'degree_level': np.array([p['degree_level'] for p in profiles], dtype=float),
+                # Job-side lookups, shared while the job is edited
+                'contains': {},
+                'fuzzy': {},
+                'title_scores': {},
+            }
+        return self._stacked
+
+    def _contains(self, stacked: Dict[str, Any], phrase: str) -> np.ndarray:
+        """Whether each resume's lowercased text contains phrase"""
+
+        phrase = phrase.lower()
+        hits = stacked['contains'].get(phrase)
+        if hits is None:
+            hits = stacked['contains'][phrase] = np.fromiter(
+                (phrase in profile['lower'] for profile in self._profiles), dtype=bool, count=len(self._profiles)
+            )
+        return hits
+
+    def _skill_hits(self, stacked: Dict[str, Any], skill: str) -> np.ndarray:
+        """JobMatcher._skill_hit for every resume: fuzzy-matched once against the distinct words"""
+
+        exact = self._contains(stacked, skill)
+        fuzzy = stacked['fuzzy'].get(skill.lower())
+        if fuzzy is None:
+            skill_lower = skill.lower()
+            columns = [i for i, word in enumerate(stacked['word_list']) if fuzz.ratio(skill_lower, word) > 80]
+            fuzzy = np.asarray(stacked['words'][:, columns].sum(axis=1)).ravel() > 0
+            stacked['fuzzy'][skill_lower] = fuzzy
+        return np.where(exact, 1.0, np.where(fuzzy, 0.8, 0.0))
+
+    def _title_scores(self, stacked: Dict[str, Any], job_title: str) -> np.ndarray:
+        """JobMatcher._calculate_title_match for every resume"""
+
+        if not job_title:
+            return np.full(len(self._profiles), 0.5)
+        scores = stacked['title_scores'].get(job_title)
+        if scores is None:
+            job_title_lower = job_title.lower()
+            ratios = np.array([fuzz.ratio(job_title_lower, title) / 100 for title in stacked['title_list']])
+            fuzzy = (stacked['titles'].multiply(ratios).tocsr().max(axis=1).toarray().ravel()
+                     if len(ratios) else np.zeros(len(self._profiles)))
+            scores = np.where(self._contains(stacked, job_title_lower), 1.0, fuzzy)
+            stacked['title_scores'][job_title] = scores
+        return scores
+
+    def _embedding_similarities(self, candidate_ids: np.ndarray, job_document: AnalyzedDocument,
+                                engine) -> np.ndarray:
+        """Embedding similarity of each candidate to the job, embedding each resume once per model"""
+
+        vectors = self._vectors.setdefault(engine.model_name, {})
+        missing = [int(cid) for cid in candidate_ids if int(cid) not in vectors]
+        if missing:
+            texts = self.text_loader(missing)
+            embedded = [cid for cid in missing if cid in texts]
+            if embedded:
+                for cid, vector in zip(embedded, engine.embed([texts[cid] for cid in embedded])):
+                    vectors[cid] = vector.astype(np.float64)
+        job_vector = engine.embed([job_document.text])[0]
+        return np.array([float((vectors[int(cid)] * job_vector).sum()) if int(cid) in vectors else np.nan
+                         for cid in candidate_ids])
+
+    def feature_matrix(self, candidate_ids: Sequence[int], job_description: str, job_title: str = "",
+                       required_skills: str = "", engine=None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Features of stored candidates against one job
+
+        Args:
+            candidate_ids: Candidates to score
+            job_description: Job description text
+            job_title: Specific job title
+            required_skills: Comma-separated required skills
+            engine: Optional embedding engine; without it semantic similarity is lexical
+
+        Returns:
+            Tuple of (ids of the candidates that have a stored text,
+            array of shape (N, len(FEATURE_KEYS)))
+        """
+
+        matcher = self.matcher
+        job_document = AnalyzedDocument(job_description)
+        skills_list = [skill.strip() for skill in required_skills.split(',') if skill.strip()]
+
+        with self._lock:
+            self._ensure(candidate_ids)
+            ids = np.array([int(cid) for cid in candidate_ids if int(cid) in self._rows], dtype=np.int64)
+            if not len(ids):
+                return ids, np.empty((0, len(FEATURE_KEYS)))
+            stacked = self._stack()
+            rows = np.array([self._rows[int(cid)] for cid in ids], dtype=np.int64)
+
+            # Keyword score: the TF-IDF cosine of JobLibrary.feature_matrix with resume and job swapped
+            job_terms = matcher.tfidf_terms(job_document.text)
+            j = np.zeros(len(stacked['term_index']))
+            for term, count in job_terms.items():
+                column = stacked['term_index'].get(term)
+                if column is not None:
+                    j[column] = count
+            job_norm_sq = float(sum(count * count for count in job_terms.values()))
+            terms = stacked['terms'][rows]
+            dot = terms @ j
+            shared_resume_sq = stacked['terms_squared'][rows] @ (j > 0).astype(float)
+            shared_job_sq = stacked['term_presence'][rows] @ (j * j)
+            resume_weight_sq = (_SINGLE_DOC_IDF_SQ * stacked['terms_norm_sq'][rows]
+                                - (_SINGLE_DOC_IDF_SQ - 1) * shared_resume_sq)
+            job_weight_sq = _SINGLE_DOC_IDF_SQ * job_norm_sq - (_SINGLE_DOC_IDF_SQ - 1) * shared_job_sq
+            denominator = np.sqrt(resume_weight_sq * job_weight_sq)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                tfidf_cosine = np.where(denominator > 0, dot / denominator, 0.0)
+
+            # Jaccard similarity of token vocabularies
+            v = np.zeros(len(stacked['vocabulary_index']))
+            for token in job_document.vocabulary:
+                column = stacked['vocabulary_index'].get(token)
+                if column is not None:
+                    v[column] = 1.0
+            intersection = stacked['vocabulary'][rows] @ v
+            union = stacked['vocabulary_size'][rows] + len(job_document.vocabulary) - intersection
+            with np.errstate(divide='ignore', invalid='ignore'):
+                jaccard = np.where(union > 0, intersection / union, 0.0)
+
+            # Skills: required-skill hits and job-description skills the resume also mentions
+            if skills_list:
+                hits = sum(self._skill_hits(stacked, skill)[rows] for skill in skills_list)
+                bonus = sum(self._contains(stacked, skill)[rows].astype(float)
+                            for skill in matcher._extract_skills_from_text(job_document)
+                            if skill not in skills_list)
+            else:
+                hits, bonus = 0.0, 0.0
+
+            required_level, education_required = matcher._required_degree_level(job_document)
+            title_scores = self._title_scores(stacked, job_title)[rows]
+            years = stacked['years'][rows]
+            degree_level = stacked['degree_level'][rows]
+
+        embedding = (self._embedding_similarities(ids, job_document, engine) if engine is not None
+                     else np.full(len(ids), np.nan))
+
+        features = np.column_stack([
+            years,
+            np.full(len(ids), matcher._extract_required_experience(job_document)),
+            degree_level if education_required else np.zeros(len(ids)),
+            np.full(len(ids), required_level if education_required else 0),
+            np.full(len(ids), education_required),
+            np.broadcast_to(hits, len(ids)),
+            np.full(len(ids), len(skills_list)),
+            np.broadcast_to(bonus, len(ids)),
+            title_scores,
+            tfidf_cosine,
+            jaccard,
+            embedding,
+        ]).astype(float)
+        return ids, features
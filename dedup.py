@@ -0,0 +1,160 @@
+import re
+import zlib
+import hashlib
+from typing import Dict, List, Any, Optional, Tuple
+import numpy as np
+
+# Largest 32-bit prime; keeps (a * h + b) inside uint64 for 32-bit a, b and h
+_MERSENNE_PRIME = np.uint64(4294967291)
+_MAX_HASH = np.uint32(0xFFFFFFFF)
+
+# Defaults: 128 permutations split into 16 bands of 8 rows puts the LSH
+# S-curve midpoint near Jaccard 0.7, and candidates are then verified against
+# the threshold below
+DEFAULT_NUM_PERM = 128
+DEFAULT_BANDS = 16
+DEFAULT_THRESHOLD = 0.9
+SHINGLE_SIZE = 5
+
+
+def shingles(text: str, k: int = SHINGLE_SIZE) -> set:
+    """
+    Build the set of word k-shingles of a text
+
+    Args:
+        text: Cleaned resume text
+        k: Words per shingle
+
+    Returns:
+        Set of shingle strings (the whole text if it has fewer than k words)
+    """
+
+    words = re.findall(r'\w+', text.lower())
+    if len(words) < k:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + k]) for i in range(len(words) - k + 1)}
+
+
+class MinHasher:
+    """MinHash signatures over word shingles using seeded universal hashing"""
+
+    def __init__(self, num_perm: int = DEFAULT_NUM_PERM, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.a = rng.randint(1, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        """Compute the MinHash signature (uint32 array of num_perm values)"""
+
+        tokens = shingles(text)
+        if not tokens:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint32)
+
+        hashes = np.fromiter((zlib.crc32(t.encode('utf-8')) for t in tokens),
+                             dtype=np.uint64, count=len(tokens))
+        permuted = (np.outer(hashes, self.a) + self.b) % _MERSENNE_PRIME
+        return permuted.min(axis=0).astype(np.uint32)
+
+
+def estimate_similarity(sig_a: np.ndarray, sig_b: np.ndarray) -> float:
+    """Estimate Jaccard similarity from two MinHash signatures"""
+    return float(np.mean(sig_a == sig_b))
+
+
+def band_hashes(signature: np.ndarray, bands: int = DEFAULT_BANDS) -> List[int]:
+    """
+    Hash each LSH band of a signature to a signed 64-bit integer
+
+    The band number is mixed into the hash so one bucket column can hold
+    every band, and signed values fit SQLite INTEGER columns directly.
+    """
+
+    rows = len(signature) // bands
+    return [
+        int.from_bytes(
+            hashlib.blake2b(i.to_bytes(2, 'little') + signature[i * rows:(i + 1) * rows].tobytes(),
+                            digest_size=8).digest(),
+            'little', signed=True
+        )
+        for i in range(bands)
+    ]
+
+
+class LSHIndex:
+    """In-memory banded LSH index over MinHash signatures"""
+
+    def __init__(self, bands: int = DEFAULT_BANDS):
+        self.bands = bands
+        self.buckets: Dict[int, List[Any]] = {}
+        self.signatures: Dict[Any, np.ndarray] = {}
+
+    def add(self, key: Any, signature: np.ndarray) -> None:
+        """Index a signature under key"""
+        self.signatures[key] = signature
+        for bucket in band_hashes(signature, self.bands):
+            self.buckets.setdefault(bucket, []).append(key)
+
+    def candidates(self, signature: np.ndarray) -> set:
+        """Keys sharing at least one band bucket with signature"""
+        found = set()
+        for bucket in band_hashes(signature, self.bands):
+            found.update(self.buckets.get(bucket, ()))
+        return found
+
+    def best_match(self, signature: np.ndarray, threshold: float) -> Optional[Tuple[Any, float]]:
+        """Most similar indexed key at or above threshold, verified on full signatures"""
+
+        best = None
+        for key in self.candidates(signature):
+            similarity = estimate_similarity(signature, self.signatures[key])
+            if similarity >= threshold and (best is None or similarity > best[1]):
+                best = (key, similarity)
+        return best
+
+
+class DuplicateDetector:
+    """
+    Find near-duplicate resumes within a batch and against stored history
+
+    Within-batch lookups use an in-memory LSH index; history lookups go
+    through the candidate store's persisted LSH buckets, so neither scans
+    every document. Signatures use the module defaults so they stay
+    comparable with the ones already stored.
+    """
+
+    def __init__(self, store=None, threshold: float = DEFAULT_THRESHOLD):
+        self.store = store
+        self.threshold = threshold
+        self.hasher = MinHasher()
+        self.batch_index = LSHIndex()
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """MinHash signature of a cleaned text, or None if it has no words"""
+        if not re.search(r'\w', text):
+            return None
+        return self.hasher.signature(text)
+
+    def add(self, key: Any, signature: np.ndarray) -> None:
+        """Register a processed document of the current batch"""
+        self.batch_index.add(key, signature)
+
+    def find(self, signature: np.ndarray) -> Optional[Tuple[str, Any, float]]:
+        """
+        Look up the closest near-duplicate
+
+        Returns:
+            ('batch', key, similarity) or ('history', candidate_id, similarity),
+            or None when nothing reaches the threshold
+        """
+
+        match = self.batch_index.best_match(signature, self.threshold)
+        if match:
+            return ('batch', match[0], match[1])
+
+        if self.store is not None:
+            match = self.store.find_near_duplicate(signature, band_hashes(signature), self.threshold)
+            if match:
+                return ('history', match[0], match[1])
+
+        return None
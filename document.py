@@ -0,0 +1,164 @@
+import re
+from collections import Counter
+from functools import cached_property, lru_cache
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
+import numpy as np
+import textstat
+from sections import segment_sections
+
+# Word tokens: the \w+ runs that \b-delimited patterns would match
+_TOKEN_PATTERN = re.compile(r'\w+')
+
+# Readability counts follow textstat: sentences are runs up to terminal punctuation,
+# words are whitespace chunks with punctuation (except apostrophes) removed
+_SENTENCE = re.compile(r'\b[^.!?]+[.!?]*')
+_PUNCTUATION = re.compile(r"[^\w\s']")
+
+# Tokens made only of ASCII letters, at least 3 long (keyword candidates)
+_ALPHA_WORD = re.compile(r'[a-z]{3,}')
+
+
+@lru_cache(maxsize=1)
+def english_stop_words() -> FrozenSet[str]:
+    """NLTK English stop words, loaded once per process"""
+    try:
+        from nltk.corpus import stopwords
+        return frozenset(stopwords.words('english'))
+    except LookupError:
+        return frozenset()
+
+
+@lru_cache(maxsize=65536)
+def syllables(word: str) -> int:
+    """Syllable count of a single word, memoized across documents"""
+    return textstat.syllable_count(word)
+
+
+class AnalyzedDocument:
+    """
+    A resume text tokenized and normalized once for every extractor and scorer
+
+    Attributes:
+        text: The text as given, with its line structure
+        lower: Lowercased copy of text (same offsets)
+        tokens: Lowercased \\w+ tokens in document order
+        offsets: Array of shape (N, 2) with each token's start and end in text
+
+    Tokens and the derived views (vocabulary, counts, sections, sentence and
+    syllable counts) are computed on first use and then cached on the
+    instance, so only the views a caller reads are ever built.
+    """
+
+    def __init__(self, text: str):
+        self.text = text or ""
+        self.lower = self.text.lower()
+        self._derived: Dict[str, Any] = {}
+
+    @cached_property
+    def tokens(self) -> List[str]:
+        """Lowercased \\w+ tokens in document order"""
+        return _TOKEN_PATTERN.findall(self.lower)
+
+    @cached_property
+    def offsets(self) -> np.ndarray:
+        """Array of shape (N, 2) with each token's start and end in text"""
+        spans = [m.span() for m in _TOKEN_PATTERN.finditer(self.lower)]
+        return np.array(spans, dtype=np.int64) if spans else np.empty((0, 2), dtype=np.int64)
+
+    def derived(self, name: str, compute: Callable[['AnalyzedDocument'], Any]) -> Any:
+        """
+        A view computed outside this module (e.g. the parser's named
+        entities), built by compute on the first request and then cached
+        """
+        if name not in self._derived:
+            self._derived[name] = compute(self)
+        return self._derived[name]
+
+    def has_derived(self, name: str) -> bool:
+        """Whether the view name has been computed (e.g. to count NER calls)"""
+        return name in self._derived
+
+    @cached_property
+    def vocabulary(self) -> FrozenSet[str]:
+        """Set of distinct lowercased tokens"""
+        return frozenset(self.tokens)
+
+    @cached_property
+    def token_counts(self) -> Dict[str, int]:
+        """Occurrences of each token"""
+        return Counter(self.tokens)
+
+    @cached_property
+    def alpha_words(self) -> FrozenSet[str]:
+        """Distinct tokens of three or more ASCII letters"""
+        return frozenset(word for word in self.vocabulary if _ALPHA_WORD.fullmatch(word))
+
+    @cached_property
+    def chunks(self) -> List[str]:
+        """Lowercased whitespace-separated chunks (punctuation kept)"""
+        return self.lower.split()
+
+    @cached_property
+    def whitespace_words(self) -> FrozenSet[str]:
+        """Distinct whitespace-separated chunks"""
+        return frozenset(self.chunks)
+
+    @cached_property
+    def readability_words(self) -> Dict[str, int]:
+        """Occurrences of each chunk with punctuation removed, as textstat counts words"""
+        stripped = (_PUNCTUATION.sub('', chunk) for chunk in self.chunks)
+        return Counter(word for word in stripped if word)
+
+    @cached_property
+    def lines(self) -> List[str]:
+        """Lines of the original text"""
+        return self.text.split('\n')
+
+    @cached_property
+    def sections(self) -> List[Tuple[str, int, int]]:
+        """(label, start, end) spans of the resume sections (see sections.segment_sections)"""
+        return segment_sections(self.text)
+
+    def section(self, *labels: str) -> Optional[str]:
+        """
+        Text of the sections with any of labels, joined by newlines
+
+        Returns:
+            None if the document has no such section
+        """
+        parts = [self.text[start:end] for label, start, end in self.sections if label in labels]
+        return '\n'.join(parts) if parts else None
+
+    @cached_property
+    def word_count(self) -> int:
+        """Number of words as counted for readability"""
+        return sum(self.readability_words.values())
+
+    @cached_property
+    def sentence_count(self) -> int:
+        """Number of sentences of three or more words (at least 1 for non-empty text)"""
+        if not self.text:
+            return 0
+        sentences = _SENTENCE.findall(self.text)
+        short = sum(1 for sentence in sentences
+                    if len(_PUNCTUATION.sub('', sentence).split()) <= 2)
+        return max(1, len(sentences) - short)
+
+    @cached_property
+    def syllable_count(self) -> int:
+        """Total syllables, looked up once per distinct word"""
+        return sum(syllables(word) * count for word, count in self.readability_words.items())
+
+    @cached_property
+    def flesch_reading_ease(self) -> float:
+        """Flesch Reading Ease from the cached word, sentence and syllable counts"""
+
+        if not self.word_count or not self.sentence_count:
+            return 0.0
+        words_per_sentence = self.word_count / self.sentence_count
+        syllables_per_word = self.syllable_count / self.word_count
+        return 206.835 - 1.015 * words_per_sentence - 84.6 * syllables_per_word
+
+    def contains(self, phrase: str) -> bool:
+        """Case-insensitive substring test against the lowercased text"""
+        return phrase.lower() in self.lower
@@ -0,0 +1,183 @@
+import os
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+
+# Optional embedding runtime: sentence-transformers with a locally stored model
+try:
+    from sentence_transformers import SentenceTransformer
+    EMBEDDINGS_AVAILABLE = True
+except Exception:
+    # Fallback if sentence-transformers (or torch) is not installed
+    SentenceTransformer = None
+    EMBEDDINGS_AVAILABLE = False
+
+# Directory of the local sentence-embedding model (override with RESUME_ANALYZER_EMBEDDING_MODEL)
+DEFAULT_MODEL_PATH = os.environ.get('RESUME_ANALYZER_EMBEDDING_MODEL', 'models/all-MiniLM-L6-v2')
+
+# Default location of the embedding cache (the candidate database unless overridden)
+DEFAULT_CACHE_PATH = os.environ.get('RESUME_ANALYZER_EMBEDDING_CACHE',
+                                    os.environ.get('RESUME_ANALYZER_DB', 'resume_analyzer.db'))
+
+# Words per chunk (small models truncate at 256 word pieces) and chunks per inference batch
+CHUNK_WORDS = 160
+EMBED_BATCH_SIZE = 32
+
+_CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    model TEXT NOT NULL,
+    text_hash TEXT NOT NULL,
+    vector BLOB NOT NULL,
+    PRIMARY KEY (model, text_hash)
+);
+"""
+
+
+def text_hash(text: str) -> str:
+    """Content hash used as the embedding cache key"""
+    return hashlib.sha1((text or '').encode('utf-8')).hexdigest()
+
+
+def chunk_text(text: str, chunk_words: int = CHUNK_WORDS) -> List[str]:
+    """Split text into consecutive chunks of at most chunk_words words"""
+    words = (text or '').split()
+    return [' '.join(words[i:i + chunk_words]) for i in range(0, len(words), chunk_words)]
+
+
+class EmbeddingCache:
+    """Persistent SQLite cache of unit-length embeddings keyed by model and text hash"""
+
+    def __init__(self, db_path: str = DEFAULT_CACHE_PATH):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(_CACHE_SCHEMA)
+        self.conn.commit()
+
+    def get_many(self, model: str, hashes: Sequence[str]) -> Dict[str, np.ndarray]:
+        """Cached vectors for the given hashes; misses are left out"""
+
+        found = {}
+        unique = list(dict.fromkeys(hashes))
+        with self._lock:
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(unique), 500):
+                batch = unique[start:start + 500]
+                placeholders = ','.join('?' * len(batch))
+                rows = self.conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                    (model, *batch)
+                )
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def put_many(self, model: str, vectors: Dict[str, np.ndarray]) -> None:
+        """Store vectors keyed by text hash"""
+
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector) VALUES (?, ?, ?)",
+                ((model, key, np.asarray(vector, dtype=np.float32).tobytes())
+                 for key, vector in vectors.items())
+            )
+
+    def close(self):
+        """Close the underlying connection"""
+        with self._lock:
+            self.conn.close()
+
+
+class EmbeddingEngine:
+    """
+    CPU sentence-embedding engine for semantic similarity
+
+    A document is embedded by splitting it into word chunks, running all
+    chunks of all uncached documents through the model in batches and
+    mean-pooling each document's chunk vectors. Document vectors are
+    unit length, so similarity is a dot product, and they are cached by
+    text hash so each text is embedded only once.
+    """
+
+    def __init__(self, model_path: str = DEFAULT_MODEL_PATH, cache: Optional[EmbeddingCache] = None,
+                 batch_size: int = EMBED_BATCH_SIZE, chunk_words: int = CHUNK_WORDS):
+        if not EMBEDDINGS_AVAILABLE:
+            raise RuntimeError("sentence-transformers is not installed")
+
+        self.model = SentenceTransformer(model_path, device='cpu')
+        self.model_name = os.path.basename(os.path.normpath(model_path))
+        self.dimension = self.model.get_sentence_embedding_dimension()
+        self.cache = cache
+        self.batch_size = batch_size
+        self.chunk_words = chunk_words
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Embed texts, reusing cached vectors
+
+        Args:
+            texts: Documents to embed
+
+        Returns:
+            Array of shape (len(texts), dimension) of unit vectors (zero for empty texts)
+        """
+
+        hashes = [text_hash(text) for text in texts]
+        vectors = self.cache.get_many(self.model_name, hashes) if self.cache else {}
+
+        pending = {}
+        for key, text in zip(hashes, texts):
+            if key not in vectors and key not in pending:
+                pending[key] = chunk_text(text, self.chunk_words)
+
+        if pending:
+            chunks = [chunk for doc_chunks in pending.values() for chunk in doc_chunks]
+            chunk_vectors = (self.model.encode(chunks, batch_size=self.batch_size, convert_to_numpy=True,
+                                               normalize_embeddings=True, show_progress_bar=False)
+                             if chunks else np.empty((0, self.dimension), dtype=np.float32))
+
+            computed = {}
+            offset = 0
+            for key, doc_chunks in pending.items():
+                pooled = chunk_vectors[offset:offset + len(doc_chunks)].mean(axis=0) if doc_chunks \
+                    else np.zeros(self.dimension, dtype=np.float32)
+                offset += len(doc_chunks)
+                norm = np.linalg.norm(pooled)
+                computed[key] = (pooled / norm if norm > 0 else pooled).astype(np.float32)
+
+            if self.cache:
+                self.cache.put_many(self.model_name, computed)
+            vectors.update(computed)
+
+        if not hashes:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        return np.vstack([vectors[key] for key in hashes])
+
+    def similarity(self, texts: Sequence[str], query: str) -> np.ndarray:
+        """Cosine similarity of each text to the query"""
+        vectors = self.embed(list(texts) + [query])
+        return vectors[:-1] @ vectors[-1]
+
+
+def load_engine(model_path: str = DEFAULT_MODEL_PATH,
+                cache_path: str = DEFAULT_CACHE_PATH) -> Optional[EmbeddingEngine]:
+    """
+    Load the embedding engine if the runtime and the local model are present
+
+    Returns:
+        EmbeddingEngine, or None when embeddings are unavailable
+    """
+
+    if not EMBEDDINGS_AVAILABLE or not os.path.isdir(model_path):
+        return None
+
+    try:
+        return EmbeddingEngine(model_path, EmbeddingCache(cache_path))
+    except Exception as e:
+        logging.error(f"Error loading embedding model from {model_path}: {str(e)}")
+        return None
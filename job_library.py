@@ -0,0 +1,250 @@
+import math
+import time
+import threading
+from typing import Dict, List, Any, Optional, Tuple
+import numpy as np
+from scipy.sparse import csr_matrix
+from matcher import JobMatcher, FEATURE_KEYS
+from document import AnalyzedDocument
+
+# Squared TF-IDF weight of a term found in only one of two documents (smooth idf, n=2)
+_SINGLE_DOC_IDF_SQ = (math.log(3 / 2) + 1) ** 2
+
+
+def _sparse_rows(rows: List[Dict[str, float]]) -> Tuple[csr_matrix, Dict[str, int]]:
+    """Stack term-to-value dictionaries into a CSR matrix over their joint vocabulary"""
+
+    index: Dict[str, int] = {}
+    indptr, indices, data = [0], [], []
+    for row in rows:
+        for term, value in row.items():
+            indices.append(index.setdefault(term, len(index)))
+            data.append(value)
+        indptr.append(len(indices))
+    matrix = csr_matrix((np.array(data, dtype=float), np.array(indices, dtype=np.int64), indptr),
+                        shape=(len(rows), len(index)))
+    return matrix, index
+
+
+class JobLibrary:
+    """
+    Persistent library of job descriptions for reverse matching
+
+    Each stored job keeps its JobMatcher.job_profile (required years,
+    degree level, skills, vocabulary and keyword-vectorizer term counts)
+    and, with an embedding engine, its embedding. A resume is scored
+    against every job at once: pairwise features become sparse
+    matrix-vector products over the stacked job profiles and the feature
+    matrix goes through JobMatcher.score_batch. Scores equal
+    calculate_match_score against each job (the keyword score is exact
+    unless the pair has more than the vectorizer's 5000 features).
+    """
+
+    def __init__(self, store, matcher: Optional[JobMatcher] = None, engine=None):
+        self.store = store
+        self.engine = engine
+        self.matcher = matcher or JobMatcher(semantic_engine=engine)
+        self._lock = threading.RLock()
+        self._jobs = store.jobs()
+        self._stacked = None
+
+    def jobs(self) -> List[Dict[str, Any]]:
+        """Stored jobs in id order"""
+        with self._lock:
+            return list(self._jobs)
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def save_job(self, title: str, description: str, required_skills: str = "",
+                 job_id: Optional[int] = None) -> int:
+        """
+        Add a job, or update the job with id job_id
+
+        Only this job's profile and embedding are computed.
+
+        Returns:
+            Id of the stored job
+        """
+
+        features = self.matcher.job_profile(description, title, required_skills)
+        vector = self.engine.embed([description])[0] if self.engine else None
+        vector_kind = self.engine.model_name if self.engine else None
+        job_id = self.store.save_job(title, description, required_skills, features,
+                                     vector_kind, vector, job_id)
+
+        job = {
+            'job_id': job_id, 'title': title, 'description': description,
+            'required_skills': required_skills, 'features': features,
+            'vector_kind': vector_kind, 'vector': vector,
+            'updated_at': time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        with self._lock:
+            self._jobs = [j for j in self._jobs if j['job_id'] != job_id] + [job]
+            self._jobs.sort(key=lambda j: j['job_id'])
+            self._stacked = None
+        return job_id
+
+    def remove_job(self, job_id: int) -> None:
+        """Delete a job from the library"""
+
+        self.store.delete_job(job_id)
+        with self._lock:
+            self._jobs = [j for j in self._jobs if j['job_id'] != job_id]
+            self._stacked = None
+
+    def _stack(self) -> Dict[str, Any]:
+        """Stack job profiles into arrays and sparse matrices (rebuilt after changes)"""
+
+        if self._stacked is None:
+            profiles = [job['features'] for job in self._jobs]
+            terms, term_index = _sparse_rows([p['tfidf_terms'] for p in profiles])
+            vocabulary, vocabulary_index = _sparse_rows([dict.fromkeys(p['vocabulary'], 1.0)
+                                                         for p in profiles])
+
+            vectors = None
+            if self.engine and self._jobs and all(
+                    job['vector'] is not None and job['vector_kind'] == self.engine.model_name
+                    for job in self._jobs):
+                vectors = np.vstack([job['vector'] for job in self._jobs])
+
+            self._stacked = {
+                'ids': np.array([job['job_id'] for job in self._jobs], dtype=np.int64),
+                'terms': terms,
+                'term_presence': (terms > 0).astype(float),
+                'terms_squared': terms.multiply(terms).tocsr(),
+                'terms_norm_sq': np.asarray(terms.multiply(terms).sum(axis=1)).ravel(),
+                'term_index': term_index,
+                'vocabulary': vocabulary,
+                'vocabulary_size': np.asarray(vocabulary.sum(axis=1)).ravel(),
+                'vocabulary_index': vocabulary_index,
+                'vectors': vectors,
+            }
+        return self._stacked
+
+    def feature_matrix(self, resume_text: str,
+                       document: Optional[AnalyzedDocument] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Features of one resume against every stored job
+
+        Returns:
+            Tuple of (job ids, array of shape (M, len(FEATURE_KEYS)))
+        """
+
+        if document is None or document.text != resume_text:
+            document = AnalyzedDocument(resume_text)
+
+        with self._lock:
+            stacked = self._stack()
+            jobs = list(self._jobs)
+        matcher = self.matcher
+
+        # Keyword score: TF-IDF cosine of each two-document pair. Shared terms have
+        # idf 1 and the rest idf 1 + ln(3/2), so every pair reduces to sparse products.
+        resume_terms = matcher.tfidf_terms(document.text)
+        r = np.zeros(len(stacked['term_index']))
+        for term, count in resume_terms.items():
+            column = stacked['term_index'].get(term)
+            if column is not None:
+                r[column] = count
+        resume_norm_sq = float(sum(count * count for count in resume_terms.values()))
+        dot = stacked['terms'] @ r
+        shared_resume_sq = stacked['term_presence'] @ (r * r)
+        shared_job_sq = stacked['terms_squared'] @ (r > 0).astype(float)
+        resume_weight_sq = _SINGLE_DOC_IDF_SQ * resume_norm_sq - (_SINGLE_DOC_IDF_SQ - 1) * shared_resume_sq
+        job_weight_sq = (_SINGLE_DOC_IDF_SQ * stacked['terms_norm_sq']
+                         - (_SINGLE_DOC_IDF_SQ - 1) * shared_job_sq)
+        denominator = np.sqrt(resume_weight_sq * job_weight_sq)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            tfidf_cosine = np.where(denominator > 0, dot / denominator, 0.0)
+
+        # Jaccard similarity of token vocabularies
+        v = np.zeros(len(stacked['vocabulary_index']))
+        for token in document.vocabulary:
+            column = stacked['vocabulary_index'].get(token)
+            if column is not None:
+                v[column] = 1.0
+        intersection = stacked['vocabulary'] @ v
+        union = len(document.vocabulary) + stacked['vocabulary_size'] - intersection
+        with np.errstate(divide='ignore', invalid='ignore'):
+            jaccard = np.where(union > 0, intersection / union, 0.0)
+
+        # Embedding similarity, one product against the stacked job vectors
+        if stacked['vectors'] is not None:
+            resume_vector = self.engine.embed([document.text])[0].astype(np.float64)
+            embedding = (stacked['vectors'] * resume_vector).sum(axis=1)
+        else:
+            embedding = np.full(len(jobs), np.nan)
+
+        # Resume-side features once, skill and title lookups shared between jobs
+        resume_years = matcher._extract_years_experience(document)
+        candidate_level = matcher._candidate_degree_level(document)
+        skill_hits: Dict[str, float] = {}
+        title_scores: Dict[str, float] = {}
+
+        rows = []
+        for i, job in enumerate(jobs):
+            profile = job['features']
+            required = profile['required_skills']
+            if required:
+                hits = 0
+                for skill in required:
+                    if skill not in skill_hits:
+                        skill_hits[skill] = matcher._skill_hit(document, skill)
+                    hits += skill_hits[skill]
+                bonus = sum(1 for skill in profile['job_skills']
+                            if skill.lower() in document.lower and skill not in required)
+            else:
+                hits, bonus = 0.0, 0
+            title = profile['job_title']
+            if title not in title_scores:
+                title_scores[title] = matcher._calculate_title_match(document, title)
+
+            rows.append([
+                resume_years,
+                profile['required_years'],
+                candidate_level if profile['education_required'] else 0,
+                profile['required_degree_level'] if profile['education_required'] else 0,
+                profile['education_required'],
+                hits,
+                len(required),
+                bonus,
+                title_scores[title],
+                tfidf_cosine[i],
+                jaccard[i],
+                embedding[i],
+            ])
+
+        return stacked['ids'], np.array(rows, dtype=float).reshape(-1, len(FEATURE_KEYS))
+
+    def rank(self, resume_text: str, top_k: int = 5, document: Optional[AnalyzedDocument] = None,
+             weights: Dict[str, float] = None, semantic_weight: float = None) -> List[Dict[str, Any]]:
+        """
+        Best-fitting stored jobs for a resume
+
+        Args:
+            resume_text: Extracted resume text
+            top_k: Number of jobs to return
+            document: Optional AnalyzedDocument of resume_text
+            weights: Optional component weights; defaults to the matcher's
+            semantic_weight: Optional semantic blend; defaults to the matcher's
+
+        Returns:
+            List of dictionaries with job_id, title, match_score and the
+            component scores, best first
+        """
+
+        if not self._jobs:
+            return []
+
+        ids, features = self.feature_matrix(resume_text, document)
+        scores = self.matcher.score_batch(features, weights, semantic_weight)
+        titles = {job['job_id']: job['title'] for job in self.jobs()}
+
+        top = min(top_k, len(ids))
+        best = np.argsort(-scores['match_score'], kind='stable')[:top]
+        return [{
+            'job_id': int(ids[i]),
+            'title': titles.get(int(ids[i]), ''),
+            **{key: float(values[i]) for key, values in scores.items()},
+        } for i in best]
@@ -3,13 +3,144 @@ import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 from fuzzywuzzy import fuzz
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Tuple, Optional, Iterable, Union
 import logging
+from collections import Counter
+from document import AnalyzedDocument
+
+# Default weight factors for the matching components
+DEFAULT_WEIGHTS = {
+    'skills': 0.4,
+    'experience': 0.3,
+    'education': 0.2,
+    'keywords': 0.1
+}
+
+# Share of the final score taken by semantic similarity
+DEFAULT_SEMANTIC_WEIGHT = 0.2
+
+# Per-candidate component score keys, in the column order used by combine_scores
+COMPONENT_KEYS = [
+    'skill_match_score',
+    'experience_match_score',
+    'education_match_score',
+    'keyword_match_score',
+    'semantic_similarity_score'
+]
+
+# Explanation artifacts of a match, computed on demand by JobMatcher.explain_match
+EXPLANATION_KEYS = [
+    'matched_skills',
+    'missing_skills',
+    'keywords_matched',
+    'recommendations',
+    'match_breakdown'
+]
+
+# Raw per-candidate features, in the column order of feature matrices
+FEATURE_KEYS = [
+    'resume_years',
+    'required_years',
+    'candidate_degree_level',
+    'required_degree_level',
+    'education_required',
+    'skill_hits',
+    'required_skill_count',
+    'bonus_skills',
+    'title_similarity',
+    'tfidf_cosine',
+    'jaccard_similarity',
+    'embedding_similarity'
+]
+
+# Degree keywords and their levels, used for both resumes and job descriptions
+DEGREE_LEVELS = {
+    'high school': 1, 'diploma': 1,
+    'associate': 2, 'bachelor': 3, 'master': 4, 'mba': 4,
+    'phd': 5, 'doctorate': 5
+}
+
+def skills_component(skill_hits, required_skill_count, bonus_skills):
+    """Skills score from matched required skills (fuzzy hits count 0.8) and job-description bonus skills"""
+    
+    skill_hits = np.asarray(skill_hits, dtype=float)
+    required_skill_count = np.asarray(required_skill_count, dtype=float)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        base_score = skill_hits / required_skill_count
+    score = np.minimum(base_score + np.asarray(bonus_skills) * 0.1 * 0.1, 1.0)
+    
+    # Neutral score if no specific skills required
+    return np.where(required_skill_count > 0, score, 0.5)
+
+def experience_component(resume_years, required_years, title_similarity):
+    """Experience score from years against the requirement, blended with title similarity"""
+    
+    resume_years = np.asarray(resume_years, dtype=float)
+    required_years = np.asarray(required_years, dtype=float)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Perfect match or overqualified
+        qualified = np.minimum(1.0, 0.8 + (resume_years - required_years) * 0.05)
+        # Underqualified but give partial credit
+        underqualified = np.maximum(0.2, resume_years / required_years * 0.8)
+    
+    experience_score = np.where(required_years == 0, 0.7,
+                                np.where(resume_years >= required_years, qualified, underqualified))
+    
+    return np.minimum(experience_score * 0.7 + np.asarray(title_similarity) * 0.3, 1.0)
+
+def education_component(candidate_level, required_level, education_required):
+    """Education score from degree levels; neutral when the job states no requirement"""
+    
+    candidate_level = np.asarray(candidate_level, dtype=float)
+    required_level = np.asarray(required_level, dtype=float)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        partial = candidate_level / required_level * 0.8
+    
+    # Some credit for any education
+    score = np.where(candidate_level >= required_level, 1.0,
+                     np.where(candidate_level > 0, partial, 0.3))
+    
+    return np.where(np.asarray(education_required, dtype=bool), np.minimum(score, 1.0), 0.7)
+
+def semantic_component(tfidf_cosine, jaccard_similarity, embedding_similarity=np.nan):
+    """
+    Embedding cosine similarity (clipped to [0, 1]) where available, otherwise a
+    weighted combination of word-overlap and TF-IDF similarity
+    """
+    
+    lexical = np.asarray(jaccard_similarity) * 0.3 + np.asarray(tfidf_cosine) * 0.7
+    embedding_similarity = np.asarray(embedding_similarity, dtype=float)
+    
+    return np.where(np.isnan(embedding_similarity), lexical, np.clip(embedding_similarity, 0.0, 1.0))
+
+def normalize_weights(weights: Dict[str, float]) -> Dict[str, float]:
+    """
+    Scale component weights so they sum to 1
+    
+    Args:
+        weights: Weights keyed like DEFAULT_WEIGHTS (e.g. slider percentages);
+            missing components get 0
+        
+    Returns:
+        Normalized weights, or the defaults if all weights are zero
+    """
+    
+    raw = {key: max(0.0, float(weights.get(key, 0) or 0)) for key in DEFAULT_WEIGHTS}
+    total = sum(raw.values())
+    
+    if total <= 0:
+        return dict(DEFAULT_WEIGHTS)
+    
+    return {key: value / total for key, value in raw.items()}
 
 class JobMatcher:
     """Advanced job matching using multiple algorithms and scoring methods"""
     
-    def __init__(self):
+    def __init__(self, weights: Dict[str, float] = None,
+                 semantic_weight: float = DEFAULT_SEMANTIC_WEIGHT, semantic_engine=None):
         self.vectorizer = TfidfVectorizer(
             stop_words='english',
             ngram_range=(1, 2),
@@ -18,15 +149,59 @@ class JobMatcher:
         )
         
         # Weight factors for different matching components
-        self.weights = {
-            'skills': 0.4,
-            'experience': 0.3,
-            'education': 0.2,
-            'keywords': 0.1
-        }
+        self.weights = normalize_weights(weights) if weights else dict(DEFAULT_WEIGHTS)
+        self.semantic_weight = semantic_weight
+        
+        # Optional embeddings.EmbeddingEngine; without it semantic similarity is lexical
+        self.semantic_engine = semantic_engine
+        
+        # The job description is analyzed (and embedded) once and reused for every resume
+        self._job_documents: Dict[str, AnalyzedDocument] = {}
+        self._job_embeddings: Dict[str, np.ndarray] = {}
+    
+    def _job_document(self, job_description: str) -> AnalyzedDocument:
+        """Analyzed job description, cached per matcher"""
+        
+        document = self._job_documents.get(job_description)
+        if document is None:
+            if len(self._job_documents) >= 8:
+                self._job_documents.clear()
+            document = self._job_documents[job_description] = AnalyzedDocument(job_description)
+        return document
+    
+    def _job_embedding(self, job_doc: AnalyzedDocument) -> np.ndarray:
+        """Embedding of the job description, cached per matcher"""
+        
+        vector = self._job_embeddings.get(job_doc.text)
+        if vector is None:
+            if len(self._job_embeddings) >= 8:
+                self._job_embeddings.clear()
+            vector = self._job_embeddings[job_doc.text] = self.semantic_engine.embed([job_doc.text])[0]
+        return vector
+    
+    def _embedding_similarities(self, documents: List[AnalyzedDocument],
+                                job_doc: AnalyzedDocument) -> np.ndarray:
+        """
+        Cosine similarity of each resume embedding to the job embedding
+        
+        Returns NaN for every document when there is no engine or embedding
+        fails, so scoring falls back to lexical similarity.
+        """
+        
+        if self.semantic_engine is None or not documents:
+            return np.full(len(documents), np.nan)
+        
+        try:
+            vectors = self.semantic_engine.embed([doc.text for doc in documents])
+            # Row-wise products rather than a matrix product, so results do not depend on batch size
+            return (vectors.astype(np.float64) * self._job_embedding(job_doc)).sum(axis=1)
+        except Exception as e:
+            logging.error(f"Error in embedding similarity: {str(e)}")
+            return np.full(len(documents), np.nan)
     
     def calculate_match_score(self, resume_text: str, job_description: str, 
-                            job_title: str = "", required_skills: str = "") -> Dict[str, Any]:
+                            job_title: str = "", required_skills: str = "",
+                            document: Optional[AnalyzedDocument] = None) -> Dict[str, Any]:
         """
         Calculate comprehensive match score between resume and job description
         
@@ -35,61 +210,36 @@ class JobMatcher:
             job_description: Job description text
             job_title: Specific job title
             required_skills: Comma-separated required skills
+            document: Optional AnalyzedDocument of resume_text, shared with the parser
             
         Returns:
-            Dictionary containing various match scores and analysis
+            Dictionary with match_score and the COMPONENT_KEYS scores; the
+            explanation artifacts come from explain_match
         """
         
         try:
+            if document is None or document.text != resume_text:
+                document = AnalyzedDocument(resume_text)
+            job_document = self._job_document(job_description)
+            
             # Parse required skills
             skills_list = [skill.strip() for skill in required_skills.split(',') if skill.strip()]
             
-            # Calculate individual component scores
-            skill_score = self._calculate_skills_match(resume_text, skills_list, job_description)
-            experience_score = self._calculate_experience_match(resume_text, job_description, job_title)
-            education_score = self._calculate_education_match(resume_text, job_description)
-            keyword_score = self._calculate_keyword_match(resume_text, job_description)
-            semantic_score = self._calculate_semantic_similarity(resume_text, job_description)
-            
-            # Calculate weighted overall score
-            overall_score = (
-                skill_score * self.weights['skills'] +
-                experience_score * self.weights['experience'] +
-                education_score * self.weights['education'] +
-                keyword_score * self.weights['keywords']
-            )
-            
-            # Boost score with semantic similarity
-            final_score = (overall_score * 0.8) + (semantic_score * 0.2)
-            
-            # Extract matched keywords and skills
-            matched_keywords = self._extract_matched_keywords(resume_text, job_description)
-            matched_skills = self._extract_matched_skills(resume_text, skills_list)
-            missing_skills = [skill for skill in skills_list if skill not in matched_skills]
-            
-            # Generate recommendations
-            recommendations = self._generate_recommendations(
-                skill_score, experience_score, education_score, missing_skills
+            # Extract raw features and score them on the same path as batches
+            features = self.extract_features(document, job_document, skills_list, job_title)
+            scores = self.score_batch(features[np.newaxis, :])
+            skill_score, experience_score, education_score, keyword_score, semantic_score = (
+                float(scores[key][0]) for key in COMPONENT_KEYS
             )
+            final_score = scores['match_score'][0]
             
             return {
-                'match_score': min(final_score, 1.0),  # Cap at 1.0
+                'match_score': float(final_score),
                 'skill_match_score': skill_score,
                 'experience_match_score': experience_score,
                 'education_match_score': education_score,
                 'keyword_match_score': keyword_score,
-                'semantic_similarity_score': semantic_score,
-                'matched_skills': matched_skills,
-                'missing_skills': missing_skills,
-                'keywords_matched': matched_keywords,
-                'recommendations': recommendations,
-                'match_breakdown': {
-                    'skills': f"{skill_score:.1%}",
-                    'experience': f"{experience_score:.1%}",
-                    'education': f"{education_score:.1%}",
-                    'keywords': f"{keyword_score:.1%}",
-                    'semantic': f"{semantic_score:.1%}"
-                }
+                'semantic_similarity_score': semantic_score
             }
             
         except Exception as e:
@@ -101,124 +251,340 @@ class JobMatcher:
                 'education_match_score': 0.0,
                 'keyword_match_score': 0.0,
                 'semantic_similarity_score': 0.0,
-                'matched_skills': [],
-                'missing_skills': [],
-                'keywords_matched': [],
-                'recommendations': ['Error in matching process'],
                 'error': str(e)
             }
     
-    def _calculate_skills_match(self, resume_text: str, required_skills: List[str], 
-                               job_description: str) -> float:
+    def explain_match(self, resume_text: str, job_description: str, required_skills: str = "",
+                      scores: Optional[Dict[str, float]] = None,
+                      document: Optional[AnalyzedDocument] = None) -> Dict[str, Any]:
+        """
+        Explain a match: matched and missing skills, shared keywords,
+        recommendations and the formatted score breakdown
+        
+        Ranking only needs the numeric scores, so these are computed on
+        demand (when a candidate is opened or exported).
+        
+        Args:
+            resume_text: Full text of the resume
+            job_description: Job description text
+            required_skills: Comma-separated required skills
+            scores: Component scores of the match (COMPONENT_KEYS), as
+                returned by calculate_match_score or stored with a candidate
+            document: Optional AnalyzedDocument of resume_text
+            
+        Returns:
+            Dictionary with the EXPLANATION_KEYS
+        """
+        
+        if document is None or document.text != resume_text:
+            document = AnalyzedDocument(resume_text)
+        job_document = self._job_document(job_description)
+        scores = scores or {}
+        skill_score, experience_score, education_score, keyword_score, semantic_score = (
+            float(scores.get(key, 0.0) or 0.0) for key in COMPONENT_KEYS
+        )
+        
+        skills_list = [skill.strip() for skill in required_skills.split(',') if skill.strip()]
+        matched_skills = self._extract_matched_skills(document, skills_list)
+        missing_skills = [skill for skill in skills_list if skill not in matched_skills]
+        
+        return {
+            'matched_skills': matched_skills,
+            'missing_skills': missing_skills,
+            'keywords_matched': self._extract_matched_keywords(document, job_document),
+            'recommendations': self._generate_recommendations(
+                skill_score, experience_score, education_score, missing_skills
+            ),
+            'match_breakdown': {
+                'skills': f"{skill_score:.1%}",
+                'experience': f"{experience_score:.1%}",
+                'education': f"{education_score:.1%}",
+                'keywords': f"{keyword_score:.1%}",
+                'semantic': f"{semantic_score:.1%}"
+            }
+        }
+    
+    def extract_features(self, document: AnalyzedDocument, job_document: AnalyzedDocument,
+                         skills_list: List[str], job_title: str = "",
+                         embedding_similarity: Optional[float] = None) -> np.ndarray:
+        """
+        Extract the raw scoring features of one resume
+        
+        Args:
+            document: Analyzed resume
+            job_document: Analyzed job description
+            skills_list: Required skills
+            job_title: Specific job title
+            embedding_similarity: Precomputed embedding similarity; computed
+                with the semantic engine when omitted (NaN without one)
+            
+        Returns:
+            Array of len(FEATURE_KEYS) features
+        """
+        
+        if embedding_similarity is None:
+            embedding_similarity = self._embedding_similarities([document], job_document)[0]
+        
+        skill_hits, bonus_skills = self._skill_features(document, skills_list, job_document)
+        candidate_level, required_level, education_required = self._education_levels(document, job_document)
+        
+        return np.array([
+            self._extract_years_experience(document),
+            self._extract_required_experience(job_document),
+            candidate_level,
+            required_level,
+            education_required,
+            skill_hits,
+            len(skills_list),
+            bonus_skills,
+            self._calculate_title_match(document, job_title),
+            self._calculate_keyword_match(document, job_document),
+            self._jaccard_similarity(document, job_document),
+            embedding_similarity
+        ], dtype=float)
+    
+    def feature_matrix(self, resumes: Iterable[Union[str, AnalyzedDocument]], job_description: str,
+                       job_title: str = "", required_skills: str = "") -> np.ndarray:
+        """
+        Extract features for many resumes against one job
+        
+        Args:
+            resumes: Resume texts or AnalyzedDocuments
+            job_description: Job description text
+            job_title: Specific job title
+            required_skills: Comma-separated required skills
+            
+        Returns:
+            Array of shape (N, len(FEATURE_KEYS))
+        """
+        
+        job_document = self._job_document(job_description)
+        skills_list = [skill.strip() for skill in required_skills.split(',') if skill.strip()]
+        
+        documents = [resume if isinstance(resume, AnalyzedDocument) else AnalyzedDocument(resume)
+                     for resume in resumes]
+        
+        # Embed all resumes in one batched call
+        similarities = self._embedding_similarities(documents, job_document)
+        
+        rows = [
+            self.extract_features(document, job_document, skills_list, job_title, similarity)
+            for document, similarity in zip(documents, similarities)
+        ]
+        
+        return np.array(rows, dtype=float).reshape(-1, len(FEATURE_KEYS))
+    
+    def job_profile(self, job_description: str, job_title: str = "",
+                    required_skills: str = "") -> Dict[str, Any]:
+        """
+        Precompute the job-side inputs of every scoring feature
+        
+        Used by job_library.JobLibrary to score one resume against many
+        stored jobs without re-analyzing them.
+        
+        Returns:
+            JSON-serializable dictionary of job features
+        """
+        
+        job_doc = AnalyzedDocument(job_description)
+        required_level, education_required = self._required_degree_level(job_doc)
+        
+        return {
+            'job_title': job_title,
+            'required_skills': [skill.strip() for skill in required_skills.split(',') if skill.strip()],
+            'job_skills': self._extract_skills_from_text(job_doc),
+            'required_years': self._extract_required_experience(job_doc),
+            'required_degree_level': required_level,
+            'education_required': education_required,
+            'vocabulary': sorted(job_doc.vocabulary),
+            'tfidf_terms': self.tfidf_terms(job_description),
+        }
+    
+    def tfidf_terms(self, text: str) -> Dict[str, int]:
+        """Counts of the terms (after stop words and n-grams) the keyword vectorizer sees"""
+        return dict(Counter(self.vectorizer.build_analyzer()(text)))
+    
+    def score_features(self, features: np.ndarray) -> np.ndarray:
+        """
+        Compute every component score for many candidates with array expressions
+        
+        Args:
+            features: Array of shape (N, len(FEATURE_KEYS)) from feature_matrix
+            
+        Returns:
+            Array of shape (N, 5) with columns ordered as COMPONENT_KEYS
+        """
+        
+        columns = dict(zip(FEATURE_KEYS, np.asarray(features, dtype=float).reshape(-1, len(FEATURE_KEYS)).T))
+        
+        return np.column_stack([
+            skills_component(columns['skill_hits'], columns['required_skill_count'], columns['bonus_skills']),
+            experience_component(columns['resume_years'], columns['required_years'],
+                                 columns['title_similarity']),
+            education_component(columns['candidate_degree_level'], columns['required_degree_level'],
+                                columns['education_required']),
+            columns['tfidf_cosine'],
+            semantic_component(columns['tfidf_cosine'], columns['jaccard_similarity'],
+                               columns['embedding_similarity'])
+        ])
+    
+    def score_batch(self, features: np.ndarray, weights: Dict[str, float] = None,
+                    semantic_weight: float = None) -> Dict[str, np.ndarray]:
+        """
+        Score a feature matrix; identical to calculate_match_score per row
+        
+        Args:
+            features: Array of shape (N, len(FEATURE_KEYS)) from feature_matrix
+            weights: Optional component weights; defaults to self.weights
+            semantic_weight: Optional semantic blend; defaults to self.semantic_weight
+            
+        Returns:
+            Dictionary of COMPONENT_KEYS and 'match_score' to arrays of N scores
+        """
+        
+        components = self.score_features(features)
+        scores = {key: components[:, i] for i, key in enumerate(COMPONENT_KEYS)}
+        scores['match_score'] = self.combine_scores(components, weights, semantic_weight)
+        
+        return scores
+    
+    def combine_scores(self, components: np.ndarray, weights: Dict[str, float] = None,
+                       semantic_weight: float = None) -> np.ndarray:
+        """
+        Combine component scores into final match scores for many candidates at once
+        
+        Args:
+            components: Array of shape (N, 5) with columns ordered as COMPONENT_KEYS
+            weights: Optional component weights (normalized); defaults to self.weights
+            semantic_weight: Optional semantic blend; defaults to self.semantic_weight
+            
+        Returns:
+            Array of N match scores, capped at 1.0
+        """
+        
+        weights = normalize_weights(weights) if weights else self.weights
+        semantic_weight = self.semantic_weight if semantic_weight is None else semantic_weight
+        
+        components = np.asarray(components, dtype=float).reshape(-1, len(COMPONENT_KEYS))
+        
+        # Column-wise sums (not a matrix product) so a row scores the same in any batch size
+        overall = (components[:, 0] * weights['skills'] + components[:, 1] * weights['experience']
+                   + components[:, 2] * weights['education'] + components[:, 3] * weights['keywords'])
+        final = overall * (1.0 - semantic_weight) + components[:, 4] * semantic_weight
+        
+        return np.minimum(final, 1.0)
+    
+    def _calculate_skills_match(self, doc: AnalyzedDocument, required_skills: List[str], 
+                               job_doc: AnalyzedDocument) -> float:
         """Calculate skills matching score"""
         
+        skill_hits, bonus_skills = self._skill_features(doc, required_skills, job_doc)
+        
+        return float(skills_component(skill_hits, len(required_skills), bonus_skills))
+    
+    def _skill_features(self, doc: AnalyzedDocument, required_skills: List[str],
+                        job_doc: AnalyzedDocument) -> Tuple[float, int]:
+        """Count required-skill hits (fuzzy hits count 0.8) and bonus job-description skills"""
+        
         if not required_skills:
-            return 0.5  # Neutral score if no specific skills required
+            return 0.0, 0
         
-        resume_lower = resume_text.lower()
+        resume_lower = doc.lower
         matched_skills = 0
-        total_skills = len(required_skills)
         
         for skill in required_skills:
-            skill_lower = skill.lower()
-            
-            # Exact match
-            if skill_lower in resume_lower:
-                matched_skills += 1
-            # Fuzzy match for similar skills
-            elif any(fuzz.ratio(skill_lower, word) > 80 for word in resume_lower.split()):
-                matched_skills += 0.8
+            matched_skills += self._skill_hit(doc, skill)
         
         # Bonus for additional relevant skills mentioned in job description
-        job_skills = self._extract_skills_from_text(job_description)
+        job_skills = self._extract_skills_from_text(job_doc)
         bonus_skills = 0
         
         for skill in job_skills:
             if skill.lower() in resume_lower and skill not in required_skills:
-                bonus_skills += 0.1
+                bonus_skills += 1
         
-        base_score = matched_skills / total_skills if total_skills > 0 else 0
-        final_score = min(base_score + (bonus_skills * 0.1), 1.0)
-        
-        return final_score
+        return matched_skills, bonus_skills
+    
+    def _skill_hit(self, doc: AnalyzedDocument, skill: str) -> float:
+        """1 for an exact skill mention, 0.8 for a fuzzy match, otherwise 0"""
+        
+        skill_lower = skill.lower()
+        
+        # Exact match
+        if skill_lower in doc.lower:
+            return 1
+        # Fuzzy match for similar skills
+        if any(fuzz.ratio(skill_lower, word) > 80 for word in doc.whitespace_words):
+            return 0.8
+        return 0
     
-    def _calculate_experience_match(self, resume_text: str, job_description: str, 
+    def _calculate_experience_match(self, doc: AnalyzedDocument, job_doc: AnalyzedDocument, 
                                   job_title: str) -> float:
         """Calculate experience matching score"""
         
         # Extract years of experience from resume
-        resume_years = self._extract_years_experience(resume_text)
+        resume_years = self._extract_years_experience(doc)
         
         # Extract required experience from job description
-        required_years = self._extract_required_experience(job_description)
-        
-        # Calculate experience match
-        if required_years == 0:
-            experience_score = 0.7  # Neutral score if no specific requirement
-        elif resume_years >= required_years:
-            # Perfect match or overqualified
-            experience_score = min(1.0, 0.8 + (resume_years - required_years) * 0.05)
-        else:
-            # Underqualified but give partial credit
-            experience_score = max(0.2, resume_years / required_years * 0.8)
+        required_years = self._extract_required_experience(job_doc)
         
         # Check for relevant job titles and roles
-        title_match = self._calculate_title_match(resume_text, job_title, job_description)
+        title_match = self._calculate_title_match(doc, job_title)
         
         # Combine experience and title matching
-        final_score = (experience_score * 0.7) + (title_match * 0.3)
-        
-        return min(final_score, 1.0)
+        return float(experience_component(resume_years, required_years, title_match))
     
-    def _calculate_education_match(self, resume_text: str, job_description: str) -> float:
+    def _calculate_education_match(self, doc: AnalyzedDocument, job_doc: AnalyzedDocument) -> float:
         """Calculate education matching score"""
         
-        # Extract education requirements from job description
-        required_education = self._extract_education_requirements(job_description)
+        candidate_level, required_level, education_required = self._education_levels(doc, job_doc)
         
-        # Extract candidate's education from resume
-        candidate_education = self._extract_candidate_education(resume_text)
+        return float(education_component(candidate_level, required_level, education_required))
+    
+    def _education_levels(self, doc: AnalyzedDocument, job_doc: AnalyzedDocument) -> Tuple[int, int, bool]:
+        """Highest candidate and required degree levels, and whether the job states a requirement"""
         
-        if not required_education:
-            return 0.7  # Neutral score if no specific requirement
+        required_level, education_required = self._required_degree_level(job_doc)
         
-        education_score = 0.0
+        if not education_required:
+            return 0, 0, False
         
-        # Check degree level matching
-        degree_levels = {
-            'high school': 1, 'diploma': 1,
-            'associate': 2, 'bachelor': 3, 'master': 4, 'mba': 4,
-            'phd': 5, 'doctorate': 5
-        }
+        return self._candidate_degree_level(doc), required_level, True
+    
+    def _required_degree_level(self, job_doc: AnalyzedDocument) -> Tuple[int, bool]:
+        """Highest degree level the job asks for, and whether it states any requirement"""
         
-        required_level = 0
-        candidate_level = 0
+        # Extract education requirements from job description
+        required_education = self._extract_education_requirements(job_doc)
         
+        required_level = 0
         for req in required_education:
-            for degree, level in degree_levels.items():
+            for degree, level in DEGREE_LEVELS.items():
                 if degree in req.lower():
                     required_level = max(required_level, level)
         
+        return required_level, bool(required_education)
+    
+    def _candidate_degree_level(self, doc: AnalyzedDocument) -> int:
+        """Highest degree level mentioned in the resume"""
+        
+        # Extract candidate's education from resume
+        candidate_education = self._extract_candidate_education(doc)
+        
+        candidate_level = 0
         for edu in candidate_education:
-            for degree, level in degree_levels.items():
+            for degree, level in DEGREE_LEVELS.items():
                 if degree in edu.lower():
                     candidate_level = max(candidate_level, level)
         
-        if candidate_level >= required_level:
-            education_score = 1.0
-        elif candidate_level > 0:
-            education_score = candidate_level / required_level * 0.8
-        else:
-            education_score = 0.3  # Some credit for any education
-        
-        return min(education_score, 1.0)
+        return candidate_level
     
-    def _calculate_keyword_match(self, resume_text: str, job_description: str) -> float:
+    def _calculate_keyword_match(self, doc: AnalyzedDocument, job_doc: AnalyzedDocument) -> float:
         """Calculate keyword matching score using TF-IDF"""
         
         try:
             # Prepare texts
-            texts = [resume_text, job_description]
+            texts = [doc.text, job_doc.text]
             
             # Calculate TF-IDF vectors
             tfidf_matrix = self.vectorizer.fit_transform(texts)
@@ -232,36 +598,43 @@ class JobMatcher:
             logging.error(f"Error in keyword matching: {str(e)}")
             return 0.0
     
-    def _calculate_semantic_similarity(self, resume_text: str, job_description: str) -> float:
+    def _calculate_semantic_similarity(self, doc: AnalyzedDocument, job_doc: AnalyzedDocument,
+                                       keyword_score: Optional[float] = None) -> float:
         """Calculate semantic similarity between texts"""
         
-        # Simple implementation using word overlap and TF-IDF
-        # In production, you might want to use more advanced NLP models
+        # With an embedding engine this is a dot product of cached unit vectors;
+        # otherwise word overlap and TF-IDF are combined
         
         try:
-            # Tokenize and clean texts
-            resume_words = set(re.findall(r'\b\w+\b', resume_text.lower()))
-            job_words = set(re.findall(r'\b\w+\b', job_description.lower()))
-            
-            # Calculate Jaccard similarity
-            intersection = len(resume_words.intersection(job_words))
-            union = len(resume_words.union(job_words))
+            embedding_similarity = self._embedding_similarities([doc], job_doc)[0]
+            if not np.isnan(embedding_similarity):
+                return float(semantic_component(0.0, 0.0, embedding_similarity))
             
-            jaccard_similarity = intersection / union if union > 0 else 0
+            jaccard_similarity = self._jaccard_similarity(doc, job_doc)
             
-            # Combine with TF-IDF similarity for better results
-            tfidf_similarity = self._calculate_keyword_match(resume_text, job_description)
+            # Combine with TF-IDF similarity for better results (reused when already computed)
+            tfidf_similarity = (keyword_score if keyword_score is not None
+                                else self._calculate_keyword_match(doc, job_doc))
             
             # Weighted combination
-            semantic_score = (jaccard_similarity * 0.3) + (tfidf_similarity * 0.7)
-            
-            return semantic_score
+            return float(semantic_component(tfidf_similarity, jaccard_similarity))
             
         except Exception as e:
             logging.error(f"Error in semantic similarity: {str(e)}")
             return 0.0
     
-    def _extract_years_experience(self, text: str) -> int:
+    def _jaccard_similarity(self, doc: AnalyzedDocument, job_doc: AnalyzedDocument) -> float:
+        """Jaccard similarity of the resume and job description vocabularies"""
+        
+        resume_words = doc.vocabulary
+        job_words = job_doc.vocabulary
+        
+        intersection = len(resume_words.intersection(job_words))
+        union = len(resume_words.union(job_words))
+        
+        return intersection / union if union > 0 else 0
+    
+    def _extract_years_experience(self, doc: AnalyzedDocument) -> int:
         """Extract years of experience from resume text"""
         
         # Patterns to match experience mentions
@@ -273,16 +646,15 @@ class JobMatcher:
         ]
         
         years = []
-        text_lower = text.lower()
         
         for pattern in patterns:
-            matches = re.findall(pattern, text_lower)
+            matches = re.findall(pattern, doc.lower)
             years.extend([int(match) for match in matches])
         
         # Return the maximum years found, or 0 if none
         return max(years) if years else 0
     
-    def _extract_required_experience(self, job_description: str) -> int:
+    def _extract_required_experience(self, job_doc: AnalyzedDocument) -> int:
         """Extract required years of experience from job description"""
         
         patterns = [
@@ -293,22 +665,20 @@ class JobMatcher:
         ]
         
         years = []
-        text_lower = job_description.lower()
         
         for pattern in patterns:
-            matches = re.findall(pattern, text_lower)
+            matches = re.findall(pattern, job_doc.lower)
             years.extend([int(match) for match in matches])
         
         return max(years) if years else 0
     
-    def _calculate_title_match(self, resume_text: str, job_title: str, 
-                              job_description: str) -> float:
+    def _calculate_title_match(self, doc: AnalyzedDocument, job_title: str) -> float:
         """Calculate job title matching score"""
         
         if not job_title:
             return 0.5
         
-        resume_lower = resume_text.lower()
+        resume_lower = doc.lower
         job_title_lower = job_title.lower()
         
         # Direct title match
@@ -316,21 +686,24 @@ class JobMatcher:
             return 1.0
         
         # Fuzzy matching for similar titles
-        resume_titles = re.findall(r'(?:^|\n)([^,\n]*(?:engineer|developer|manager|analyst|director|lead|senior|junior)[^,\n]*)', resume_lower)
-        
         max_similarity = 0
-        for title in resume_titles:
+        for title in self._resume_titles(doc):
             similarity = fuzz.ratio(job_title_lower, title.strip()) / 100
             max_similarity = max(max_similarity, similarity)
         
         return max_similarity
     
-    def _extract_education_requirements(self, job_description: str) -> List[str]:
+    def _resume_titles(self, doc: AnalyzedDocument) -> List[str]:
+        """Lines (up to a comma) of the resume that name a role"""
+        
+        return re.findall(r'(?:^|\n)([^,\n]*(?:engineer|developer|manager|analyst|director|lead|senior|junior)[^,\n]*)', doc.lower)
+    
+    def _extract_education_requirements(self, job_doc: AnalyzedDocument) -> List[str]:
         """Extract education requirements from job description"""
         
         education_section = re.search(
             r'(?:education|qualifications|requirements)[\s\S]*?(?=\n[A-Z]|\Z)',
-            job_description, re.IGNORECASE
+            job_doc.text, re.IGNORECASE
         )
         
         if education_section:
@@ -343,7 +716,7 @@ class JobMatcher:
         
         return []
     
-    def _extract_candidate_education(self, resume_text: str) -> List[str]:
+    def _extract_candidate_education(self, doc: AnalyzedDocument) -> List[str]:
         """Extract candidate's education from resume"""
         
         education_patterns = [
@@ -357,15 +730,14 @@ class JobMatcher:
         ]
         
         education = []
-        text_lower = resume_text.lower()
         
         for pattern in education_patterns:
-            matches = re.findall(pattern, text_lower)
+            matches = re.findall(pattern, doc.lower)
             education.extend(matches)
         
         return education
     
-    def _extract_skills_from_text(self, text: str) -> List[str]:
+    def _extract_skills_from_text(self, doc: AnalyzedDocument) -> List[str]:
         """Extract technical skills from text"""
         
         # Common technical skills (subset for matching)
@@ -376,20 +748,19 @@ class JobMatcher:
         ]
         
         found_skills = []
-        text_lower = text.lower()
         
         for skill in skills_keywords:
-            if skill in text_lower:
+            if skill in doc.lower:
                 found_skills.append(skill)
         
         return found_skills
     
-    def _extract_matched_keywords(self, resume_text: str, job_description: str) -> List[str]:
+    def _extract_matched_keywords(self, doc: AnalyzedDocument, job_doc: AnalyzedDocument) -> List[str]:
         """Extract keywords that appear in both resume and job description"""
         
         # Get important keywords from job description
-        job_words = set(re.findall(r'\b[a-zA-Z]{3,}\b', job_description.lower()))
-        resume_words = set(re.findall(r'\b[a-zA-Z]{3,}\b', resume_text.lower()))
+        job_words = job_doc.alpha_words
+        resume_words = doc.alpha_words
         
         # Common stop words to exclude
         stop_words = {
@@ -407,14 +778,13 @@ class JobMatcher:
         
         return sorted(meaningful_matches)
     
-    def _extract_matched_skills(self, resume_text: str, required_skills: List[str]) -> List[str]:
+    def _extract_matched_skills(self, doc: AnalyzedDocument, required_skills: List[str]) -> List[str]:
         """Extract skills from required list that appear in resume"""
         
         matched_skills = []
-        resume_lower = resume_text.lower()
         
         for skill in required_skills:
-            if skill.lower() in resume_lower:
+            if skill.lower() in doc.lower:
                 matched_skills.append(skill)
         
         return matched_skills
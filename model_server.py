@@ -0,0 +1,284 @@
+"""Shared model server for the resume analyzer.
+
+One process per host owns the heavy models (the spaCy pipeline and the
+sentence-embedding engine) and serves named-entity recognition and
+embeddings over a Unix socket. Requests that arrive from different
+Streamlit sessions or worker processes within a short window are run as
+one batch.
+
+    python -m model_server --socket /tmp/resume_analyzer_models.sock
+
+Clients use the server when RESUME_ANALYZER_MODEL_SERVER names its socket
+and fall back to loading the models in-process otherwise.
+"""
+
+import os
+import time
+import queue
+import logging
+import argparse
+import threading
+from multiprocessing.connection import Client, Listener
+from typing import Dict, List, Any, Callable, Optional, Sequence, Tuple
+import numpy as np
+
+# Socket path of the model server; unset means every process loads its own models
+MODEL_SERVER_ADDRESS = os.environ.get('RESUME_ANALYZER_MODEL_SERVER', '')
+
+# Optional shared secret for the connection handshake
+MODEL_SERVER_AUTHKEY = os.environ.get('RESUME_ANALYZER_MODEL_SERVER_KEY', '').encode() or None
+
+# How long the server waits to fill a batch (seconds) and its maximum size in texts
+BATCH_WINDOW = 0.01
+MAX_BATCH_TEXTS = 256
+
+# Seconds a client waits before retrying an unreachable server
+RETRY_INTERVAL = 30.0
+
+# spaCy pipeline served for named-entity recognition
+SPACY_MODEL = 'en_core_web_sm'
+
+
+def load_spacy(model: str = SPACY_MODEL):
+    """Load the spaCy pipeline, or None if spaCy or the model is not installed"""
+
+    try:
+        import spacy
+        return spacy.load(model)
+    except (ImportError, OSError):
+        # Fallback if spaCy model is not installed
+        return None
+
+
+class ModelServer:
+    """
+    Serve NER and embeddings from models loaded once
+
+    Each connection is handled by its own thread, which queues the request
+    and waits for the reply. A single batching thread drains the queue,
+    groups requests by method and runs each group as one model call.
+    """
+
+    def __init__(self, address: str, authkey: Optional[bytes] = MODEL_SERVER_AUTHKEY,
+                 batch_window: float = BATCH_WINDOW, max_batch: int = MAX_BATCH_TEXTS):
+        self.address = address
+        self.authkey = authkey
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.nlp = None
+        self.engine = None
+        self._requests: "queue.Queue[Tuple[str, List[str], queue.Queue]]" = queue.Queue()
+        self.handlers: Dict[str, Callable[[List[str]], List[Any]]] = {
+            'ner': self._ner,
+            'embed': self._embed,
+        }
+
+    def load(self) -> None:
+        """Load and warm up the models"""
+
+        from embeddings import load_engine
+
+        self.nlp = load_spacy()
+        if self.nlp is not None:
+            self.nlp('Warm up the pipeline in Springfield, IL.')
+        self.engine = load_engine()
+        logging.info(f"Model server loaded spaCy: {self.nlp is not None}, "
+                     f"embeddings: {self.engine.model_name if self.engine else None}")
+
+    def info(self) -> Dict[str, Any]:
+        """Which models this server provides"""
+        return {
+            'ner': self.nlp is not None,
+            'embedding_model': self.engine.model_name if self.engine else None,
+            'embedding_dimension': self.engine.dimension if self.engine else None,
+        }
+
+    def _ner(self, texts: List[str]) -> List[List[Tuple[str, str]]]:
+        if self.nlp is None:
+            return [[] for _ in texts]
+        return [[(ent.text, ent.label_) for ent in doc.ents] for doc in self.nlp.pipe(texts, batch_size=64)]
+
+    def _embed(self, texts: List[str]) -> List[np.ndarray]:
+        if self.engine is None:
+            raise RuntimeError("No embedding model is loaded on the model server")
+        return list(self.engine.embed(texts))
+
+    def _batch_loop(self) -> None:
+        """Run queued requests in batches, one model call per method"""
+
+        while True:
+            pending = [self._requests.get()]
+            size = len(pending[0][1])
+            deadline = time.monotonic() + self.batch_window
+            while size < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    request = self._requests.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                pending.append(request)
+                size += len(request[1])
+
+            groups: Dict[str, list] = {}
+            for request in pending:
+                groups.setdefault(request[0], []).append(request)
+
+            for method, requests in groups.items():
+                texts = [text for _, request_texts, _ in requests for text in request_texts]
+                try:
+                    results = self.handlers[method](texts)
+                except Exception as e:
+                    logging.error(f"Model server {method} failed: {str(e)}")
+                    for _, _, reply in requests:
+                        reply.put(('error', str(e)))
+                    continue
+
+                offset = 0
+                for _, request_texts, reply in requests:
+                    reply.put(('ok', results[offset:offset + len(request_texts)]))
+                    offset += len(request_texts)
+
+    def _serve_connection(self, conn) -> None:
+        """Answer requests of one client connection until it closes"""
+
+        with conn:
+            while True:
+                try:
+                    method, texts = conn.recv()
+                except (EOFError, OSError):
+                    return
+
+                if method == 'info':
+                    conn.send(('ok', self.info()))
+                elif method not in self.handlers:
+                    conn.send(('error', f"Unknown method {method!r}"))
+                else:
+                    reply: queue.Queue = queue.Queue(maxsize=1)
+                    self._requests.put((method, list(texts), reply))
+                    conn.send(reply.get())
+
+    def serve_forever(self) -> None:
+        """Load the models and accept connections on the Unix socket"""
+
+        self.load()
+        if os.path.exists(self.address):
+            os.unlink(self.address)
+
+        threading.Thread(target=self._batch_loop, name='model-batcher', daemon=True).start()
+        with Listener(self.address, family='AF_UNIX', authkey=self.authkey) as listener:
+            logging.info(f"Model server listening on {self.address}")
+            while True:
+                try:
+                    conn = listener.accept()
+                except Exception as e:
+                    logging.warning(f"Model server rejected a connection: {str(e)}")
+                    continue
+                threading.Thread(target=self._serve_connection, args=(conn,), daemon=True).start()
+
+
+class ModelClient:
+    """
+    Client for the model server
+
+    Every thread (and so every Streamlit session) gets its own connection,
+    so concurrent sessions reach the server in parallel and are batched
+    there. After a connection failure the server is not retried for
+    RETRY_INTERVAL seconds and callers fall back to local models.
+    """
+
+    def __init__(self, address: str, authkey: Optional[bytes] = MODEL_SERVER_AUTHKEY):
+        self.address = address
+        self.authkey = authkey
+        self._local = threading.local()
+        self._unavailable_until = 0.0
+        self._info: Optional[Dict[str, Any]] = None
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self._unavailable_until
+
+    def _call(self, method: str, texts: Sequence[str] = ()) -> Any:
+        if not self.available:
+            raise ConnectionError("Model server is unavailable")
+
+        try:
+            conn = getattr(self._local, 'conn', None)
+            if conn is None:
+                conn = self._local.conn = Client(self.address, family='AF_UNIX', authkey=self.authkey)
+            conn.send((method, list(texts)))
+            status, result = conn.recv()
+        except (OSError, EOFError) as e:
+            self._local.conn = None
+            self._unavailable_until = time.monotonic() + RETRY_INTERVAL
+            raise ConnectionError(f"Model server at {self.address} is unavailable: {str(e)}")
+
+        if status != 'ok':
+            raise RuntimeError(result)
+        return result
+
+    def info(self) -> Dict[str, Any]:
+        """Models provided by the server (cached after the first call)"""
+        if self._info is None:
+            self._info = self._call('info')
+        return self._info
+
+    def ner(self, texts: Sequence[str]) -> List[List[Tuple[str, str]]]:
+        """(text, label) entities of each text"""
+        return self._call('ner', texts)
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Unit embeddings of shape (len(texts), dimension)"""
+        vectors = self._call('embed', texts)
+        return np.vstack(vectors) if vectors else np.empty((0, self.info()['embedding_dimension']),
+                                                           dtype=np.float32)
+
+
+class RemoteEmbeddingEngine:
+    """EmbeddingEngine interface backed by the model server"""
+
+    def __init__(self, client: ModelClient):
+        info = client.info()
+        self.client = client
+        self.model_name = info['embedding_model']
+        self.dimension = info['embedding_dimension']
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        return self.client.embed(texts)
+
+    def similarity(self, texts: Sequence[str], query: str) -> np.ndarray:
+        vectors = self.embed(list(texts) + [query])
+        return vectors[:-1] @ vectors[-1]
+
+
+_client: Optional[ModelClient] = None
+_client_lock = threading.Lock()
+
+
+def get_model_client() -> Optional[ModelClient]:
+    """Process-wide client, or None when no model server is configured or reachable"""
+
+    global _client
+    if not MODEL_SERVER_ADDRESS:
+        return None
+    with _client_lock:
+        if _client is None:
+            _client = ModelClient(MODEL_SERVER_ADDRESS)
+    return _client if _client.available else None
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Serve shared models for the resume analyzer")
+    arg_parser.add_argument('--socket', default=MODEL_SERVER_ADDRESS or '/tmp/resume_analyzer_models.sock',
+                            help="Unix socket path to listen on")
+    arg_parser.add_argument('--batch-window', type=float, default=BATCH_WINDOW,
+                            help="Seconds to wait for more requests before running a batch")
+    args = arg_parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    ModelServer(args.socket, batch_window=args.batch_window).serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+import os
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Dict, List, Optional, Sequence
+
+# Optional OCR engine: pytesseract plus a local tesseract binary
+try:
+    import pytesseract
+    pytesseract.get_tesseract_version()
+    OCR_AVAILABLE = True
+except Exception:
+    # Fallback if pytesseract or the tesseract binary is not installed
+    pytesseract = None
+    OCR_AVAILABLE = False
+
+# Pages with fewer extracted characters than this are treated as lacking a text layer
+MIN_PAGE_CHARS = 25
+
+# Rasterization resolution and per-page OCR time budget in seconds
+OCR_DPI = 300
+OCR_PAGE_TIMEOUT = float(os.environ.get('RESUME_ANALYZER_OCR_TIMEOUT', 20))
+
+# Maximum number of page results kept in the content-hash cache
+OCR_CACHE_SIZE = 2048
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+_cache: "OrderedDict[tuple, str]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    """Shared worker pool; tesseract runs as a subprocess, so threads run in parallel"""
+
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 2, thread_name_prefix='ocr')
+        return _pool
+
+
+def pages_without_text(page_texts: Sequence[str]) -> List[int]:
+    """Indexes of pages whose extracted text is too short to be a text layer"""
+    return [i for i, text in enumerate(page_texts) if len((text or '').strip()) < MIN_PAGE_CHARS]
+
+
+def _cache_get(key: tuple) -> Optional[str]:
+    with _cache_lock:
+        text = _cache.get(key)
+        if text is not None:
+            _cache.move_to_end(key)
+        return text
+
+
+def _cache_put(key: tuple, text: str) -> None:
+    with _cache_lock:
+        _cache[key] = text
+        _cache.move_to_end(key)
+        while len(_cache) > OCR_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def _rasterize(file_content: bytes, page_numbers: Sequence[int], dpi: int) -> Dict[int, object]:
+    """Render the given pages to PIL images (pdfium is not thread-safe, so this runs serially)"""
+
+    import pypdfium2 as pdfium
+
+    images = {}
+    document = pdfium.PdfDocument(file_content)
+    try:
+        for page_number in page_numbers:
+            page = document[page_number]
+            images[page_number] = page.render(scale=dpi / 72).to_pil()
+            page.close()
+    finally:
+        document.close()
+    return images
+
+
+def _ocr_image(image, timeout: float) -> str:
+    return pytesseract.image_to_string(image, timeout=timeout)
+
+
+def ocr_pages(file_content: bytes, page_numbers: Sequence[int], dpi: int = OCR_DPI,
+              page_timeout: float = OCR_PAGE_TIMEOUT) -> Dict[int, str]:
+    """
+    OCR selected PDF pages in the worker pool
+
+    Results are cached by content hash and page number, so a document is
+    never OCR'd twice. Pages that exceed the time budget or fail come back
+    as empty strings and are not cached.
+
+    Args:
+        file_content: PDF file content
+        page_numbers: Zero-based pages to OCR
+        dpi: Rasterization resolution
+        page_timeout: Seconds allowed per page
+
+    Returns:
+        Dictionary of page number to recognised text
+    """
+
+    if not OCR_AVAILABLE or not page_numbers:
+        return {}
+
+    digest = hashlib.sha1(file_content).hexdigest()
+    results = {}
+    missing = []
+    for page_number in page_numbers:
+        cached = _cache_get((digest, page_number, dpi))
+        if cached is not None:
+            results[page_number] = cached
+        else:
+            missing.append(page_number)
+
+    if not missing:
+        return results
+
+    try:
+        images = _rasterize(file_content, missing, dpi)
+    except Exception as e:
+        logging.error(f"Error rasterizing PDF pages for OCR: {str(e)}")
+        return results
+
+    pool = _get_pool()
+    futures = {page_number: pool.submit(_ocr_image, image, page_timeout)
+               for page_number, image in images.items()}
+
+    for page_number, future in futures.items():
+        try:
+            # tesseract is killed after page_timeout; the margin covers queueing in the pool
+            text = future.result(timeout=page_timeout * 2 + 5)
+            _cache_put((digest, page_number, dpi), text)
+        except (FutureTimeoutError, RuntimeError) as e:
+            logging.warning(f"OCR of page {page_number + 1} exceeded its time budget: {str(e)}")
+            text = ''
+        except Exception as e:
+            logging.error(f"OCR of page {page_number + 1} failed: {str(e)}")
+            text = ''
+        results[page_number] = text
+
+    return results
@@ -0,0 +1,364 @@
+import copy
+import hashlib
+import logging
+from datetime import datetime
+from typing import Dict, List, Any, Callable, Iterable, Optional, Set, Tuple
+from resume_parser import ResumeParser
+from matcher import JobMatcher, EXPLANATION_KEYS
+from utils import extract_text_from_file
+from dedup import DuplicateDetector
+from document import AnalyzedDocument
+from sandbox import SandboxPool
+from text_corpus import TextCorpus
+
+# Keys of a stored or batch result that belong to that copy, not to the document content
+_PER_COPY_KEYS = (
+    'candidate_id', 'job_id', 'pipeline_stage', 'duplicate_of', 'duplicate_count',
+    'duplicate_similarity', 'duplicate_of_id', 'duplicate_of_key', 'minhash_signature',
+)
+
+
+def _add_metadata(parsed_resume: Dict[str, Any], filename: str, document_key: str, file_size: int) -> None:
+    """Add upload metadata to a processed resume"""
+
+    parsed_resume.update({
+        'filename': filename,
+        'document_key': document_key,
+        'upload_time': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'file_size': file_size,
+        'starred': False,
+        'notes': "",
+        'status': 'completed'
+    })
+
+
+def analyze_text(extracted_text: str, filename: str, parser: ResumeParser, matcher: JobMatcher,
+                 job_description: str, job_title: str = "", required_skills: str = "",
+                 parsed_resume: Optional[Dict[str, Any]] = None,
+                 fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """
+    Parse and score already extracted resume text
+
+    A parsed_resume produced elsewhere (e.g. in the sandbox) is scored
+    without parsing the text again. fields are the optional fields to
+    extract (see resume_parser.plan_extraction).
+
+    Returns:
+        Parsed resume dictionary with match scores (no upload metadata)
+    """
+
+    # Tokenize and normalize once for both the parser and the matcher
+    document = AnalyzedDocument(extracted_text)
+
+    # Parse resume
+    if parsed_resume is None:
+        parsed_resume = parser.parse_resume(extracted_text, filename, document=document, fields=fields)
+
+    # Calculate job match score
+    if job_description:
+        match_score = matcher.calculate_match_score(
+            extracted_text, job_description, job_title, required_skills, document=document
+        )
+        parsed_resume.update(match_score)
+
+    return parsed_resume
+
+
+def process_file(file_content: bytes, filename: str, parser: ResumeParser, matcher: JobMatcher,
+                 job_description: str, job_title: str = "", required_skills: str = "",
+                 ocr: bool = False, fields: Optional[Iterable[str]] = None) -> Tuple[Dict[str, Any], str]:
+    """
+    Extract, parse and score a single resume file
+
+    Args:
+        file_content: Binary content of the file
+        filename: Name of the file
+        parser: Resume parser instance
+        matcher: Job matcher instance
+        job_description: Job description text
+        job_title: Specific job title
+        required_skills: Comma-separated required skills
+        ocr: OCR scanned PDF pages
+        fields: Optional fields to extract, the parser's defaults if None
+
+    Returns:
+        Tuple of (parsed resume dictionary, extracted text)
+    """
+
+    # Extract text from file
+    extracted_text = extract_text_from_file(file_content, filename, ocr=ocr)
+
+    parsed_resume = analyze_text(extracted_text, filename, parser, matcher,
+                                 job_description, job_title, required_skills, fields=fields)
+    _add_metadata(parsed_resume, filename, hashlib.sha1(file_content).hexdigest(), len(file_content))
+
+    return parsed_resume, extracted_text
+
+
+def _failed_result(filename: str, message: str, **extra) -> Dict[str, Any]:
+    """Result of a file that could not be processed"""
+    return {
+        'filename': filename,
+        'name': 'Error processing file',
+        'status': 'error',
+        'match_score': 0.0,
+        'error_message': message,
+        **extra,
+    }
+
+
+def _reuse_duplicate(match: Tuple[str, Any, float], results: List[Dict[str, Any]],
+                     detector: DuplicateDetector, extracted_text: str, matcher: JobMatcher,
+                     job_description: str, job_title: str, required_skills: str,
+                     job_id: Optional[str]) -> Dict[str, Any]:
+    """
+    Build the result for a near-duplicate from its original's parse and scores
+
+    Batch originals were scored against the same job, so everything is
+    reused. Stored originals keep their scores only if they belong to job_id;
+    otherwise the parse is reused and the text is scored again.
+    """
+
+    source, key, similarity = match
+
+    if source == 'batch':
+        original = results[key]
+        reused = copy.deepcopy(original)
+        link = ({'duplicate_of_id': original['duplicate_of_id']} if original.get('duplicate_of_id')
+                else {'duplicate_of_key': original.get('duplicate_of_key') or original['document_key']})
+    else:
+        original = detector.store.get(key)
+        reused = copy.deepcopy(original)
+        if original.get('job_id') != job_id and job_description:
+            reused.update(matcher.calculate_match_score(
+                extracted_text, job_description, job_title, required_skills
+            ))
+            # The original's explanation is for its own job; this one is computed on demand
+            for field in EXPLANATION_KEYS:
+                reused.pop(field, None)
+        link = {'duplicate_of_id': original.get('duplicate_of') or original['candidate_id']}
+
+    for field in _PER_COPY_KEYS:
+        reused.pop(field, None)
+    reused.update(link)
+    reused['duplicate_similarity'] = round(similarity, 3)
+    reused['duplicate_of_filename'] = original.get('filename', '')
+    return reused
+
+
+def _store_text(corpus: TextCorpus, document_key: str, text: str, file_size: int) -> None:
+    """Keep an extracted text in the corpus; a failed write never fails the file"""
+    try:
+        corpus.add(document_key, text, file_size)
+    except Exception as e:
+        logging.warning(f"Could not store text of {document_key} in the text corpus: {str(e)}")
+
+
+def process_batch(files: Iterable[Tuple[str, bytes]], job_description: str, job_title: str = "",
+                  required_skills: str = "", parser: Optional[ResumeParser] = None,
+                  matcher: Optional[JobMatcher] = None,
+                  progress_callback: Optional[Callable[[int, int, str], None]] = None,
+                  detector: Optional[DuplicateDetector] = None, job_id: Optional[str] = None,
+                  ocr: bool = False,
+                  result_callback: Optional[Callable[[int, Dict[str, Any], str], None]] = None,
+                  should_stop: Optional[Callable[[], bool]] = None,
+                  completed: Optional[Dict[int, Tuple[Dict[str, Any], str]]] = None,
+                  sandbox: Optional[SandboxPool] = None,
+                  quarantined: Optional[Set[str]] = None,
+                  corpus: Optional[TextCorpus] = None,
+                  fields: Optional[Iterable[str]] = None) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Process a batch of resume files without any UI dependencies
+
+    Args:
+        files: Iterable of (filename, file content) pairs
+        job_description: Job description text
+        job_title: Specific job title
+        required_skills: Comma-separated required skills
+        parser: Optional parser instance to reuse
+        matcher: Optional matcher instance to reuse
+        progress_callback: Called as (index, total, filename) before each file
+        detector: Optional near-duplicate detector; near-identical documents
+            reuse the parse and scores of their original instead of being
+            processed again
+        job_id: Identifier of the job, used to decide whether stored scores
+            can be reused
+        ocr: OCR PDF pages without a text layer in the OCR worker pool
+        result_callback: Called as (index, result, text) after each file
+        should_stop: Checked before each file; when it returns True the
+            batch stops and the results so far are returned
+        completed: (result, text) of files already processed by an earlier
+            run of this batch, by position; they are reused as they are
+            (not extracted or scored again)
+        sandbox: Optional SandboxPool; extraction and parsing then run in
+            its worker processes under its time and memory limits, and a
+            file that exceeds them gets an error result with
+            'quarantine_reason' and 'quarantine_stage'
+        quarantined: Document keys of files quarantined earlier; they are
+            reported as errors without being opened
+        corpus: Optional TextCorpus; each extracted text is stored in it
+            so the document can later be re-scored without its file
+        fields: Optional resume fields to extract (resume_parser.OPTIONAL_FIELDS);
+            the parser's defaults if None
+
+    Returns:
+        Tuple of (results, extracted texts); failed files get a result with
+        status 'error' and an empty text
+    """
+
+    files = list(files)
+    parser = parser or ResumeParser()
+    matcher = matcher or JobMatcher()
+    results = []
+    texts = []
+    total = len(files)
+    keys = [hashlib.sha1(file_content).hexdigest() for _, file_content in files]
+
+    # Files left for this run go to the sandbox up front so its workers run ahead of scoring
+    sandboxed_files = set()
+    sandboxed = None
+    if sandbox is not None:
+        sandboxed_files = {i for i in range(total) if not (completed and i in completed)
+                           and not (quarantined and keys[i] in quarantined)}
+        sandboxed = sandbox.run([files[i] for i in sorted(sandboxed_files)], ocr=ocr, fields=fields)
+
+    try:
+        for i, (filename, file_content) in enumerate(files):
+            if should_stop and should_stop():
+                break
+
+            if completed and i in completed:
+                parsed_resume, extracted_text = completed[i]
+                if detector and parsed_resume.get('minhash_signature') is not None:
+                    detector.add(i, parsed_resume['minhash_signature'])
+                results.append(parsed_resume)
+                texts.append(extracted_text)
+                if result_callback:
+                    result_callback(i, parsed_resume, extracted_text)
+                continue
+
+            if progress_callback:
+                progress_callback(i, total, filename)
+
+            try:
+                outcome = next(sandboxed) if i in sandboxed_files else None
+                if quarantined and keys[i] in quarantined:
+                    parsed_resume = _failed_result(filename, "Quarantined by an earlier batch",
+                                                   document_key=keys[i])
+                    extracted_text = ''
+                elif outcome and 'quarantine_reason' in outcome:
+                    logging.warning(f"Quarantined {filename} ({outcome['quarantine_reason']} during "
+                                    f"{outcome['quarantine_stage']}): {outcome['error']}")
+                    parsed_resume = _failed_result(
+                        filename, f"Quarantined: {outcome['error']}", document_key=keys[i],
+                        quarantine_reason=outcome['quarantine_reason'],
+                        quarantine_stage=outcome['quarantine_stage'],
+                    )
+                    extracted_text = ''
+                else:
+                    if outcome is None:
+                        extracted_text = extract_text_from_file(file_content, filename, ocr=ocr)
+                    elif 'error' in outcome:
+                        raise RuntimeError(outcome['error'])
+                    else:
+                        extracted_text = outcome['text']
+
+                    if corpus is not None:
+                        _store_text(corpus, keys[i], extracted_text, len(file_content))
+
+                    # Signature is taken at extraction time, before any parsing work
+                    signature = detector.signature(extracted_text) if detector else None
+                    match = detector.find(signature) if signature is not None else None
+
+                    if match:
+                        parsed_resume = _reuse_duplicate(match, results, detector, extracted_text, matcher,
+                                                         job_description, job_title, required_skills, job_id)
+                    else:
+                        parsed_resume = analyze_text(extracted_text, filename, parser, matcher,
+                                                     job_description, job_title, required_skills,
+                                                     outcome['parsed'] if outcome else None, fields=fields)
+                    _add_metadata(parsed_resume, filename, keys[i], len(file_content))
+
+                    if signature is not None:
+                        detector.add(i, signature)
+                        parsed_resume['minhash_signature'] = signature
+
+                results.append(parsed_resume)
+                texts.append(extracted_text)
+
+            except Exception as e:
+                logging.error(f"Error processing {filename}: {str(e)}")
+                results.append(_failed_result(filename, str(e)))
+                texts.append('')
+
+            if result_callback:
+                result_callback(i, results[-1], texts[-1])
+    finally:
+        # Stops sandbox workers still busy with files of a batch that stopped early
+        if sandboxed is not None:
+            sandboxed.close()
+
+    return results, texts
+
+
+def rescore_batch(documents: Iterable[Tuple[str, str]], corpus: TextCorpus, job_description: str,
+                  job_title: str = "", required_skills: str = "", parser: Optional[ResumeParser] = None,
+                  matcher: Optional[JobMatcher] = None,
+                  progress_callback: Optional[Callable[[int, int, str], None]] = None,
+                  result_callback: Optional[Callable[[int, Dict[str, Any], str], None]] = None,
+                  should_stop: Optional[Callable[[], bool]] = None,
+                  completed: Optional[Dict[int, Tuple[Dict[str, Any], str]]] = None,
+                  fields: Optional[Iterable[str]] = None) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Parse and score stored resume texts against a job, without their files
+
+    Texts come from the corpus, so nothing is extracted (or OCRed) again.
+    Callbacks, should_stop, completed and fields work as in process_batch.
+
+    Args:
+        documents: Iterable of (filename, document_key) pairs
+        corpus: Text corpus the documents were stored in when first extracted
+
+    Returns:
+        Tuple of (results, texts); a document missing from the corpus gets
+        a result with status 'error' and an empty text
+    """
+
+    documents = list(documents)
+    parser = parser or ResumeParser()
+    matcher = matcher or JobMatcher()
+    results = []
+    texts = []
+    total = len(documents)
+
+    for i, (filename, document_key) in enumerate(documents):
+        if should_stop and should_stop():
+            break
+
+        if completed and i in completed:
+            parsed_resume, extracted_text = completed[i]
+        else:
+            if progress_callback:
+                progress_callback(i, total, filename)
+
+            try:
+                extracted_text = corpus.get(document_key)
+                if extracted_text is None:
+                    parsed_resume = _failed_result(filename, "Text not in the corpus; upload the file again",
+                                                   document_key=document_key)
+                    extracted_text = ''
+                else:
+                    parsed_resume = analyze_text(extracted_text, filename, parser, matcher,
+                                                 job_description, job_title, required_skills, fields=fields)
+                    _add_metadata(parsed_resume, filename, document_key, corpus.file_size(document_key))
+            except Exception as e:
+                logging.error(f"Error re-scoring {filename}: {str(e)}")
+                parsed_resume = _failed_result(filename, str(e))
+                extracted_text = ''
+
+        results.append(parsed_resume)
+        texts.append(extracted_text)
+        if result_callback:
+            result_callback(i, parsed_resume, extracted_text)
+
+    return results, texts
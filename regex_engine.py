@@ -0,0 +1,106 @@
+"""
+Regex engine layer for the resume parser's field patterns
+
+Patterns are compiled with RE2 (google-re2) when it is installed: RE2
+matches in time linear in the input, whatever the pattern. Without it, or
+for a pattern RE2 cannot express (lookarounds, backreferences), Python's
+backtracking re is used. Patterns prone to backtracking can also be given
+a line limit, which bounds the work of the backtracking engine per line:
+when such a pattern falls back to re, longer lines are clipped before
+matching. RE2 needs no limit and sees the full lines, so on lines over the
+limit it can find matches re misses.
+"""
+
+import os
+import re
+import logging
+from typing import Any, List, Optional
+
+# Optional linear-time engine: RE2 through the google-re2 bindings
+try:
+    import re2
+    RE2_AVAILABLE = True
+except Exception:
+    # Fallback if google-re2 is not installed
+    re2 = None
+    RE2_AVAILABLE = False
+
+REGEX_ENGINES = ('auto', 're2', 're')
+
+# 'auto' and 're2' use RE2 when it is installed, 're' always uses Python's engine
+# (override with RESUME_ANALYZER_REGEX_ENGINE)
+REGEX_ENGINE = os.environ.get('RESUME_ANALYZER_REGEX_ENGINE', 'auto')
+
+# Characters of each line that line-limited patterns look at
+MAX_PATTERN_LINE = int(os.environ.get('RESUME_ANALYZER_MAX_PATTERN_LINE', 200))
+
+# re flags RE2 understands, as inline flags
+_RE2_FLAGS = {re.IGNORECASE: 'i', re.MULTILINE: 'm', re.DOTALL: 's'}
+
+if REGEX_ENGINE == 're2' and not RE2_AVAILABLE:
+    logging.warning("RESUME_ANALYZER_REGEX_ENGINE=re2 but google-re2 is not installed; using re")
+
+
+def clip_lines(text: str, max_line: int) -> str:
+    """Cut every line of text to at most max_line characters"""
+
+    lines = text.split('\n')
+    if all(len(line) <= max_line for line in lines):
+        return text
+    return '\n'.join(line[:max_line] for line in lines)
+
+
+class ParserPattern:
+    """
+    A compiled pattern with the subset of the re.Pattern API the parser uses
+
+    Attributes:
+        pattern: The regular expression (Python re syntax)
+        engine: 're2' or 're', the engine that actually compiled it
+        max_line: Line limit applied to searched text, or None (always None with RE2)
+    """
+
+    def __init__(self, pattern: str, flags: int = 0, max_line: Optional[int] = None,
+                 engine: str = REGEX_ENGINE):
+        self.pattern = pattern
+        self.max_line = max_line
+        self.engine = 're'
+        self._compiled = None
+
+        unsupported = flags & ~sum(_RE2_FLAGS)
+        if engine != 're' and RE2_AVAILABLE and not unsupported:
+            inline = ''.join(letter for flag, letter in _RE2_FLAGS.items() if flags & flag)
+            try:
+                self._compiled = re2.compile(f'(?{inline}){pattern}' if inline else pattern)
+                self.engine = 're2'
+            except re2.error as e:
+                logging.debug(f"RE2 cannot compile {pattern!r}, using re: {str(e)}")
+
+        if self._compiled is None:
+            self._compiled = re.compile(pattern, flags)
+        if self.engine == 're2':
+            # Linear-time matching: clipping would only drop matches late in long lines
+            self.max_line = None
+
+    def _prepare(self, text: str) -> str:
+        return clip_lines(text, self.max_line) if self.max_line else text
+
+    def search(self, text: str) -> Optional[Any]:
+        return self._compiled.search(self._prepare(text))
+
+    def findall(self, text: str) -> List[Any]:
+        return self._compiled.findall(self._prepare(text))
+
+
+def compile_pattern(pattern: str, flags: int = 0, max_line: Optional[int] = None,
+                    engine: str = REGEX_ENGINE) -> ParserPattern:
+    """
+    Compile a parser pattern with the configured engine
+
+    Args:
+        pattern: Regular expression in Python re syntax
+        flags: re flags (IGNORECASE, MULTILINE and DOTALL also work with RE2)
+        max_line: Clip lines of searched text to this many characters when matching with re
+        engine: 'auto', 're2' or 're'
+    """
+    return ParserPattern(pattern, flags, max_line, engine)
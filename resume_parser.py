@@ -1,10 +1,13 @@
+import os
 import re
 import nltk
-import spacy
 from datetime import datetime
 import logging
-from typing import Dict, List, Any, Optional
-import textstat
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Any, Optional, Tuple
+from document import AnalyzedDocument
+from regex_engine import compile_pattern, REGEX_ENGINE, MAX_PATTERN_LINE
+from model_server import get_model_client, load_spacy
 
 # Download required NLTK data
 try:
@@ -17,20 +20,139 @@ try:
 except LookupError:
     nltk.download('stopwords')
 
-# Load spaCy model
-try:
-    nlp = spacy.load("en_core_web_sm")
-except OSError:
-    # Fallback if spaCy model is not installed
-    nlp = None
+@lru_cache(maxsize=1)
+def _local_nlp():
+    """spaCy pipeline loaded in this process, only when no model server is used"""
+    return load_spacy()
+
+def named_entities(text: str) -> List[Tuple[str, str]]:
+    """
+    (text, label) named entities of text
+    
+    Served by the shared model server when one is configured, otherwise
+    by a spaCy pipeline loaded in this process (empty without spaCy).
+    """
+    
+    client = get_model_client()
+    if client is not None:
+        try:
+            return [tuple(entity) for entity in client.ner([text])[0]]
+        except (ConnectionError, RuntimeError) as e:
+            logging.warning(f"Falling back to local NER: {str(e)}")
+    
+    nlp = _local_nlp()
+    if nlp is None:
+        return []
+    return [(ent.text, ent.label_) for ent in nlp(text).ents]
+
+# Extractor of each parsed field and what it reads: document views shared
+# through the AnalyzedDocument ('text', 'lower', 'lines', 'tokens',
+# 'sections', 'entities', 'readability') or, for an extractor that builds on
+# them, earlier fields. Views are computed on first use and cached on the
+# document, so a run only builds the views of the fields it extracts, once.
+# Declared in dependency order.
+EXTRACTORS: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    'name': ('_extract_name', ('text', 'sections', 'entities')),
+    'email': ('_extract_email', ('text',)),
+    'phone': ('_extract_phone', ('text',)),
+    'location': ('_extract_location', ('text', 'sections', 'entities')),
+    'skills': ('_extract_skills', ('tokens', 'lower')),
+    'experience': ('_extract_experience', ('sections',)),
+    'years_experience': ('_calculate_years_experience', ('experience',)),
+    'education': ('_extract_education', ('sections', 'text')),
+    'certifications': ('_extract_certifications', ('lower',)),
+    'projects': ('_extract_projects', ('sections',)),
+    'languages': ('_extract_languages', ('lower',)),
+    'awards': ('_extract_awards', ('sections', 'lines')),
+    'publications': ('_extract_publications', ('sections',)),
+    'readability_score': ('_readability_score', ('readability',)),
+}
+
+# Fields a run may leave out (the upload page's extraction options); the
+# others are extracted on every run
+OPTIONAL_FIELDS = ['projects', 'certifications', 'languages', 'awards', 'publications', 'readability_score']
+
+# Optional fields extracted when a run does not choose
+DEFAULT_FIELDS = frozenset(OPTIONAL_FIELDS) - {'publications'}
+
+# Characters of the contact block given to named-entity recognition
+_ENTITY_WINDOW = 1000
+
+# Confidence at which the name and location heuristics are trusted without
+# named-entity recognition (override with RESUME_ANALYZER_NER_CONFIDENCE;
+# 0 never runs NER, anything above 1 runs it on every resume)
+NER_CONFIDENCE = float(os.environ.get('RESUME_ANALYZER_NER_CONFIDENCE', 0.7))
+
+# Non-empty lines at the top of the contact block searched for the name
+_HEADER_LINES = 5
+
+# Longer header lines are contact details or prose, not a name
+_MAX_NAME_LINE = 80
+
+# Words that rule a header line out as a name (titles, headings, organisations)
+_NOT_NAME_WORDS = frozenset({
+    'resume', 'curriculum', 'vitae', 'cv', 'profile', 'summary', 'objective', 'contact', 'information',
+    'experience', 'education', 'skills', 'references', 'address', 'phone', 'email', 'mobile',
+    'engineer', 'developer', 'manager', 'scientist', 'analyst', 'architect', 'lead', 'senior', 'junior',
+    'consultant', 'designer', 'intern', 'director', 'specialist', 'administrator', 'officer',
+    'technical', 'software', 'data', 'product', 'project', 'head', 'principal', 'staff',
+    'university', 'college', 'institute', 'school', 'inc', 'llc', 'ltd', 'corp', 'company',
+    'street', 'avenue', 'road', 'suite', 'linkedin', 'github', 'portfolio',
+})
+
+# Two-letter codes after "City, " that make a location unambiguous
+_US_STATES = frozenset(
+    'AL AK AZ AR CA CO CT DE DC FL GA HI ID IL IN IA KS KY LA ME MD MA MI MN MS MO MT NE NV NH NJ NM '
+    'NY NC ND OH OK OR PA RI SC SD TN TX UT VT VA WA WV WI WY'.split()
+)
+
+
+@lru_cache(maxsize=64)
+def plan_extraction(fields: FrozenSet[str] = DEFAULT_FIELDS) -> Tuple[List[Tuple[str, str, Tuple[str, ...]]],
+                                                                      FrozenSet[str]]:
+    """
+    Extractors a run executes for a set of optional fields
+
+    Args:
+        fields: Optional fields to extract (OPTIONAL_FIELDS); core fields
+            are always part of the plan
+
+    Returns:
+        Tuple of (steps as (field, extractor method, input fields) in
+        dependency order, document views the steps read)
+
+    Raises:
+        ValueError: If fields names an unknown optional field
+    """
+
+    unknown = set(fields) - set(OPTIONAL_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown optional resume fields: {', '.join(sorted(unknown))}")
+
+    wanted = {field for field in EXTRACTORS if field not in OPTIONAL_FIELDS} | set(fields)
+    # Walk the declarations backwards so every field pulls in the fields it builds on
+    for field in reversed(list(EXTRACTORS)):
+        if field in wanted:
+            wanted.update(dep for dep in EXTRACTORS[field][1] if dep in EXTRACTORS)
+
+    steps, views = [], set()
+    for field, (method, needs) in EXTRACTORS.items():
+        if field in wanted:
+            steps.append((field, method, tuple(dep for dep in needs if dep in EXTRACTORS)))
+            views.update(dep for dep in needs if dep not in EXTRACTORS)
+    return steps, frozenset(views)
+
 
 class ResumeParser:
     """Advanced resume parser using NLP and pattern matching"""
     
-    def __init__(self):
+    def __init__(self, regex_engine: str = REGEX_ENGINE, ner_confidence: float = NER_CONFIDENCE):
+        self.ner_confidence = ner_confidence
         self.skills_keywords = self._load_skills_keywords()
         self.education_keywords = self._load_education_keywords()
         self.experience_keywords = self._load_experience_keywords()
+        self._skill_patterns = self._compile_skill_patterns()
+        self._field_patterns = self._compile_field_patterns(regex_engine)
         
     def _load_skills_keywords(self) -> List[str]:
         """Load comprehensive list of technical skills"""
@@ -83,56 +205,96 @@ class ResumeParser:
             'Coordinator', 'Administrator', 'Designer', 'Tester', 'DevOps', 'Data Scientist'
         ]
     
-    def parse_resume(self, text: str, filename: str) -> Dict[str, Any]:
-        """Parse resume text and extract structured information"""
+    def _compile_skill_patterns(self) -> List[tuple]:
+        """
+        Prepare one matcher per skill
+
+        Skills made of a single word are looked up in the document vocabulary,
+        which is equivalent to a word-boundary search; the rest keep a
+        precompiled regex.
+        """
+        patterns = []
+        for skill in self.skills_keywords:
+            skill_lower = skill.lower()
+            if re.fullmatch(r'\w+', skill_lower):
+                patterns.append((skill, skill_lower, None))
+            else:
+                patterns.append((skill, skill_lower, re.compile(r'\b' + re.escape(skill_lower) + r'\b')))
+        return patterns
+    
+    def _compile_field_patterns(self, engine: str) -> Dict[str, Any]:
+        """
+        Compile the contact, experience and education patterns with the regex engine layer
+
+        The job and education patterns nest lazy quantifiers and backtrack
+        heavily on long lines, so with re they only look at the first
+        MAX_PATTERN_LINE characters of each line (RE2 reads whole lines).
+        """
+        return {
+            'phone_in_line': compile_pattern(r'\d{3}[-.\s]?\d{3}[-.\s]?\d{4}', engine=engine),
+            # One word of a name: Capitalized, ALL CAPS, McName, O'Name, Double-Barrelled or an initial
+            'name_word': compile_pattern(
+                r"^[A-Z](?:[a-z]+(?:[A-Z][a-z]+)?|[A-Z]+)?(?:[-'][A-Z][A-Za-z]+)*\.?$", engine=engine
+            ),
+            'name_label': compile_pattern(r'^(?:full name|name|candidate)\s*:\s*', re.IGNORECASE, engine=engine),
+            'email': compile_pattern(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', engine=engine),
+            'phone': [compile_pattern(pattern, engine=engine) for pattern in (
+                r'\+?1?[-.\s]?\(?([0-9]{3})\)?[-.\s]?([0-9]{3})[-.\s]?([0-9]{4})',
+                r'\b\d{3}[-.\s]?\d{3}[-.\s]?\d{4}\b',
+                r'\(\d{3}\)\s?\d{3}[-.\s]?\d{4}'
+            )],
+            'location': [compile_pattern(pattern, engine=engine) for pattern in (
+                # Within one line; a state code is a whole word (not the "MB" of "MBA")
+                r'([A-Z][a-z]+,[ \t]*[A-Z]{2})\b',  # City, State
+                r'([A-Z][a-z]+[ \t][A-Z][a-z]+,[ \t]*[A-Z]{2})\b',  # City Name, State
+                r'([A-Z][a-z]+,[ \t]*[A-Z][a-z]+(?:[ \t][A-Z][a-z]+)?)',  # City, Country (Name)
+            )],
+            'job': compile_pattern(
+                r'([A-Z][^,\n]+?)(?:\s+at\s+|\s+@\s+|\s+-\s+)([A-Z][^,\n]+?)(?:\s+\|\s+|\s+-\s+|\n)'
+                r'([0-9]{4}(?:\s*-\s*(?:[0-9]{4}|Present|Current))?)',
+                max_line=MAX_PATTERN_LINE, engine=engine
+            ),
+            'education': compile_pattern(
+                r'((?:Bachelor|Master|PhD|Doctorate|B\.S\.|B\.A\.|M\.S\.|M\.A\.|MBA|Ph\.D\.)[^,\n]*?)'
+                r'(?:\s+(?:from|at|\|)\s+)?([A-Z][^,\n]+?)(?:\s*,?\s*(\d{4}))?',
+                re.IGNORECASE, max_line=MAX_PATTERN_LINE, engine=engine
+            ),
+        }
+    
+    def parse_resume(self, text: str, filename: str,
+                     document: Optional[AnalyzedDocument] = None,
+                     fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        Parse resume text and extract structured information
+        
+        Only the extractors of the requested fields run (see plan_extraction);
+        optional fields left out are absent from the result.
+        
+        Args:
+            text: Resume text
+            filename: Name of the source file
+            document: Optional AnalyzedDocument already built for the cleaned
+                text, shared with the matcher
+            fields: Optional fields to extract (OPTIONAL_FIELDS), DEFAULT_FIELDS if None
+        """
+        
+        steps, _ = plan_extraction(DEFAULT_FIELDS if fields is None else frozenset(fields))
         
         try:
-            # Clean and preprocess text
+            # Clean and preprocess text, tokenizing it once for every extractor
             cleaned_text = self._clean_text(text)
+            if document is None or document.text != cleaned_text:
+                document = AnalyzedDocument(cleaned_text)
             
-            # Extract basic information
-            name = self._extract_name(cleaned_text)
-            email = self._extract_email(cleaned_text)
-            phone = self._extract_phone(cleaned_text)
-            location = self._extract_location(cleaned_text)
-            
-            # Extract skills
-            skills = self._extract_skills(cleaned_text)
+            parsed = {'filename': filename}
+            for field, method, inputs in steps:
+                # Extractors read the document, or the fields they build on
+                args = [parsed[dep] for dep in inputs] if inputs else [document]
+                parsed[field] = getattr(self, method)(*args)
             
-            # Extract experience
-            experience = self._extract_experience(cleaned_text)
-            years_experience = self._calculate_years_experience(experience)
-            
-            # Extract education
-            education = self._extract_education(cleaned_text)
-            
-            # Extract additional information
-            certifications = self._extract_certifications(cleaned_text)
-            projects = self._extract_projects(cleaned_text)
-            languages = self._extract_languages(cleaned_text)
-            awards = self._extract_awards(cleaned_text)
-            
-            # Calculate readability and other metrics
-            readability_score = textstat.flesch_reading_ease(cleaned_text)
-            
-            return {
-                'filename': filename,
-                'name': name,
-                'email': email,
-                'phone': phone,
-                'location': location,
-                'skills': skills,
-                'experience': experience,
-                'years_experience': years_experience,
-                'education': education,
-                'certifications': certifications,
-                'projects': projects,
-                'languages': languages,
-                'awards': awards,
-                'readability_score': readability_score,
-                'text_length': len(cleaned_text),
-                'parsed_at': datetime.now().isoformat()
-            }
+            parsed['text_length'] = len(cleaned_text)
+            parsed['parsed_at'] = datetime.now().isoformat()
+            return parsed
             
         except Exception as e:
             logging.error(f"Error parsing resume {filename}: {str(e)}")
@@ -154,115 +316,247 @@ class ResumeParser:
             }
     
     def _clean_text(self, text: str) -> str:
-        """Clean and normalize text"""
-        # Remove extra whitespace and normalize
-        text = re.sub(r'\s+', ' ', text)
+        """Clean and normalize text, keeping the line structure sections rely on"""
+        # Collapse spaces and tabs, trim each line and keep at most one blank line
+        text = re.sub(r'[^\S\n]+', ' ', text.replace('\r\n', '\n').replace('\r', '\n'))
+        text = re.sub(r' ?\n ?', '\n', text)
+        text = re.sub(r'\n{3,}', '\n\n', text)
         text = text.strip()
         return text
     
-    def _extract_name(self, text: str) -> str:
-        """Extract candidate name using NLP and patterns"""
+    def _extract_name(self, doc: AnalyzedDocument) -> str:
+        """Extract candidate name: header heuristics first, NER only for ambiguous headers"""
         
-        # Try NLP approach first
-        if nlp:
-            doc = nlp(text[:500])  # Check first 500 characters
-            for ent in doc.ents:
-                if ent.label_ == "PERSON":
-                    return ent.text.strip()
+        name, confidence = self._name_from_header(doc)
+        if confidence >= self.ner_confidence:
+            return name or "Name not found"
         
-        # Fallback to pattern matching
-        lines = text.split('\n')[:5]  # Check first 5 lines
+        # Ambiguous header: ask NER, on the contact block of a sectioned resume
+        head = (doc.section('contact') or doc.text)[:500]  # Check first 500 characters
+        for entity, label in self._contact_entities(doc):
+            if label == "PERSON" and entity in head:
+                return entity.strip()
         
-        for line in lines:
-            line = line.strip()
-            # Skip lines with email or phone
-            if '@' in line or re.search(r'\d{3}[-.\s]?\d{3}[-.\s]?\d{4}', line):
+        return name or "Name not found"
+    
+    def _name_from_header(self, doc: AnalyzedDocument) -> Tuple[str, float]:
+        """
+        Name read from the first lines of the resume, with a confidence in [0, 1]
+        
+        A header line of two to four capitalized words (after a "Name:"
+        label, and before a "|", "," or " - " that starts a title or
+        credentials) is a candidate. Its position alone never reaches the
+        default NER_CONFIDENCE: that takes positive evidence, either the
+        email's local part spelling it or contact details on the line
+        next to it. Confidence falls when the email names someone else.
+        Without a candidate line the email's local part is used, at low
+        confidence.
+        
+        Returns:
+            Tuple of (name or '', confidence)
+        """
+        
+        local, email_tokens = self._email_name_tokens(doc)
+        
+        lines = [line.strip() for line in (doc.section('contact') or doc.text).split('\n') if line.strip()]
+        for position, line in enumerate(lines[:_HEADER_LINES]):
+            words = self._name_words(line)
+            if words is None:
                 continue
             
-            # Look for name patterns
-            name_pattern = r'^([A-Z][a-z]+ [A-Z][a-z]+(?:\s[A-Z][a-z]+)?)'
-            match = re.search(name_pattern, line)
-            if match:
-                return match.group(1)
-        
-        return "Name not found"
+            confidence = 0.4 + (0.1 if position < 2 else 0.0) - (0.1 if len(words) == 4 else 0.0)
+            if local:
+                # The email usually spells the name: trim trailing words it does not cover
+                for end in range(len(words), 1, -1):
+                    if self._email_agreement(words[:end], local, email_tokens) == 2:
+                        words, confidence = words[:end], confidence + 0.4
+                        break
+                else:
+                    agreement = self._email_agreement(words, local, email_tokens)
+                    confidence += 0.2 if agreement == 1 else -0.2
+            neighbours = lines[position + 1:position + 2] + (lines[position - 1:position] if position else [])
+            if any(self._is_contact_line(neighbour) for neighbour in neighbours):
+                confidence += 0.2
+            return ' '.join(words), round(min(1.0, max(0.0, confidence)), 2)
+        
+        # No name line: a first.last style email still spells one
+        if len(email_tokens) >= 2 and all(len(token) > 1 for token in email_tokens[:2]):
+            return ' '.join(token.capitalize() for token in email_tokens[:2]), 0.5
+        return "", 0.0
+    
+    def _name_words(self, line: str) -> Optional[List[str]]:
+        """Words of a header line that reads as a name, title-cased, or None"""
+        
+        if len(line) > _MAX_NAME_LINE or '@' in line or self._field_patterns['phone_in_line'].search(line):
+            return None
+        label = self._field_patterns['name_label'].search(line)
+        if label:
+            line = line[label.end():]
+        # Cut off a title, credentials or contact details following the name
+        for separator in ('|', ',', ' - ', ' – ', ' — ', '•', '·'):
+            line = line.split(separator)[0]
+        
+        words = line.split()
+        if not 2 <= len(words) <= 4:
+            return None
+        for i, word in enumerate(words):
+            initial = len(word.rstrip('.')) == 1
+            if (not self._field_patterns['name_word'].search(word)
+                    or word.rstrip('.').lower() in _NOT_NAME_WORDS
+                    or (initial and i in (0, len(words) - 1))
+                    or (word in _US_STATES and i > 0)):
+                return None
+        return [word.title() if word.isupper() and len(word) > 1 else word for word in words]
+    
+    def _is_contact_line(self, line: str) -> bool:
+        """Whether a line holds an email, phone number, profile link or City, ST location"""
+        
+        lower = line.lower()
+        return ('@' in line or 'linkedin.' in lower or 'github.' in lower
+                or any(pattern.search(line) for pattern in self._field_patterns['phone'])
+                or any(match.group(1).split(',', 1)[1].strip() in _US_STATES
+                       for match in (pattern.search(line) for pattern in self._field_patterns['location'][:2])
+                       if match))
+    
+    def _email_name_tokens(self, doc: AnalyzedDocument) -> Tuple[str, List[str]]:
+        """Lowercased letters of the email's local part and its words (split on . _ - and digits)"""
+        
+        if '@' not in doc.text:
+            return "", []
+        match = self._field_patterns['email'].search(doc.text)
+        if not match:
+            return "", []
+        local = match.group().split('@')[0].lower()
+        tokens = [token for token in re.split(r'[^a-z]+', local) if token]
+        return ''.join(tokens), tokens
+    
+    def _email_agreement(self, words: List[str], local: str, email_tokens: List[str]) -> int:
+        """
+        How well an email local part spells a name
+        
+        Returns:
+            2 if it holds every name word (or their concatenation), 1 if it
+            holds the last name (e.g. jsmith), 0 otherwise
+        """
+        
+        names = [re.sub(r'[^a-z]', '', word.lower()) for word in words if len(word.rstrip('.')) > 1]
+        if len(names) < 2:
+            return 0
+        if all(name in email_tokens for name in names) or local in (''.join(names), ''.join(reversed(names))):
+            return 2
+        if names[-1] in email_tokens or names[-1] in local:
+            return 1
+        return 0
+    
+    def _contact_entities(self, doc: AnalyzedDocument) -> List[Tuple[str, str]]:
+        """Named entities of the contact block, recognised once per document for name and location"""
+        return doc.derived('entities', lambda d: named_entities((d.section('contact') or d.text)[:_ENTITY_WINDOW]))
     
-    def _extract_email(self, text: str) -> str:
+    def _extract_email(self, doc: AnalyzedDocument) -> str:
         """Extract email address"""
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        matches = re.findall(email_pattern, text)
-        return matches[0] if matches else ""
+        if '@' not in doc.text:
+            return ""
+        match = self._field_patterns['email'].search(doc.text)
+        return match.group() if match else ""
     
-    def _extract_phone(self, text: str) -> str:
+    def _extract_phone(self, doc: AnalyzedDocument) -> str:
         """Extract phone number"""
-        phone_patterns = [
-            r'\+?1?[-.\s]?$$?([0-9]{3})$$?[-.\s]?([0-9]{3})[-.\s]?([0-9]{4})',
-            r'\b\d{3}[-.\s]?\d{3}[-.\s]?\d{4}\b',
-            r'$$\d{3}$$\s?\d{3}[-.\s]?\d{4}'
-        ]
+        text = doc.text
         
-        for pattern in phone_patterns:
-            matches = re.findall(pattern, text)
-            if matches:
-                if isinstance(matches[0], tuple):
-                    return f"({matches[0][0]}) {matches[0][1]}-{matches[0][2]}"
+        for pattern in self._field_patterns['phone']:
+            # The first match is all that is used, so stop the scan there
+            match = pattern.search(text)
+            if match:
+                if match.groups():
+                    return f"({match.group(1)}) {match.group(2)}-{match.group(3)}"
                 else:
-                    return matches[0]
+                    return match.group()
         
         return ""
     
-    def _extract_location(self, text: str) -> str:
-        """Extract location information"""
-        
-        # Common location patterns
-        location_patterns = [
-            r'([A-Z][a-z]+,\s*[A-Z]{2})',  # City, State
-            r'([A-Z][a-z]+\s[A-Z][a-z]+,\s*[A-Z]{2})',  # City Name, State
-            r'([A-Z][a-z]+,\s*[A-Z][a-z]+)',  # City, Country
-        ]
+    def _extract_location(self, doc: AnalyzedDocument) -> str:
+        """Extract location: City, State patterns first, NER only when they are ambiguous"""
         
-        for pattern in location_patterns:
-            matches = re.findall(pattern, text)
-            if matches:
-                return matches[0]
+        location, confidence = self._location_from_patterns(doc)
+        if confidence >= self.ner_confidence:
+            return location
         
-        # Try NLP approach
-        if nlp:
-            doc = nlp(text[:1000])
-            locations = [ent.text for ent in doc.ents if ent.label_ in ["GPE", "LOC"]]
-            if locations:
-                return locations[0]
+        # Try NLP approach, on the contact block of a sectioned resume
+        locations = [entity for entity, label in self._contact_entities(doc) if label in ["GPE", "LOC"]]
+        if locations:
+            return locations[0]
         
-        return ""
+        return location
     
-    def _extract_skills(self, text: str) -> List[str]:
+    def _location_from_patterns(self, doc: AnalyzedDocument) -> Tuple[str, float]:
+        """
+        Location from the City, State / City, Country patterns, with a confidence in [0, 1]
+        
+        The header (the start of the contact block) is searched before the
+        whole text, and City, State before City, Country. Of matches ending
+        at the same place the longest wins ("San Francisco, CA", not
+        "Francisco, CA") unless a word runs into it, as in "Jane Doe
+        Austin, TX", which stays ambiguous. Only a US state code after the
+        comma is trusted: "City, Country" also matches lists such as
+        "Python, Django", so it is only looked for in the header, and
+        outside the header the two letters must be a US state.
+        
+        Returns:
+            Tuple of (location or '', confidence)
+        """
+        
+        header = (doc.section('contact') or doc.text)[:_ENTITY_WINDOW]
+        city_state, city_country = self._field_patterns['location'][:2], self._field_patterns['location'][2:]
+        
+        for scope, in_header in ((header, True), (doc.text, False)):
+            for patterns in ((city_state, city_country) if in_header else (city_state,)):
+                matches = [match for match in (pattern.search(scope) for pattern in patterns) if match]
+                if not in_header:
+                    # Outside the header "Flask, CI/CD" looks like a City, State too
+                    matches = [m for m in matches if m.group(1).split(',', 1)[1].strip() in _US_STATES]
+                if not matches:
+                    continue
+                matches.sort(key=lambda m: (m.end(1), -len(m.group(1))))
+                match, ambiguous = matches[0], False
+                preceding = scope[:match.start(1)].rstrip(' \t')
+                shorter = [m for m in matches[1:] if m.end(1) == match.end(1)]
+                if shorter and preceding and preceding[-1].isalpha():
+                    match, ambiguous = shorter[0], True
+                
+                location = match.group(1)
+                if location.split(',', 1)[1].strip() in _US_STATES:
+                    confidence = 0.9 if in_header else 0.6
+                else:
+                    confidence = 0.5 if in_header else 0.3
+                return location, confidence - (0.3 if ambiguous else 0.0)
+        
+        return "", 0.0
+    
+    def _extract_skills(self, doc: AnalyzedDocument) -> List[str]:
         """Extract technical skills"""
         found_skills = []
-        text_lower = text.lower()
         
-        for skill in self.skills_keywords:
-            # Use word boundaries for exact matches
-            pattern = r'\b' + re.escape(skill.lower()) + r'\b'
-            if re.search(pattern, text_lower):
+        for skill, skill_lower, pattern in self._skill_patterns:
+            # Word-boundary matches: vocabulary lookup for single words, regex otherwise
+            if pattern is None:
+                if skill_lower in doc.vocabulary:
+                    found_skills.append(skill)
+            elif skill_lower in doc.lower and pattern.search(doc.lower):
                 found_skills.append(skill)
         
         # Remove duplicates and sort
         return sorted(list(set(found_skills)))
     
-    def _extract_experience(self, text: str) -> List[Dict[str, str]]:
+    def _extract_experience(self, doc: AnalyzedDocument) -> List[Dict[str, str]]:
         """Extract work experience"""
         experience = []
         
-        # Split text into sections
-        sections = re.split(r'\n(?=\s*(?:EXPERIENCE|WORK|EMPLOYMENT|PROFESSIONAL))', text, flags=re.IGNORECASE)
+        # Only the experience section holds job entries
+        exp_section = doc.section('experience')
         
-        if len(sections) > 1:
-            exp_section = sections[1]
-            
+        if exp_section:
             # Extract job entries
-            job_pattern = r'([A-Z][^,\n]+?)(?:\s+at\s+|\s+@\s+|\s+-\s+)([A-Z][^,\n]+?)(?:\s+\|\s+|\s+-\s+|\n)([0-9]{4}(?:\s*-\s*(?:[0-9]{4}|Present|Current))?)'
-            
-            matches = re.findall(job_pattern, exp_section)
+            matches = self._field_patterns['job'].findall(exp_section)
             
             for match in matches:
                 experience.append({
@@ -294,14 +588,13 @@ class ResumeParser:
         
         return total_years
     
-    def _extract_education(self, text: str) -> List[Dict[str, str]]:
+    def _extract_education(self, doc: AnalyzedDocument) -> List[Dict[str, str]]:
         """Extract education information"""
         education = []
         
-        # Education patterns
-        edu_pattern = r'((?:Bachelor|Master|PhD|Doctorate|B\.S\.|B\.A\.|M\.S\.|M\.A\.|MBA|Ph\.D\.)[^,\n]*?)(?:\s+(?:from|at|\|)\s+)?([A-Z][^,\n]+?)(?:\s*,?\s*(\d{4}))?'
-        
-        matches = re.findall(edu_pattern, text, re.IGNORECASE)
+        # Scan the education section, or the whole text of a resume without one
+        edu_section = doc.section('education')
+        matches = self._field_patterns['education'].findall(doc.text if edu_section is None else edu_section)
         
         for match in matches:
             education.append({
@@ -312,7 +605,7 @@ class ResumeParser:
         
         return education
     
-    def _extract_certifications(self, text: str) -> List[str]:
+    def _extract_certifications(self, doc: AnalyzedDocument) -> List[str]:
         """Extract certifications"""
         cert_keywords = [
             'AWS Certified', 'Microsoft Certified', 'Google Cloud', 'Cisco', 'CompTIA',
@@ -320,25 +613,21 @@ class ResumeParser:
         ]
         
         certifications = []
-        text_lower = text.lower()
         
         for cert in cert_keywords:
-            if cert.lower() in text_lower:
+            if cert.lower() in doc.lower:
                 certifications.append(cert)
         
         return certifications
     
-    def _extract_projects(self, text: str) -> List[Dict[str, str]]:
+    def _extract_projects(self, doc: AnalyzedDocument) -> List[Dict[str, str]]:
         """Extract project information"""
         projects = []
         
         # Look for project sections
-        project_section_pattern = r'(?:PROJECTS?|PORTFOLIO)[\s\S]*?(?=\n[A-Z]{2,}|\Z)'
-        project_match = re.search(project_section_pattern, text, re.IGNORECASE)
+        project_text = doc.section('projects')
         
-        if project_match:
-            project_text = project_match.group()
-            
+        if project_text:
             # Extract individual projects
             project_lines = project_text.split('\n')
             current_project = None
@@ -353,10 +642,13 @@ class ResumeParser:
                 elif current_project:
                     projects.append(current_project)
                     current_project = None
+            
+            if current_project:
+                projects.append(current_project)
         
         return projects
     
-    def _extract_languages(self, text: str) -> List[str]:
+    def _extract_languages(self, doc: AnalyzedDocument) -> List[str]:
         """Extract programming and spoken languages"""
         languages = []
         
@@ -367,14 +659,13 @@ class ResumeParser:
             'Chinese', 'Japanese', 'Korean', 'Arabic', 'Hindi', 'Russian'
         ]
         
-        text_lower = text.lower()
         for lang in spoken_languages:
-            if lang.lower() in text_lower:
+            if lang.lower() in doc.lower:
                 languages.append(lang)
         
         return languages
     
-    def _extract_awards(self, text: str) -> List[str]:
+    def _extract_awards(self, doc: AnalyzedDocument) -> List[str]:
         """Extract awards and achievements"""
         awards = []
         
@@ -383,7 +674,10 @@ class ResumeParser:
             'excellence', 'outstanding', 'top performer', 'employee of'
         ]
         
-        lines = text.split('\n')
+        # Lines of the awards section, or of the whole text of a resume without one
+        awards_section = doc.section('awards')
+        lines = doc.lines if awards_section is None else awards_section.split('\n')
+        
         for line in lines:
             line_lower = line.lower()
             for keyword in award_keywords:
@@ -392,3 +686,21 @@ class ResumeParser:
                     break
         
         return list(set(awards))  # Remove duplicates
+    
+    def _extract_publications(self, doc: AnalyzedDocument) -> List[str]:
+        """Extract publications, one per line of the publications section"""
+        
+        section = doc.section('publications')
+        if not section:
+            return []
+        
+        publications = []
+        for line in section.split('\n'):
+            line = line.strip().lstrip('•-*· ').strip()
+            if len(line) > 10:
+                publications.append(line)
+        return publications
+    
+    def _readability_score(self, doc: AnalyzedDocument) -> float:
+        """Flesch Reading Ease of the resume"""
+        return doc.flesch_reading_ease
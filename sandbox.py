@@ -0,0 +1,310 @@
+"""Per-file sandbox for resume extraction and parsing.
+
+Each file is extracted and parsed in a long-lived worker process with a
+wall-clock deadline and an address-space cap. A worker that hangs past
+its deadline is killed; one that dies or runs out of memory is replaced.
+Either way the file is reported as quarantined with the stage it had
+reached, and the other workers keep going. A worker that fails before it
+has accepted the file (for instance one that cannot start) is a problem
+of the pool, not of the file: that file gets an ordinary error instead.
+"""
+
+import os
+import sys
+import time
+import logging
+import threading
+import multiprocessing
+from multiprocessing.connection import wait
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Tuple
+from utils import merge_extraction_stats
+
+try:
+    import resource
+except ImportError:
+    # Fallback on platforms without setrlimit: only the time limit applies
+    resource = None
+
+# Wall-clock seconds allowed per file (override with RESUME_ANALYZER_FILE_TIMEOUT)
+FILE_TIMEOUT = float(os.environ.get('RESUME_ANALYZER_FILE_TIMEOUT', 60))
+
+# Memory a worker may allocate per file on top of its loaded baseline, in MB
+FILE_MEMORY_MB = int(os.environ.get('RESUME_ANALYZER_FILE_MEMORY_MB', 1024))
+
+# Worker processes per batch (override with RESUME_ANALYZER_SANDBOX_WORKERS)
+SANDBOX_WORKERS = int(os.environ.get('RESUME_ANALYZER_SANDBOX_WORKERS', min(4, os.cpu_count() or 2)))
+
+# Seconds a new worker may take to load its models before its first file times out
+WORKER_START_TIMEOUT = 120.0
+
+# Stages a file goes through in a worker, in order
+SANDBOX_STAGES = ('queued', 'extract', 'parse')
+
+# Exit code of a worker that ran out of memory
+_EXIT_MEMORY = 3
+
+# Forkserver children fork from a clean process instead of the threaded app;
+# other platforms spawn fresh interpreters
+_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+_WARM_UP_TEXT = "Jane Doe\nSoftware Engineer in Springfield, IL\nSkills: Python, SQL\n"
+
+
+def _limit_memory(memory_mb: int) -> None:
+    """Cap this process's address space at its current size plus memory_mb"""
+
+    if resource is None or not memory_mb or not sys.platform.startswith('linux'):
+        return
+    with open('/proc/self/statm') as statm:
+        baseline = int(statm.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    limit = baseline + memory_mb * 1024 * 1024
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+def _worker_main(conn, memory_mb: int) -> None:
+    """Worker loop: extract and parse files sent over conn, reporting each stage"""
+
+    from resume_parser import ResumeParser
+    from utils import extract_text_from_file, get_extraction_stats, reset_extraction_stats
+    from document import AnalyzedDocument
+
+    # Load models before the cap so it only bounds per-file work
+    parser = ResumeParser()
+    parser.parse_resume(_WARM_UP_TEXT, 'warm-up.txt')
+    _limit_memory(memory_mb)
+    reset_extraction_stats()
+
+    while True:
+        try:
+            task = conn.recv()
+        except (EOFError, OSError):
+            return
+        except MemoryError:
+            sys.exit(_EXIT_MEMORY)
+        if task is None:
+            return
+
+        filename, file_content, ocr, fields = task
+        try:
+            conn.send(('stage', 'extract'))
+            text = extract_text_from_file(file_content, filename, ocr=ocr)
+            conn.send(('stage', 'parse'))
+            parsed = parser.parse_resume(text, filename, document=AnalyzedDocument(text), fields=fields)
+            conn.send(('done', text, parsed, get_extraction_stats()))
+        except MemoryError:
+            # The heap may be exhausted or fragmented: exit so the pool replaces this worker
+            sys.exit(_EXIT_MEMORY)
+        except Exception as e:
+            conn.send(('error', str(e), get_extraction_stats()))
+        reset_extraction_stats()
+
+
+class _Worker:
+    """One sandbox process and the file it is working on"""
+
+    def __init__(self, context, memory_mb: int):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, memory_mb),
+                                       name='resume-sandbox', daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.index: Optional[int] = None
+        self.deadline = 0.0
+        self.stage = 'queued'
+        self.started = 0.0
+        self.ready = False
+
+    def start(self, index: int, filename: str, file_content: bytes, ocr: bool,
+              fields: Optional[List[str]], timeout: float) -> None:
+        self.index = index
+        self.stage = 'queued'
+        self.started = time.monotonic()
+        self.deadline = self.started + timeout + (0.0 if self.ready else WORKER_START_TIMEOUT)
+        self.conn.send((filename, file_content, ocr, fields))
+
+    def failure(self, memory_mb: int) -> Tuple[Optional[str], str]:
+        """Quarantine reason (None if the file was never accepted) and message for a worker that stopped"""
+        self.process.join(timeout=1)
+        if self.process.exitcode == _EXIT_MEMORY:
+            return 'memory', f"Exceeded the {memory_mb} MB memory limit"
+        if self.stage == 'queued':
+            state = 'exited before accepting the file' if self.ready else 'failed to start'
+            return None, f"Sandbox worker {state} (exit code {self.process.exitcode})"
+        return 'crashed', f"Worker exited with code {self.process.exitcode}"
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+
+def _failure_result(reason: Optional[str], stage: str, error: str, elapsed: float) -> Dict[str, Any]:
+    """Result of a file whose worker stopped: quarantined unless the worker never accepted it"""
+
+    if reason is None:
+        logging.error(f"Sandbox pool error: {error}")
+        return {'error': error, 'elapsed': elapsed}
+    return {'quarantine_reason': reason, 'quarantine_stage': stage, 'error': error, 'elapsed': elapsed}
+
+
+class SandboxPool:
+    """
+    Run extraction and parsing of each file in isolated worker processes
+
+    Workers are started once, load the parser (and spaCy) once and are
+    reused across batches; only a worker that was killed or crashed is
+    replaced. Up to `workers` files of a batch run at the same time and
+    results are handed back in file order.
+    """
+
+    def __init__(self, workers: int = SANDBOX_WORKERS, timeout: float = FILE_TIMEOUT,
+                 memory_mb: int = FILE_MEMORY_MB):
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self._context = multiprocessing.get_context(_START_METHOD)
+        if _START_METHOD == 'forkserver':
+            self._context.set_forkserver_preload(['resume_parser', 'utils', 'document'])
+        self._idle: List[_Worker] = []
+        self._lock = threading.Lock()
+
+    def _checkout(self) -> _Worker:
+        with self._lock:
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.process.is_alive():
+                    return worker
+                worker.kill()
+        return _Worker(self._context, self.memory_mb)
+
+    def _checkin(self, worker: _Worker) -> None:
+        worker.index = None
+        with self._lock:
+            self._idle.append(worker)
+
+    def run(self, files: Iterable[Tuple[str, bytes]], ocr: bool = False,
+            fields: Optional[Iterable[str]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Extract and parse files in the sandbox
+
+        Args:
+            files: (filename, file content) pairs
+            ocr: OCR PDF pages without a text layer
+            fields: Optional resume fields to extract, the parser's defaults if None
+
+        Yields:
+            One dictionary per file, in order, with 'text' and 'parsed' on
+            success, 'error' for an ordinary failure or a worker that failed
+            before accepting the file, or 'quarantine_reason' ('timeout',
+            'memory' or 'crashed'), 'quarantine_stage' and 'error'.
+            Each also has 'elapsed' seconds. Closing the iterator early
+            kills the workers still busy with its files.
+        """
+
+        files = list(files)
+        fields = None if fields is None else sorted(fields)
+        done: Dict[int, Dict[str, Any]] = {}
+        busy: Dict[Any, _Worker] = {}
+        next_file = next_result = 0
+
+        try:
+            while next_result < len(files):
+                # Keep every worker busy, without running too far ahead of the consumer
+                while (next_file < len(files) and len(busy) < self.workers
+                       and next_file - next_result < 2 * self.workers):
+                    worker = self._checkout()
+                    filename, file_content = files[next_file]
+                    try:
+                        worker.start(next_file, filename, file_content, ocr, fields, self.timeout)
+                    except (OSError, ValueError):
+                        # The worker died while receiving the file
+                        reason, error = worker.failure(self.memory_mb)
+                        worker.kill()
+                        done[next_file] = _failure_result(reason, 'queued', error, 0.0)
+                    else:
+                        busy[worker.conn] = worker
+                    next_file += 1
+
+                if next_result in done:
+                    yield done.pop(next_result)
+                    next_result += 1
+                    continue
+
+                wait_for = max(0.0, min(worker.deadline for worker in busy.values()) - time.monotonic())
+                for conn in wait(list(busy), timeout=wait_for):
+                    worker = busy[conn]
+                    try:
+                        message = conn.recv()
+                    except (EOFError, OSError):
+                        message = worker.failure(self.memory_mb)
+                    else:
+                        # Loaded and has accepted a file
+                        worker.ready = True
+
+                    if message[0] == 'stage':
+                        # The clock starts when the worker picks the file up, not while it loads
+                        if worker.stage == 'queued':
+                            worker.started = time.monotonic()
+                            worker.deadline = worker.started + self.timeout
+                        worker.stage = message[1]
+                        continue
+
+                    elapsed = time.monotonic() - worker.started
+                    del busy[conn]
+                    if message[0] == 'done':
+                        done[worker.index] = {'text': message[1], 'parsed': message[2], 'elapsed': elapsed}
+                        merge_extraction_stats(message[3])
+                        self._checkin(worker)
+                    elif message[0] == 'error':
+                        done[worker.index] = {'error': message[1], 'elapsed': elapsed}
+                        merge_extraction_stats(message[2])
+                        self._checkin(worker)
+                    else:
+                        done[worker.index] = _failure_result(message[0], worker.stage, message[1], elapsed)
+                        worker.kill()
+
+                now = time.monotonic()
+                for conn, worker in list(busy.items()):
+                    if now >= worker.deadline:
+                        del busy[conn]
+                        if worker.stage == 'queued':
+                            reason, error = None, "Sandbox worker did not pick up the file in time"
+                        else:
+                            reason, error = 'timeout', f"Exceeded the {self.timeout:g}s time limit"
+                        done[worker.index] = _failure_result(reason, worker.stage, error, now - worker.started)
+                        worker.kill()
+        finally:
+            for worker in busy.values():
+                worker.kill()
+
+    def close(self) -> None:
+        """Stop idle workers"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            try:
+                worker.conn.send(None)
+            except OSError:
+                pass
+            worker.process.join(timeout=5)
+            if worker.process.is_alive():
+                worker.kill()
+
+
+_pool: Optional[SandboxPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_sandbox_pool() -> SandboxPool:
+    """Process-wide sandbox pool with the configured limits"""
+
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SandboxPool()
+            logging.info(f"Sandbox pool: {_pool.workers} workers, {FILE_TIMEOUT:g}s and "
+                         f"{FILE_MEMORY_MB} MB per file")
+        return _pool
@@ -0,0 +1,100 @@
+"""
+Resume section segmentation
+
+A resume is split once into labelled spans by recognising its section
+headings (a line such as "WORK EXPERIENCE", "Education:" or "Skills: Python,
+SQL"). Extractors then scan only the section they need instead of the
+whole document.
+"""
+
+import re
+from typing import Dict, List, Tuple
+
+# Recognised headings per section label (lowercase, 'and' also matches '&');
+# 'other' headings only end the section before them
+SECTION_HEADINGS: Dict[str, Tuple[str, ...]] = {
+    'contact': ('contact', 'contact information', 'contact details', 'personal information',
+                'personal details'),
+    'summary': ('summary', 'professional summary', 'career summary', 'executive summary', 'profile',
+                'professional profile', 'objective', 'career objective', 'about me'),
+    'experience': ('experience', 'work experience', 'professional experience', 'relevant experience',
+                   'employment', 'employment history', 'work history', 'career history',
+                   'professional background'),
+    'education': ('education', 'academic background', 'academic qualifications', 'academics',
+                  'education and training', 'educational background'),
+    'projects': ('projects', 'project', 'personal projects', 'key projects', 'selected projects',
+                 'academic projects', 'portfolio'),
+    'skills': ('skills', 'technical skills', 'key skills', 'core skills', 'core competencies',
+               'competencies', 'skills and tools', 'technologies', 'technical expertise'),
+    'awards': ('awards', 'honors', 'honours', 'achievements', 'accomplishments', 'awards and honors',
+               'honors and awards', 'awards and achievements', 'recognition'),
+    'publications': ('publications', 'selected publications', 'papers', 'research publications'),
+    'other': ('certifications', 'certificates', 'licenses and certifications', 'languages',
+              'interests', 'hobbies', 'references', 'volunteer experience', 'volunteering',
+              'activities', 'courses', 'training'),
+}
+
+_LABEL_OF_HEADING = {heading: label for label, headings in SECTION_HEADINGS.items() for heading in headings}
+
+
+def _heading_pattern(heading: str) -> str:
+    return r'[ \t]+'.join(r'(?:and|&)' if word == 'and' else re.escape(word) for word in heading.split())
+
+
+# A heading line: optional bullet or '#' marks, a known heading, then the end of
+# the line or a colon followed by the section's first content
+_HEADING = re.compile(
+    r'[ \t]*[^\w\s]{0,3}[ \t]*(?P<heading>'
+    + '|'.join(_heading_pattern(h) for h in sorted(_LABEL_OF_HEADING, key=len, reverse=True))
+    + r')[ \t]*(?::[ \t]*(?P<inline>.*))?',
+    re.IGNORECASE
+)
+
+# Lines longer than this are only tested when a colon could end a heading within it
+_MAX_HEADING_LINE = max(len(heading) for heading in _LABEL_OF_HEADING) + 10
+
+
+def _label(heading: str) -> str:
+    return _LABEL_OF_HEADING[' '.join(heading.lower().replace('&', ' and ').split())]
+
+
+def segment_sections(text: str) -> List[Tuple[str, int, int]]:
+    """
+    Split resume text into labelled sections in a single pass over its lines
+
+    Text before the first heading is labelled 'contact'. Headings
+    themselves are not part of any span, except for content after a
+    colon on the heading line.
+
+    Args:
+        text: Resume text with its line structure
+
+    Returns:
+        (label, start, end) character spans of non-empty sections, in
+        document order; empty if the text has no recognised heading
+    """
+
+    spans = []
+    label, start = 'contact', 0
+    found = False
+    offset = 0
+
+    for line in text.split('\n'):
+        line_start = offset
+        offset += len(line) + 1
+        # Body lines are long and rarely have a colon near the start: skip the regex
+        if len(line) > _MAX_HEADING_LINE and ':' not in line[:_MAX_HEADING_LINE]:
+            continue
+        match = _HEADING.fullmatch(line)
+        if match is None:
+            continue
+
+        found = True
+        if text[start:line_start].strip():
+            spans.append((label, start, line_start))
+        label = _label(match.group('heading'))
+        start = line_start + (match.start('inline') if match.group('inline') else len(line))
+
+    if found and text[start:].strip():
+        spans.append((label, start, len(text)))
+    return spans
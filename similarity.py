@@ -0,0 +1,325 @@
+import logging
+import threading
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+import numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.random_projection import SparseRandomProjection
+from sklearn.preprocessing import normalize
+
+# Dimension of lexical candidate vectors
+VECTOR_DIM = 128
+
+# Below this many vectors search is exact; the coarse quantizer is trained once it is reached
+TRAIN_THRESHOLD = 4096
+
+# Inverted lists scanned per query
+DEFAULT_NPROBE = 12
+
+# Coarse quantizer training: k-means iterations and sample vectors per list
+KMEANS_ITERATIONS = 12
+KMEANS_SAMPLE_PER_LIST = 48
+
+
+class TextVectorizer:
+    """
+    Stateless lexical vectorizer for candidate similarity
+
+    Hashed, sublinear term frequencies are projected to VECTOR_DIM dimensions
+    with a fixed sparse random projection and normalized to unit length.
+    Nothing is fitted on the corpus, so vectors stay comparable as
+    candidates are added over time.
+    """
+
+    kind = f'hashed-tf-{VECTOR_DIM}'
+
+    def __init__(self):
+        self.hasher = HashingVectorizer(
+            n_features=2 ** 18,
+            stop_words='english',
+            alternate_sign=False,
+            norm=None,
+            lowercase=True
+        )
+        self.projection = SparseRandomProjection(n_components=VECTOR_DIM, dense_output=True,
+                                                 random_state=0)
+        self.projection.fit(csr_matrix((1, self.hasher.n_features)))
+
+    def transform(self, texts: Sequence[str]) -> np.ndarray:
+        """Unit vectors of shape (len(texts), VECTOR_DIM)"""
+
+        counts = self.hasher.transform(texts)
+        counts.data = np.log1p(counts.data)
+        return normalize(self.projection.transform(normalize(counts))).astype(np.float32)
+
+
+class IVFIndex:
+    """
+    Approximate nearest-neighbour index for unit vectors (inverted file)
+
+    Vectors are assigned to the nearest centroid of a spherical k-means
+    coarse quantizer; a query scans only the nprobe lists whose centroids
+    are closest to it. Small indexes are searched exactly. The quantizer is
+    retrained when the index has grown fourfold since the last training.
+    """
+
+    def __init__(self, dim: int, train_threshold: int = TRAIN_THRESHOLD):
+        self.dim = dim
+        self.train_threshold = train_threshold
+        self.centroids: Optional[np.ndarray] = None
+        self._ids = np.empty(0, dtype=np.int64)
+        self._vectors = np.empty((0, dim), dtype=np.float32)
+        self._assignments = np.empty(0, dtype=np.int32)
+        self._size = 0
+        self._rows: Dict[int, int] = {}
+        self._trained_size = 0
+        self._lists: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _reserve(self, extra: int) -> None:
+        """Grow the backing arrays geometrically"""
+
+        needed = self._size + extra
+        if needed <= len(self._ids):
+            return
+        capacity = max(needed, 2 * len(self._ids), 1024)
+        for name in ('_ids', '_vectors', '_assignments'):
+            current = getattr(self, name)
+            grown = np.zeros((capacity,) + current.shape[1:], dtype=current.dtype)
+            grown[:self._size] = current[:self._size]
+            setattr(self, name, grown)
+
+    def add(self, ids: Sequence[int], vectors: np.ndarray) -> bool:
+        """
+        Add unit vectors under candidate ids
+
+        Returns:
+            True if the coarse quantizer was (re)trained
+        """
+
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        if not len(vectors):
+            return False
+
+        self._reserve(len(vectors))
+        start, end = self._size, self._size + len(vectors)
+        self._ids[start:end] = ids
+        self._vectors[start:end] = vectors
+        if self.centroids is not None:
+            self._assignments[start:end] = self._assign(vectors)
+        for row, candidate_id in enumerate(ids, start):
+            self._rows[int(candidate_id)] = row
+        self._size = end
+        self._lists = None
+
+        if self._size >= self.train_threshold and (
+                self.centroids is None or self._size >= 4 * self._trained_size):
+            self.train()
+            return True
+        return False
+
+    def set_centroids(self, centroids: np.ndarray, trained_size: Optional[int] = None) -> None:
+        """
+        Use previously trained centroids and assign every vector to them
+
+        Args:
+            centroids: Array of shape (nlist, dim)
+            trained_size: Index size the centroids count as trained at, for
+                the retraining rule (the current size by default)
+        """
+
+        self.centroids = np.asarray(centroids, dtype=np.float32).reshape(-1, self.dim)
+        self._assignments[:self._size] = self._assign(self._vectors[:self._size])
+        self._trained_size = self._size if trained_size is None else trained_size
+        self._lists = None
+
+    def train(self, seed: int = 0) -> np.ndarray:
+        """Train the coarse quantizer with spherical k-means on a sample"""
+
+        vectors = self._vectors[:self._size]
+        rng = np.random.default_rng(seed)
+        nlist = max(8, int(np.sqrt(self._size)))
+        sample_size = min(self._size, nlist * KMEANS_SAMPLE_PER_LIST)
+        sample = vectors[rng.choice(self._size, sample_size, replace=False)]
+
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+        for _ in range(KMEANS_ITERATIONS):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            norms = np.linalg.norm(sums, axis=1)
+
+            # Reseed empty lists from random sample vectors
+            empty = norms == 0
+            sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+            norms[empty] = 1.0
+            centroids = (sums / norms[:, np.newaxis]).astype(np.float32)
+
+        self.set_centroids(centroids)
+        return self.centroids
+
+    def _assign(self, vectors: np.ndarray, chunk: int = 65536) -> np.ndarray:
+        """Nearest centroid of each vector, computed in chunks to bound memory"""
+        return np.concatenate([
+            np.argmax(vectors[i:i + chunk] @ self.centroids.T, axis=1).astype(np.int32)
+            for i in range(0, len(vectors), chunk)
+        ]) if len(vectors) else np.empty(0, dtype=np.int32)
+
+    def _inverted_lists(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows grouped by list (as one sorted array) and each list's offsets"""
+
+        if self._lists is None:
+            assignments = self._assignments[:self._size]
+            order = np.argsort(assignments, kind='stable')
+            offsets = np.searchsorted(assignments[order], np.arange(len(self.centroids) + 1))
+            self._lists = (order, offsets)
+        return self._lists
+
+    def vector(self, candidate_id: int) -> Optional[np.ndarray]:
+        """Stored vector of a candidate"""
+        row = self._rows.get(int(candidate_id))
+        return self._vectors[row] if row is not None else None
+
+    def search(self, query: np.ndarray, k: int = 10, nprobe: int = DEFAULT_NPROBE,
+               exclude: Sequence[int] = ()) -> List[Tuple[int, float]]:
+        """
+        Find the vectors most similar to query
+
+        Args:
+            query: Unit query vector
+            k: Number of results
+            nprobe: Inverted lists to scan (ignored while search is exact)
+            exclude: Candidate ids to leave out
+
+        Returns:
+            List of (candidate id, cosine similarity), most similar first
+        """
+
+        if not self._size:
+            return []
+
+        query = np.asarray(query, dtype=np.float32)
+        if self.centroids is None:
+            rows = np.arange(self._size)
+        else:
+            order, offsets = self._inverted_lists()
+            nprobe = min(nprobe, len(self.centroids))
+            probes = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+            rows = np.concatenate([order[offsets[p]:offsets[p + 1]] for p in probes])
+
+        if len(exclude):
+            rows = rows[~np.isin(self._ids[rows], np.asarray(exclude, dtype=np.int64))]
+        if not len(rows):
+            return []
+
+        scores = self._vectors[rows] @ query
+        top = min(k, len(rows))
+        best = np.argpartition(-scores, top - 1)[:top]
+        best = best[np.argsort(-scores[best])]
+        return [(int(self._ids[rows[i]]), float(scores[i])) for i in best]
+
+
+class SimilarCandidates:
+    """
+    "Find similar candidates" over every stored candidate
+
+    Candidate vectors (sentence embeddings when an engine is available,
+    otherwise TextVectorizer vectors) are stored with the candidates and
+    indexed in an IVFIndex that is updated as batches are added.
+    """
+
+    def __init__(self, store, engine=None):
+        self.store = store
+        self.engine = engine
+        self.vectorizer = None if engine else TextVectorizer()
+        self.kind = engine.model_name if engine else TextVectorizer.kind
+        self._lock = threading.RLock()
+        self.reload()
+
+    def reload(self) -> None:
+        """Rebuild the in-memory index from the store"""
+
+        with self._lock:
+            ids, vectors = self.store.candidate_vectors(self.kind)
+            dim = vectors.shape[1] if len(vectors) else (self.engine.dimension if self.engine else VECTOR_DIM)
+            self.index = IVFIndex(dim)
+
+            # Stored centroids go in first, so adding the vectors only assigns them
+            centroids = self.store.ann_centroids(self.kind)
+            stored = centroids is not None and len(ids) and centroids.size % dim == 0
+            if stored:
+                self.index.set_centroids(centroids, trained_size=len(ids))
+            self.index.add(ids, vectors)
+            if not stored and self.index.centroids is not None:
+                self.store.save_ann_centroids(self.kind, self.index.centroids)
+
+    def vectorize(self, texts: Sequence[str]) -> np.ndarray:
+        """Unit vectors for resume texts"""
+        return self.engine.embed(texts) if self.engine else self.vectorizer.transform(texts)
+
+    def add(self, candidate_ids: Sequence[int], texts: Sequence[str]) -> None:
+        """Vectorize, persist and index newly stored candidates"""
+
+        if not candidate_ids:
+            return
+        try:
+            vectors = self.vectorize(texts)
+        except Exception as e:
+            logging.error(f"Error vectorizing candidates for similarity search: {str(e)}")
+            return
+
+        with self._lock:
+            self.store.set_candidate_vectors(candidate_ids, self.kind, vectors)
+            if self.index.add(candidate_ids, vectors):
+                self.store.save_ann_centroids(self.kind, self.index.centroids)
+
+    def similar(self, candidate_id: int, k: int = 10,
+                job_id: Optional[str] = None) -> List[Tuple[Dict[str, Any], float]]:
+        """
+        Candidates most similar to a stored candidate
+
+        Copies of the same document (near-duplicates and the same file
+        processed for other jobs) are left out.
+
+        Args:
+            candidate_id: Candidate to start from
+            k: Number of results
+            job_id: Only return candidates of this job
+
+        Returns:
+            List of (candidate dictionary, similarity), most similar first
+        """
+
+        candidate = self.store.get(candidate_id)
+        with self._lock:
+            query = self.index.vector(candidate_id)
+        if candidate is None or query is None:
+            return []
+
+        root = candidate.get('duplicate_of') or candidate_id
+        exclude = {candidate_id, root, *(c['candidate_id'] for c in self.store.duplicates(root))}
+
+        results = []
+        fetch = k
+        while len(results) < k:
+            with self._lock:
+                hits = self.index.search(query, fetch, exclude=list(exclude))
+            for hit_id, score in hits:
+                exclude.add(hit_id)
+                other = self.store.get(hit_id)
+                if other is None or (job_id is not None and other.get('job_id') != job_id):
+                    continue
+                if other.get('document_key') and other.get('document_key') == candidate.get('document_key'):
+                    continue
+                if (other.get('duplicate_of') or hit_id) == root:
+                    continue
+                results.append((other, score))
+                if len(results) == k:
+                    break
+            if len(hits) < fetch:
+                break
+            fetch *= 4
+
+        return results
@@ -0,0 +1,1128 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Any, Optional, Iterable, Tuple
+import numpy as np
+from dedup import band_hashes, estimate_similarity
+from matcher import EXPLANATION_KEYS
+
+# Default location of the candidate database (override with RESUME_ANALYZER_DB)
+DEFAULT_DB_PATH = os.environ.get('RESUME_ANALYZER_DB', 'resume_analyzer.db')
+
+# Pipeline stages in display order
+PIPELINE_STAGES = ['new', 'contacted', 'interviewed', 'hired', 'rejected']
+
+# Sort options offered by the results page mapped to indexed ORDER BY clauses
+SORT_CLAUSES = {
+    'Match Score': 'c.match_score DESC',
+    'Name': 'c.name COLLATE NOCASE ASC',
+    'Experience': 'c.years_experience DESC',
+    'Upload Time': 'c.upload_time DESC',
+}
+
+# Columns kept outside the JSON payload so they can be filtered, sorted and updated in SQL
+_MUTABLE_COLUMNS = ('pipeline_stage', 'starred', 'notes')
+
+# Per-candidate component score columns and the result keys they are filled from,
+# in the column order expected by JobMatcher.combine_scores
+COMPONENT_COLUMNS = [
+    ('skill_score', 'skill_match_score'),
+    ('experience_score', 'experience_match_score'),
+    ('education_score', 'education_match_score'),
+    ('keyword_score', 'keyword_match_score'),
+    ('semantic_score', 'semantic_similarity_score'),
+]
+
+# Columns added after the first release, with their definitions, for _migrate
+_ADDED_COLUMNS = [
+    *((column, 'REAL NOT NULL DEFAULT 0') for column, _ in COMPONENT_COLUMNS),
+    ('document_key', "TEXT NOT NULL DEFAULT ''"),
+    ('duplicate_of', 'INTEGER'),
+    ('duplicate_similarity', 'REAL'),
+    ('minhash', 'BLOB'),
+    ('vector_kind', 'TEXT'),
+    ('vector', 'BLOB'),
+]
+
+# Columns selected for every candidate read; _row_to_candidate overlays them on the JSON payload
+_CANDIDATE_COLUMNS = (
+    "c.id, c.job_id, c.match_score, c.pipeline_stage, c.starred, c.notes, "
+    "c.duplicate_of, c.duplicate_similarity, "
+    "(SELECT COUNT(*) FROM candidates d WHERE d.duplicate_of = c.id) AS duplicate_count, c.data"
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS candidates (
+    id INTEGER PRIMARY KEY,
+    job_id TEXT NOT NULL DEFAULT '',
+    filename TEXT NOT NULL DEFAULT '',
+    name TEXT NOT NULL DEFAULT '',
+    email TEXT NOT NULL DEFAULT '',
+    match_score REAL NOT NULL DEFAULT 0,
+    years_experience INTEGER NOT NULL DEFAULT 0,
+    pipeline_stage TEXT NOT NULL DEFAULT 'new',
+    starred INTEGER NOT NULL DEFAULT 0,
+    notes TEXT NOT NULL DEFAULT '',
+    upload_time TEXT NOT NULL DEFAULT '',
+    skill_score REAL NOT NULL DEFAULT 0,
+    experience_score REAL NOT NULL DEFAULT 0,
+    education_score REAL NOT NULL DEFAULT 0,
+    keyword_score REAL NOT NULL DEFAULT 0,
+    semantic_score REAL NOT NULL DEFAULT 0,
+    document_key TEXT NOT NULL DEFAULT '',
+    duplicate_of INTEGER,
+    duplicate_similarity REAL,
+    minhash BLOB,
+    vector_kind TEXT,
+    vector BLOB,
+    data TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS candidate_lsh (
+    bucket INTEGER NOT NULL,
+    candidate_id INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS ann_centroids (
+    vector_kind TEXT PRIMARY KEY,
+    centroids BLOB NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL DEFAULT '',
+    description TEXT NOT NULL DEFAULT '',
+    required_skills TEXT NOT NULL DEFAULT '',
+    features TEXT NOT NULL DEFAULT '{}',
+    vector_kind TEXT,
+    vector BLOB,
+    updated_at TEXT NOT NULL DEFAULT ''
+);
+
+CREATE TABLE IF NOT EXISTS batches (
+    id TEXT PRIMARY KEY,
+    job_id TEXT NOT NULL DEFAULT '',
+    label TEXT NOT NULL DEFAULT '',
+    manifest TEXT NOT NULL DEFAULT '[]',
+    status TEXT NOT NULL DEFAULT 'running',
+    created_at TEXT NOT NULL DEFAULT '',
+    updated_at TEXT NOT NULL DEFAULT ''
+);
+
+CREATE TABLE IF NOT EXISTS job_definitions (
+    job_id TEXT PRIMARY KEY,
+    title TEXT NOT NULL DEFAULT '',
+    description TEXT NOT NULL DEFAULT '',
+    required_skills TEXT NOT NULL DEFAULT '',
+    created_at TEXT NOT NULL DEFAULT ''
+);
+
+CREATE TABLE IF NOT EXISTS quarantine (
+    document_key TEXT PRIMARY KEY,
+    filename TEXT NOT NULL DEFAULT '',
+    reason TEXT NOT NULL DEFAULT '',
+    stage TEXT NOT NULL DEFAULT '',
+    detail TEXT NOT NULL DEFAULT '',
+    created_at TEXT NOT NULL DEFAULT ''
+);
+
+CREATE TABLE IF NOT EXISTS batch_log (
+    batch_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    result TEXT NOT NULL,
+    resume_text TEXT NOT NULL DEFAULT '',
+    minhash BLOB,
+    PRIMARY KEY (batch_id, position)
+);
+"""
+
+_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_candidates_score ON candidates (match_score);
+CREATE INDEX IF NOT EXISTS idx_candidates_job_score ON candidates (job_id, match_score);
+CREATE INDEX IF NOT EXISTS idx_candidates_years ON candidates (years_experience);
+CREATE INDEX IF NOT EXISTS idx_candidates_stage ON candidates (pipeline_stage);
+CREATE INDEX IF NOT EXISTS idx_candidates_starred ON candidates (starred, match_score);
+CREATE INDEX IF NOT EXISTS idx_candidates_name ON candidates (name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_candidates_upload ON candidates (upload_time);
+CREATE INDEX IF NOT EXISTS idx_candidates_duplicate ON candidates (duplicate_of);
+CREATE INDEX IF NOT EXISTS idx_candidates_document_key ON candidates (document_key);
+CREATE INDEX IF NOT EXISTS idx_candidate_lsh_bucket ON candidate_lsh (bucket);
+CREATE INDEX IF NOT EXISTS idx_candidate_lsh_candidate ON candidate_lsh (candidate_id);
+CREATE INDEX IF NOT EXISTS idx_candidates_vector_kind ON candidates (vector_kind);
+"""
+
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS candidates_fts USING fts5(
+    name, email, skills, companies, institutions, resume_text,
+    tokenize = 'unicode61'
+);
+"""
+
+
+def make_job_id(job_title: str, job_description: str, required_skills: str = "") -> str:
+    """
+    Build a stable identifier for a job configuration
+
+    Args:
+        job_title: Job title
+        job_description: Job description text
+        required_skills: Comma-separated required skills
+
+    Returns:
+        Short hex digest identifying the job
+    """
+
+    payload = '\x1f'.join([job_title.strip(), job_description.strip(), required_skills.strip()])
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def make_batch_id(job_id: str, manifest: Iterable[Tuple[str, str]],
+                  settings: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Build a stable identifier for a batch
+
+    Args:
+        job_id: Identifier of the job the batch is scored against
+        manifest: (filename, document_key) of each file, in batch order
+        settings: Options that change results (weights, OCR, embedding model)
+
+    Returns:
+        Short hex digest; the same files, job and settings give the same id
+    """
+
+    payload = json.dumps([job_id, [list(entry) for entry in manifest], settings or {}], sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def _like_pattern(term: str) -> str:
+    """LIKE pattern matching term as a substring, with LIKE wildcards escaped (ESCAPE '\\')"""
+    escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"%{escaped}%"
+
+
+def _fts_query(term: str) -> str:
+    """Turn free text into an FTS5 query of quoted prefix tokens"""
+    tokens = [t for t in term.replace('"', ' ').split() if t]
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+class CandidateStore:
+    """Persistent SQLite store for processed candidates with full-text search"""
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(_SCHEMA)
+        self._migrate()
+        self.conn.executescript(_INDEXES)
+        self.fts_enabled = self._create_fts()
+        self.conn.commit()
+
+    def _migrate(self):
+        """Add columns introduced after a database was first created"""
+        existing = {row[1] for row in self.conn.execute("PRAGMA table_info(candidates)")}
+        for column, definition in _ADDED_COLUMNS:
+            if column not in existing:
+                self.conn.execute(f"ALTER TABLE candidates ADD COLUMN {column} {definition}")
+
+    def _create_fts(self) -> bool:
+        """Create the FTS5 table, returning False if SQLite lacks FTS5"""
+        try:
+            self.conn.executescript(_FTS_SCHEMA)
+            return True
+        except sqlite3.OperationalError as e:
+            logging.warning(f"FTS5 unavailable, falling back to LIKE search: {str(e)}")
+            return False
+
+    def close(self):
+        """Close the underlying connection"""
+        with self._lock:
+            self.conn.close()
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def add_candidates(self, resumes: Iterable[Dict[str, Any]], job_id: str = "",
+                       resume_texts: Optional[Iterable[str]] = None,
+                       batch_id: Optional[str] = None) -> List[int]:
+        """
+        Insert processed candidates in a single transaction
+
+        Args:
+            resumes: Parsed and scored resume dictionaries
+            job_id: Identifier of the job the candidates were scored against
+            resume_texts: Optional extracted resume texts, aligned with resumes
+            batch_id: Batch whose log these results come from; it is marked
+                completed and its log dropped in the same transaction
+
+        Returns:
+            List of new candidate ids; each resume dict also gets 'candidate_id'
+
+        A 'minhash_signature' array on a resume is popped and stored with its
+        LSH buckets for later near-duplicate lookups. Near-duplicates point at
+        their original through 'duplicate_of_id' (a stored candidate) or
+        'duplicate_of_key' (the document_key of an earlier resume in resumes).
+        """
+
+        resumes = list(resumes)
+        texts = list(resume_texts) if resume_texts is not None else [''] * len(resumes)
+        ids = []
+        key_to_id: Dict[str, int] = {}
+
+        with self._lock, self.conn:
+            for resume, text in zip(resumes, texts):
+                signature = resume.pop('minhash_signature', None)
+                duplicate_of = resume.get('duplicate_of_id') or key_to_id.get(resume.get('duplicate_of_key'))
+                cursor = self.conn.execute(
+                    """INSERT INTO candidates (job_id, filename, name, email, match_score,
+                           years_experience, pipeline_stage, starred, notes, upload_time,
+                           skill_score, experience_score, education_score, keyword_score,
+                           semantic_score, document_key, duplicate_of, duplicate_similarity,
+                           minhash, data)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                    (
+                        job_id,
+                        resume.get('filename', ''),
+                        resume.get('name', ''),
+                        resume.get('email', ''),
+                        float(resume.get('match_score', 0) or 0),
+                        int(resume.get('years_experience', 0) or 0),
+                        resume.get('pipeline_stage') or 'new',
+                        1 if resume.get('starred') else 0,
+                        resume.get('notes', ''),
+                        resume.get('upload_time', ''),
+                        *(float(resume.get(key, 0) or 0) for _, key in COMPONENT_COLUMNS),
+                        resume.get('document_key', ''),
+                        duplicate_of,
+                        resume.get('duplicate_similarity') if duplicate_of else None,
+                        signature.astype(np.uint32).tobytes() if signature is not None else None,
+                        json.dumps(resume, default=str),
+                    )
+                )
+                candidate_id = cursor.lastrowid
+                resume['candidate_id'] = candidate_id
+                ids.append(candidate_id)
+
+                if resume.get('document_key'):
+                    key_to_id.setdefault(resume['document_key'], duplicate_of or candidate_id)
+                if signature is not None:
+                    self.conn.executemany(
+                        "INSERT INTO candidate_lsh (bucket, candidate_id) VALUES (?, ?)",
+                        ((bucket, candidate_id) for bucket in band_hashes(signature))
+                    )
+
+                if self.fts_enabled:
+                    self.conn.execute(
+                        """INSERT INTO candidates_fts (rowid, name, email, skills, companies,
+                               institutions, resume_text)
+                           VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                        (candidate_id, *self._search_fields(resume), text or '')
+                    )
+
+            if batch_id is not None:
+                self.conn.execute(
+                    "UPDATE batches SET status = 'completed', updated_at = ? WHERE id = ?",
+                    (time.strftime("%Y-%m-%d %H:%M:%S"), batch_id)
+                )
+                self.conn.execute("DELETE FROM batch_log WHERE batch_id = ?", (batch_id,))
+
+        return ids
+
+    def open_batch(self, batch_id: str, job_id: str, label: str,
+                   manifest: List[Tuple[str, str]]) -> Dict[int, Tuple[Dict[str, Any], str]]:
+        """
+        Register a batch, or reopen an interrupted one
+
+        Returns:
+            Logged results of a previous run by batch position, as
+            (result, extracted text); empty for a new or completed batch
+        """
+
+        now = time.strftime("%Y-%m-%d %H:%M:%S")
+        with self._lock, self.conn:
+            self.conn.execute(
+                """INSERT INTO batches (id, job_id, label, manifest, status, created_at, updated_at)
+                   VALUES (?, ?, ?, ?, 'running', ?, ?)
+                   ON CONFLICT (id) DO UPDATE SET status = 'running', label = excluded.label,
+                       updated_at = excluded.updated_at""",
+                (batch_id, job_id, label, json.dumps([list(entry) for entry in manifest]), now, now)
+            )
+            rows = self.conn.execute(
+                "SELECT position, result, resume_text, minhash FROM batch_log WHERE batch_id = ? "
+                "ORDER BY position", (batch_id,)
+            ).fetchall()
+
+        logged = {}
+        for row in rows:
+            result = json.loads(row['result'])
+            if row['minhash'] is not None:
+                result['minhash_signature'] = np.frombuffer(row['minhash'], dtype=np.uint32).copy()
+            logged[row['position']] = (result, row['resume_text'])
+        return logged
+
+    def log_result(self, batch_id: str, position: int, result: Dict[str, Any], text: str = "") -> None:
+        """Append one finished file's result to a batch log (committed immediately)"""
+
+        signature = result.get('minhash_signature')
+        payload = {key: value for key, value in result.items() if key != 'minhash_signature'}
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO batch_log (batch_id, position, result, resume_text, minhash) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (batch_id, position, json.dumps(payload, default=str), text or '',
+                 signature.astype(np.uint32).tobytes() if signature is not None else None)
+            )
+
+    def quarantine_file(self, document_key: str, filename: str, reason: str, stage: str,
+                        detail: str = "") -> None:
+        """Record a file the sandbox had to kill, so later batches skip it"""
+
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO quarantine (document_key, filename, reason, stage, detail, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (document_key, filename, reason, stage, detail, time.strftime("%Y-%m-%d %H:%M:%S"))
+            )
+
+    def release_quarantine(self, document_key: Optional[str] = None) -> None:
+        """Remove one file, or every file, from the quarantine list"""
+
+        with self._lock, self.conn:
+            if document_key is None:
+                self.conn.execute("DELETE FROM quarantine")
+            else:
+                self.conn.execute("DELETE FROM quarantine WHERE document_key = ?", (document_key,))
+
+    def discard_batch(self, batch_id: str) -> None:
+        """Forget an interrupted batch and its log"""
+
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM batch_log WHERE batch_id = ?", (batch_id,))
+            self.conn.execute("DELETE FROM batches WHERE id = ?", (batch_id,))
+
+    def set_candidate_vectors(self, candidate_ids: Iterable[int], vector_kind: str,
+                              vectors: np.ndarray) -> None:
+        """Store similarity-search vectors (float32) for candidates in one transaction"""
+
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "UPDATE candidates SET vector_kind = ?, vector = ? WHERE id = ?",
+                ((vector_kind, np.asarray(vector, dtype=np.float32).tobytes(), int(candidate_id))
+                 for candidate_id, vector in zip(candidate_ids, vectors))
+            )
+
+    def save_ann_centroids(self, vector_kind: str, centroids: np.ndarray) -> None:
+        """Store the trained coarse quantizer of the similarity index"""
+
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO ann_centroids (vector_kind, centroids) VALUES (?, ?)",
+                (vector_kind, np.asarray(centroids, dtype=np.float32).tobytes())
+            )
+
+    def save_job(self, title: str, description: str, required_skills: str, features: Dict[str, Any],
+                 vector_kind: Optional[str] = None, vector: Optional[np.ndarray] = None,
+                 job_id: Optional[int] = None) -> int:
+        """
+        Insert a job into the job library, or replace the job with id job_id
+
+        Args:
+            title: Job title
+            description: Job description text
+            required_skills: Comma-separated required skills
+            features: Precomputed job-side scoring features (JobMatcher.job_profile)
+            vector_kind: Kind of vector (embedding model name), if any
+            vector: Job embedding, if any
+            job_id: Existing job to update
+
+        Returns:
+            Id of the stored job
+        """
+
+        values = (
+            title, description, required_skills, json.dumps(features), vector_kind,
+            np.asarray(vector, dtype=np.float32).tobytes() if vector is not None else None,
+            time.strftime("%Y-%m-%d %H:%M:%S"),
+        )
+        with self._lock, self.conn:
+            if job_id is not None:
+                self.conn.execute(
+                    """UPDATE jobs SET title = ?, description = ?, required_skills = ?, features = ?,
+                           vector_kind = ?, vector = ?, updated_at = ? WHERE id = ?""",
+                    (*values, job_id)
+                )
+                return job_id
+            cursor = self.conn.execute(
+                """INSERT INTO jobs (title, description, required_skills, features, vector_kind,
+                       vector, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                values
+            )
+            return cursor.lastrowid
+
+    def delete_job(self, job_id: int) -> None:
+        """Remove a job from the job library"""
+
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def update_candidate(self, candidate_id: int, **fields) -> None:
+        """Update mutable candidate fields (pipeline_stage, starred, notes)"""
+
+        updates = {k: v for k, v in fields.items() if k in _MUTABLE_COLUMNS}
+        if not updates:
+            return
+
+        if 'starred' in updates:
+            updates['starred'] = 1 if updates['starred'] else 0
+        if 'pipeline_stage' in updates:
+            updates['pipeline_stage'] = updates['pipeline_stage'] or 'new'
+
+        assignments = ', '.join(f"{column} = ?" for column in updates)
+        with self._lock, self.conn:
+            self.conn.execute(
+                f"UPDATE candidates SET {assignments} WHERE id = ?",
+                (*updates.values(), candidate_id)
+            )
+
+    def update_scores(self, candidate_ids: Iterable[int], scores: Iterable[float]) -> None:
+        """Write recomputed match scores back in one transaction"""
+
+        # Bulk-load into a temp table and apply with one UPDATE ... FROM,
+        # which is several times faster than per-row UPDATEs
+        with self._lock, self.conn:
+            self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS new_scores (id INTEGER PRIMARY KEY, score REAL)")
+            self.conn.execute("DELETE FROM new_scores")
+            self.conn.executemany(
+                "INSERT INTO new_scores (id, score) VALUES (?, ?)",
+                zip((int(cid) for cid in candidate_ids), (float(score) for score in scores))
+            )
+            self.conn.execute(
+                "UPDATE candidates SET match_score = new_scores.score "
+                "FROM new_scores WHERE candidates.id = new_scores.id"
+            )
+            self.conn.execute("DELETE FROM new_scores")
+
+    def rescore_candidates(self, candidate_ids: Iterable[int], job_id: str, components: np.ndarray,
+                           scores: Iterable[float]) -> None:
+        """
+        Move candidates to another job with the scores computed against it
+
+        Args:
+            candidate_ids: Candidates to update
+            job_id: Identifier of the job they were re-scored against
+            components: Array of shape (N, 5) ordered as COMPONENT_COLUMNS
+            scores: New match scores
+
+        Explanations kept for the old job are dropped. Candidates whose
+        document is already stored under job_id keep their current job
+        and scores.
+        """
+
+        keys = [key for _, key in COMPONENT_COLUMNS]
+        stale = dict.fromkeys(EXPLANATION_KEYS)
+        rows = []
+        for candidate_id, row, score in zip(candidate_ids, np.asarray(components, dtype=float), scores):
+            # A JSON merge patch deletes the keys set to null
+            patch = {**stale, **dict(zip(keys, (float(value) for value in row))), 'match_score': float(score)}
+            rows.append((int(candidate_id), float(score), *(float(value) for value in row), json.dumps(patch)))
+
+        columns = [column for column, _ in COMPONENT_COLUMNS]
+        with self._lock, self.conn:
+            self.conn.execute(
+                f"CREATE TEMP TABLE IF NOT EXISTS rescored (id INTEGER PRIMARY KEY, score REAL, "
+                f"{', '.join(f'{column} REAL' for column in columns)}, patch TEXT)"
+            )
+            self.conn.execute("DELETE FROM rescored")
+            self.conn.executemany(
+                f"INSERT INTO rescored VALUES (?, ?, {', '.join('?' for _ in columns)}, ?)", rows
+            )
+            self.conn.execute(
+                "DELETE FROM rescored WHERE id IN (SELECT c.id FROM candidates c WHERE c.document_key != '' "
+                "AND c.document_key IN (SELECT document_key FROM candidates WHERE job_id = ?))",
+                (job_id,)
+            )
+            self.conn.execute(
+                f"UPDATE candidates SET job_id = ?, match_score = rescored.score, "
+                f"{', '.join(f'{column} = rescored.{column}' for column in columns)}, "
+                f"data = json_patch(candidates.data, rescored.patch) "
+                f"FROM rescored WHERE candidates.id = rescored.id",
+                (job_id,)
+            )
+            self.conn.execute("DELETE FROM rescored")
+
+    def save_explanation(self, candidate_id: int, job_id: str, explanation: Dict[str, Any]) -> None:
+        """Keep a candidate's match explanation, unless it has since moved to another job"""
+
+        self.save_explanations([(candidate_id, job_id, explanation)])
+
+    def save_explanations(self, explanations: Iterable[Tuple[int, str, Dict[str, Any]]]) -> None:
+        """Keep several (candidate_id, job_id, explanation) triples in one transaction"""
+
+        rows = [(json.dumps(explanation, default=str), int(candidate_id), job_id)
+                for candidate_id, job_id, explanation in explanations]
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "UPDATE candidates SET data = json_patch(data, ?) WHERE id = ? AND job_id = ?", rows
+            )
+
+    def save_job_definition(self, job_id: str, title: str, description: str, required_skills: str = "") -> None:
+        """Remember the job a job_id was made from (explanations are computed against it later)"""
+
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO job_definitions (job_id, title, description, required_skills, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (job_id, title, description, required_skills, time.strftime("%Y-%m-%d %H:%M:%S"))
+            )
+
+    def job_definition(self, job_id: str) -> Optional[Dict[str, str]]:
+        """Title, description and required skills of a job_id, if it was saved"""
+
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT title, description, required_skills FROM job_definitions WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def candidate_texts(self, candidate_ids: Iterable[int]) -> Dict[int, Tuple[str, str]]:
+        """
+        Document keys and full-text-indexed resume texts of candidates
+
+        Returns:
+            (document_key, resume text or '' without FTS5) by candidate id
+        """
+
+        ids = [int(candidate_id) for candidate_id in candidate_ids]
+        texts = {}
+        with self._lock:
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                placeholders = ', '.join('?' for _ in chunk)
+                if self.fts_enabled:
+                    sql = (f"SELECT c.id, c.document_key, f.resume_text FROM candidates c "
+                           f"LEFT JOIN candidates_fts f ON f.rowid = c.id WHERE c.id IN ({placeholders})")
+                else:
+                    sql = f"SELECT id, document_key, '' FROM candidates WHERE id IN ({placeholders})"
+                for candidate_id, document_key, text in self.conn.execute(sql, chunk):
+                    texts[candidate_id] = (document_key, text or '')
+        return texts
+
+    def clear(self, job_id: Optional[str] = None) -> None:
+        """Delete all candidates, or only those scored against job_id"""
+
+        with self._lock, self.conn:
+            if job_id is None:
+                self.conn.execute("DELETE FROM candidates")
+                self.conn.execute("DELETE FROM candidate_lsh")
+                if self.fts_enabled:
+                    self.conn.execute("DELETE FROM candidates_fts")
+            else:
+                if self.fts_enabled:
+                    self.conn.execute(
+                        "DELETE FROM candidates_fts WHERE rowid IN "
+                        "(SELECT id FROM candidates WHERE job_id = ?)", (job_id,)
+                    )
+                self.conn.execute(
+                    "DELETE FROM candidate_lsh WHERE candidate_id IN "
+                    "(SELECT id FROM candidates WHERE job_id = ?)", (job_id,)
+                )
+                self.conn.execute("DELETE FROM candidates WHERE job_id = ?", (job_id,))
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def query(self, job_id: Optional[str] = None, min_score: float = 0.0,
+              max_score: float = 1.0, skill_filter: str = "", search_term: str = "",
+              starred: Optional[bool] = None, pipeline_stage: Optional[str] = None,
+              sort_by: str = "Match Score", limit: Optional[int] = None,
+              offset: int = 0, collapse_duplicates: bool = False) -> List[Dict[str, Any]]:
+        """
+        Fetch candidates with filtering, sorting and pagination done in SQL
+
+        Args:
+            job_id: Restrict to candidates scored against this job
+            min_score: Minimum match score (0-1)
+            max_score: Maximum match score (0-1)
+            skill_filter: Comma-separated skills, any of which must be present
+            search_term: Free text matched against name, email, skills, companies,
+                institutions and resume text
+            starred: Restrict to starred (True) or unstarred (False) candidates
+            pipeline_stage: Restrict to a pipeline stage
+            sort_by: One of the SORT_CLAUSES keys
+            limit: Maximum rows to return (None for all)
+            offset: Rows to skip, for pagination
+            collapse_duplicates: Only return one row per near-duplicate group
+
+        Returns:
+            List of candidate dictionaries
+        """
+
+        where, params = self._where(job_id, min_score, max_score, skill_filter,
+                                    search_term, starred, pipeline_stage, collapse_duplicates)
+        order = SORT_CLAUSES.get(sort_by, SORT_CLAUSES['Match Score'])
+        sql = f"SELECT {_CANDIDATE_COLUMNS} FROM candidates c{where} ORDER BY {order}, c.id"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params.extend([int(limit), int(offset)])
+
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+
+        return [self._row_to_candidate(row) for row in rows]
+
+    def count(self, job_id: Optional[str] = None, min_score: float = 0.0,
+              max_score: float = 1.0, skill_filter: str = "", search_term: str = "",
+              starred: Optional[bool] = None, pipeline_stage: Optional[str] = None,
+              collapse_duplicates: bool = False) -> int:
+        """Count candidates matching the same filters accepted by query()"""
+
+        where, params = self._where(job_id, min_score, max_score, skill_filter,
+                                    search_term, starred, pipeline_stage, collapse_duplicates)
+        with self._lock:
+            return self.conn.execute(f"SELECT COUNT(*) FROM candidates c{where}", params).fetchone()[0]
+
+    def get(self, candidate_id: int) -> Optional[Dict[str, Any]]:
+        """Fetch a single candidate by id"""
+
+        with self._lock:
+            row = self.conn.execute(
+                f"SELECT {_CANDIDATE_COLUMNS} FROM candidates c WHERE c.id = ?",
+                (candidate_id,)
+            ).fetchone()
+        return self._row_to_candidate(row) if row else None
+
+    def duplicates(self, candidate_id: int) -> List[Dict[str, Any]]:
+        """Fetch the near-duplicates grouped under a candidate, most similar first"""
+
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT {_CANDIDATE_COLUMNS} FROM candidates c WHERE c.duplicate_of = ? "
+                f"ORDER BY c.duplicate_similarity DESC, c.id",
+                (candidate_id,)
+            ).fetchall()
+        return [self._row_to_candidate(row) for row in rows]
+
+    def find_near_duplicate(self, signature: np.ndarray, buckets: List[int],
+                            threshold: float) -> Optional[Tuple[int, float]]:
+        """
+        Find the stored candidate most similar to a MinHash signature
+
+        Only candidates sharing an LSH bucket are loaded, and their full
+        signatures are compared to verify the estimated similarity.
+
+        Args:
+            signature: MinHash signature of the new document
+            buckets: LSH band hashes of the signature (dedup.band_hashes)
+            threshold: Minimum estimated Jaccard similarity
+
+        Returns:
+            Tuple of (candidate id, similarity), or None
+        """
+
+        placeholders = ', '.join('?' for _ in buckets)
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.row_factory = None
+            rows = cursor.execute(
+                f"SELECT id, minhash FROM candidates WHERE minhash IS NOT NULL AND id IN "
+                f"(SELECT candidate_id FROM candidate_lsh WHERE bucket IN ({placeholders}))",
+                list(buckets)
+            ).fetchall()
+
+        best = None
+        for candidate_id, blob in rows:
+            stored = np.frombuffer(blob, dtype=np.uint32)
+            if stored.shape != signature.shape:
+                continue
+            similarity = estimate_similarity(signature, stored)
+            if similarity >= threshold and (best is None or similarity > best[1]):
+                best = (candidate_id, similarity)
+        return best
+
+    def candidate_vectors(self, vector_kind: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Load every stored similarity-search vector of one kind
+
+        Returns:
+            Tuple of (candidate ids, float32 array of shape (N, dim))
+        """
+
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.row_factory = None
+            rows = cursor.execute(
+                "SELECT id, vector FROM candidates WHERE vector_kind = ? AND vector IS NOT NULL ORDER BY id",
+                (vector_kind,)
+            ).fetchall()
+
+        if not rows:
+            return np.empty(0, dtype=np.int64), np.empty((0, 0), dtype=np.float32)
+
+        ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        vectors = np.frombuffer(b''.join(row[1] for row in rows), dtype=np.float32)
+        return ids, vectors.reshape(len(rows), -1)
+
+    def jobs(self) -> List[Dict[str, Any]]:
+        """
+        Load the job library
+
+        Returns:
+            Jobs in id order with decoded 'features' and 'vector' (or None)
+        """
+
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT id, title, description, required_skills, features, vector_kind, vector, "
+                "updated_at FROM jobs ORDER BY id"
+            ).fetchall()
+
+        return [{
+            'job_id': row['id'],
+            'title': row['title'],
+            'description': row['description'],
+            'required_skills': row['required_skills'],
+            'features': json.loads(row['features']),
+            'vector_kind': row['vector_kind'],
+            'vector': np.frombuffer(row['vector'], dtype=np.float32) if row['vector'] is not None else None,
+            'updated_at': row['updated_at'],
+        } for row in rows]
+
+    def interrupted_batches(self) -> List[Dict[str, Any]]:
+        """
+        Batches that were started but never stored their results
+
+        Returns:
+            List of dictionaries with batch_id, job_id, label, total,
+            logged (results in the log) and updated_at, newest first
+        """
+
+        with self._lock:
+            rows = self.conn.execute(
+                """SELECT b.id, b.job_id, b.label, b.manifest, b.updated_at,
+                          (SELECT COUNT(*) FROM batch_log l WHERE l.batch_id = b.id) AS logged
+                   FROM batches b WHERE b.status = 'running' ORDER BY b.updated_at DESC"""
+            ).fetchall()
+
+        return [{
+            'batch_id': row['id'],
+            'job_id': row['job_id'],
+            'label': row['label'],
+            'total': len(json.loads(row['manifest'])),
+            'logged': row['logged'],
+            'updated_at': row['updated_at'],
+        } for row in rows]
+
+    def quarantined(self) -> List[Dict[str, Any]]:
+        """Quarantined files, newest first"""
+
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT document_key, filename, reason, stage, detail, created_at FROM quarantine "
+                "ORDER BY created_at DESC"
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def quarantined_keys(self) -> set:
+        """Document keys of quarantined files"""
+
+        with self._lock:
+            return {row[0] for row in self.conn.execute("SELECT document_key FROM quarantine")}
+
+    def stored_documents(self, exclude_job_id: Optional[str] = None) -> List[Tuple[str, str]]:
+        """
+        Distinct documents among stored candidates, for re-scoring
+
+        Args:
+            exclude_job_id: Leave out documents already scored against this job
+
+        Returns:
+            (filename, document_key) pairs in the order they were first stored
+        """
+
+        sql = ("SELECT MIN(c.id) AS first_id, c.filename, c.document_key FROM candidates c "
+               "WHERE c.document_key != ''")
+        params: List[Any] = []
+        if exclude_job_id is not None:
+            sql += (" AND c.document_key NOT IN "
+                    "(SELECT document_key FROM candidates WHERE job_id = ?)")
+            params.append(exclude_job_id)
+        sql += " GROUP BY c.document_key ORDER BY first_id"
+
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [(row['filename'], row['document_key']) for row in rows]
+
+    def ann_centroids(self, vector_kind: str) -> Optional[np.ndarray]:
+        """Stored coarse quantizer of the similarity index, if trained"""
+
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT centroids FROM ann_centroids WHERE vector_kind = ?", (vector_kind,)
+            ).fetchone()
+        return np.frombuffer(row[0], dtype=np.float32) if row else None
+
+    def component_matrix(self, job_id: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Load stored component scores as a matrix for vectorized re-ranking
+
+        Returns:
+            Tuple of (candidate ids, array of shape (N, 5) ordered as COMPONENT_COLUMNS)
+        """
+
+        columns = ', '.join(column for column, _ in COMPONENT_COLUMNS)
+        sql = f"SELECT id, {columns} FROM candidates"
+        params: List[Any] = []
+        if job_id is not None:
+            sql += " WHERE job_id = ?"
+            params.append(job_id)
+
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.row_factory = None
+            rows = cursor.execute(sql, params).fetchall()
+
+        if not rows:
+            return np.empty(0, dtype=np.int64), np.empty((0, len(COMPONENT_COLUMNS)))
+
+        data = np.array(rows, dtype=float)
+        return data[:, 0].astype(np.int64), data[:, 1:]
+
+    def stage_counts(self, job_id: Optional[str] = None) -> Dict[str, int]:
+        """Count candidates per pipeline stage with a single GROUP BY"""
+
+        sql = "SELECT pipeline_stage, COUNT(*) FROM candidates"
+        params: List[Any] = []
+        if job_id is not None:
+            sql += " WHERE job_id = ?"
+            params.append(job_id)
+        sql += " GROUP BY pipeline_stage"
+
+        counts = {stage: 0 for stage in PIPELINE_STAGES}
+        with self._lock:
+            for stage, count in self.conn.execute(sql, params):
+                counts[stage or 'new'] = counts.get(stage or 'new', 0) + count
+        return counts
+
+    def score_summary(self, job_id: Optional[str] = None) -> Dict[str, float]:
+        """Compute score bucket counts and the average score in SQL"""
+
+        sql = """SELECT COUNT(*),
+                        SUM(match_score >= 0.8),
+                        SUM(match_score >= 0.6 AND match_score < 0.8),
+                        SUM(match_score >= 0.4 AND match_score < 0.6),
+                        SUM(match_score < 0.4),
+                        AVG(match_score)
+                 FROM candidates"""
+        params: List[Any] = []
+        if job_id is not None:
+            sql += " WHERE job_id = ?"
+            params.append(job_id)
+
+        with self._lock:
+            row = self.conn.execute(sql, params).fetchone()
+
+        return {
+            'total': row[0] or 0,
+            'excellent': row[1] or 0,
+            'good': row[2] or 0,
+            'fair': row[3] or 0,
+            'poor': row[4] or 0,
+            'average': row[5] or 0.0,
+        }
+
+    def score_histogram(self, job_id: Optional[str] = None, bins: int = 20) -> np.ndarray:
+        """Count candidates per equal-width match score bin over [0, 1] with a single GROUP BY"""
+
+        sql = "SELECT MIN(CAST(match_score * ? AS INTEGER), ?) AS bin, COUNT(*) FROM candidates"
+        params: List[Any] = [bins, bins - 1]
+        if job_id is not None:
+            sql += " WHERE job_id = ?"
+            params.append(job_id)
+        sql += " GROUP BY bin"
+
+        counts = np.zeros(bins, dtype=np.int64)
+        with self._lock:
+            for bin_index, count in self.conn.execute(sql, params):
+                counts[max(0, bin_index or 0)] += count
+        return counts
+
+    def experience_score_density(self, job_id: Optional[str] = None, score_bins: int = 20,
+                                 max_years: int = 40) -> np.ndarray:
+        """
+        Count candidates per (years of experience, match score bin) cell in SQL
+
+        Returns:
+            Array of shape (Y + 1, score_bins) where Y is the largest year
+            present, capped at max_years (that row also counts anyone above)
+        """
+
+        sql = ("SELECT MIN(MAX(years_experience, 0), ?) AS years, "
+               "MIN(CAST(match_score * ? AS INTEGER), ?) AS bin, COUNT(*) FROM candidates")
+        params: List[Any] = [max_years, score_bins, score_bins - 1]
+        if job_id is not None:
+            sql += " WHERE job_id = ?"
+            params.append(job_id)
+        sql += " GROUP BY years, bin"
+
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+
+        counts = np.zeros((max((row[0] for row in rows), default=0) + 1, score_bins), dtype=np.int64)
+        for years, bin_index, count in rows:
+            counts[years, max(0, bin_index or 0)] += count
+        return counts
+
+    def chart_sample(self, job_id: Optional[str] = None, limit: int = 2000) -> List[Dict[str, Any]]:
+        """
+        A stable pseudo-random sample of candidates with the fields charted per point
+
+        The sample is ordered by a multiplicative hash of the id, so it does
+        not change between reruns and new candidates join it uniformly.
+
+        Returns:
+            Up to limit dictionaries with name, match_score, years_experience,
+            skills_count and education
+        """
+
+        sql = ("SELECT name, match_score, years_experience, "
+               "COALESCE(json_array_length(data, '$.skills'), 0), json_extract(data, '$.education') "
+               "FROM candidates")
+        params: List[Any] = []
+        if job_id is not None:
+            sql += " WHERE job_id = ?"
+            params.append(job_id)
+        sql += " ORDER BY (id * 2654435761) % 4294967291 LIMIT ?"
+        params.append(limit)
+
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.row_factory = None
+            rows = cursor.execute(sql, params).fetchall()
+
+        return [{
+            'name': name,
+            'match_score': score,
+            'years_experience': years,
+            'skills_count': skills_count,
+            'education': json.loads(education) if education else [],
+        } for name, score, years, skills_count, education in rows]
+
+    def skill_counts(self, job_id: Optional[str] = None, limit: Optional[int] = None) -> List[Tuple[str, int]]:
+        """
+        Count the candidates listing each skill (case-insensitive) in SQL
+
+        Returns:
+            List of (skill, candidate count), most common first
+        """
+
+        sql = ("SELECT MIN(s.value), COUNT(DISTINCT c.id) AS candidates "
+               "FROM candidates c, json_each(c.data, '$.skills') s")
+        params: List[Any] = []
+        if job_id is not None:
+            sql += " WHERE c.job_id = ?"
+            params.append(job_id)
+        sql += " GROUP BY lower(s.value) ORDER BY candidates DESC, MIN(s.value)"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            return [(skill, count) for skill, count in self.conn.execute(sql, params)]
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _where(self, job_id, min_score, max_score, skill_filter, search_term,
+               starred, pipeline_stage, collapse_duplicates=False):
+        """Build the WHERE clause and parameters shared by query() and count()"""
+
+        clauses = []
+        params: List[Any] = []
+
+        if job_id is not None:
+            clauses.append("c.job_id = ?")
+            params.append(job_id)
+        if min_score > 0:
+            clauses.append("c.match_score >= ?")
+            params.append(min_score)
+        if max_score < 1:
+            clauses.append("c.match_score <= ?")
+            params.append(max_score)
+        if starred is not None:
+            clauses.append("c.starred = ?")
+            params.append(1 if starred else 0)
+        if pipeline_stage is not None:
+            clauses.append("c.pipeline_stage = ?")
+            params.append(pipeline_stage or 'new')
+        if collapse_duplicates:
+            # Copies are folded into their original only when it is listed for the same job
+            clauses.append("NOT EXISTS (SELECT 1 FROM candidates o "
+                           "WHERE o.id = c.duplicate_of AND o.job_id = c.job_id)")
+
+        skills = [s.strip() for s in skill_filter.split(',') if s.strip()] if skill_filter else []
+        if skills:
+            # Substring match on the stored skills ("SQL" finds MySQL, "C++" only C++);
+            # FTS prefix tokens would miss infixes and drop punctuation
+            clauses.append("EXISTS (SELECT 1 FROM json_each(c.data, '$.skills') WHERE "
+                           + ' OR '.join("lower(value) LIKE ? ESCAPE '\\'" for _ in skills) + ')')
+            params.extend(_like_pattern(s.lower()) for s in skills)
+
+        if search_term and search_term.strip():
+            fts_term = _fts_query(search_term) if self.fts_enabled else ''
+            if fts_term:
+                clauses.append("c.id IN (SELECT rowid FROM candidates_fts WHERE candidates_fts MATCH ?)")
+                params.append(fts_term)
+            elif not self.fts_enabled:
+                clauses.append("c.data LIKE ? ESCAPE '\\'")
+                params.append(_like_pattern(search_term.strip()))
+
+        where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+        return where, params
+
+    @staticmethod
+    def _search_fields(resume: Dict[str, Any]) -> tuple:
+        """Collect the searchable text columns for a resume"""
+
+        companies = ' '.join(
+            exp.get('company', '') if isinstance(exp, dict) else str(exp)
+            for exp in resume.get('experience', [])
+        )
+        institutions = ' '.join(
+            edu.get('institution', '') if isinstance(edu, dict) else str(edu)
+            for edu in resume.get('education', [])
+        )
+        return (
+            resume.get('name', ''),
+            resume.get('email', ''),
+            ' '.join(resume.get('skills', [])),
+            companies,
+            institutions,
+        )
+
+    @staticmethod
+    def _row_to_candidate(row) -> Dict[str, Any]:
+        """Decode a stored row, overlaying the mutable SQL columns"""
+
+        candidate = json.loads(row['data'])
+        candidate['candidate_id'] = row['id']
+        candidate['job_id'] = row['job_id']
+        candidate['match_score'] = row['match_score']
+        candidate['pipeline_stage'] = row['pipeline_stage']
+        candidate['starred'] = bool(row['starred'])
+        candidate['notes'] = row['notes']
+        candidate['duplicate_of'] = row['duplicate_of']
+        candidate['duplicate_similarity'] = row['duplicate_similarity']
+        candidate['duplicate_count'] = row['duplicate_count']
+        return candidate
@@ -0,0 +1,221 @@
+"""
+Append-only, compressed on-disk corpus of extracted resume text
+
+Each document's text is zlib-compressed into one block appended to a data
+file, and an index table (in the candidate database by default) maps the
+document key (SHA-1 of the uploaded file) to the block's offset and length.
+Reads go through a read-only memory map of the data file, so fetching a
+text touches only its own block and the process keeps almost nothing
+resident. Texts are written once, when a file is first extracted, and let
+old batches be re-scored or exported without the original files.
+"""
+
+import os
+import mmap
+import time
+import zlib
+import sqlite3
+import logging
+import threading
+from typing import Dict, Iterable, Optional, Set
+
+try:
+    import fcntl
+except ImportError:
+    # Fallback on platforms without flock: appends are serialized per process only
+    fcntl = None
+
+_DEFAULT_DB = os.environ.get('RESUME_ANALYZER_DB', 'resume_analyzer.db')
+
+# Data file holding the compressed blocks (override with RESUME_ANALYZER_TEXT_CORPUS)
+DEFAULT_CORPUS_PATH = os.environ.get('RESUME_ANALYZER_TEXT_CORPUS', os.path.splitext(_DEFAULT_DB)[0] + '.texts')
+
+# Database holding the offset index (the candidate database unless overridden)
+DEFAULT_INDEX_PATH = os.environ.get('RESUME_ANALYZER_TEXT_INDEX', _DEFAULT_DB)
+
+# zlib level: resumes are written once and read many times
+COMPRESSION_LEVEL = 6
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS text_corpus (
+    document_key TEXT PRIMARY KEY,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    text_length INTEGER NOT NULL,
+    file_size INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL DEFAULT ''
+);
+"""
+
+
+class TextCorpus:
+    """Extracted resume texts by document key, stored compressed and read through mmap"""
+
+    def __init__(self, path: str = DEFAULT_CORPUS_PATH, index_path: str = DEFAULT_INDEX_PATH):
+        self.path = path
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(index_path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(_SCHEMA)
+        self.conn.commit()
+
+        self._file = open(path, 'ab')
+        self._reader = open(path, 'rb')
+        self._map: Optional[mmap.mmap] = None
+
+    def add(self, document_key: str, text: str, file_size: int = 0) -> bool:
+        """
+        Append a document's text unless it is already stored
+
+        Returns:
+            True if the text was written
+        """
+
+        if not document_key or document_key in self:
+            return False
+
+        block = zlib.compress(text.encode('utf-8'), COMPRESSION_LEVEL)
+        with self._lock:
+            # Other processes may append to the same file: take the offset under an exclusive lock
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            try:
+                self._file.seek(0, os.SEEK_END)
+                offset = self._file.tell()
+                self._file.write(block)
+                self._file.flush()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+
+            # The block is on disk before the index points at it; a block
+            # whose index row never lands is unreachable but harmless
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO text_corpus "
+                    "(document_key, offset, length, text_length, file_size, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (document_key, offset, len(block), len(text), file_size,
+                     time.strftime("%Y-%m-%d %H:%M:%S"))
+                )
+        return True
+
+    def get(self, document_key: str) -> Optional[str]:
+        """Text of a document, or None if it is not in the corpus"""
+
+        if not document_key:
+            return None
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT offset, length FROM text_corpus WHERE document_key = ?", (document_key,)
+            ).fetchone()
+            if row is None:
+                return None
+            block = self._read(*row)
+
+        if block is None:
+            return None
+        try:
+            return zlib.decompress(block).decode('utf-8')
+        except zlib.error as e:
+            logging.warning(f"Corrupt text corpus block for {document_key}: {str(e)}")
+            return None
+
+    def get_many(self, document_keys: Iterable[str]) -> Dict[str, str]:
+        """Texts of the given documents that are in the corpus"""
+        texts = {}
+        for key in document_keys:
+            text = self.get(key)
+            if text is not None:
+                texts[key] = text
+        return texts
+
+    def stored_keys(self, document_keys: Iterable[str]) -> Set[str]:
+        """The given document keys that are in the corpus (one query per 500 keys)"""
+
+        keys = [key for key in dict.fromkeys(document_keys) if key]
+        stored = set()
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                stored.update(row[0] for row in self.conn.execute(
+                    f"SELECT document_key FROM text_corpus WHERE document_key IN ({', '.join('?' for _ in chunk)})",
+                    chunk
+                ))
+        return stored
+
+    def file_size(self, document_key: str) -> int:
+        """Size in bytes of the file a document was extracted from (0 if unknown)"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT file_size FROM text_corpus WHERE document_key = ?", (document_key,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def stats(self) -> Dict[str, int]:
+        """Number of documents, compressed bytes on disk and uncompressed text length"""
+        with self._lock:
+            count, stored, text_length = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(length), 0), COALESCE(SUM(text_length), 0) FROM text_corpus"
+            ).fetchone()
+        return {'documents': count, 'stored_bytes': stored, 'text_length': text_length}
+
+    def __contains__(self, document_key: str) -> bool:
+        with self._lock:
+            return self.conn.execute(
+                "SELECT 1 FROM text_corpus WHERE document_key = ?", (document_key,)
+            ).fetchone() is not None
+
+    def __len__(self) -> int:
+        return self.stats()['documents']
+
+    def _read(self, offset: int, length: int) -> Optional[bytes]:
+        """Copy one block out of the memory map, remapping after the file has grown"""
+
+        end = offset + length
+        if self._map is None or end > len(self._map):
+            size = os.fstat(self._reader.fileno()).st_size
+            if end > size:
+                logging.warning(f"Text corpus index points past the end of {self.path}")
+                return None
+            if self._map is not None:
+                self._map.close()
+            self._map = mmap.mmap(self._reader.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map[offset:end]
+
+    def close(self):
+        """Unmap the data file and close the index"""
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            self._file.close()
+            self._reader.close()
+            self.conn.close()
+
+
+def find_snippet(text: str, term: str, width: int = 160) -> str:
+    """
+    First line of text containing a word of term, cut to about width characters
+
+    Returns:
+        The snippet, or an empty string if no word of term occurs
+    """
+
+    words = [word.lower() for word in term.split() if word]
+    if not text or not words:
+        return ""
+    lower = text.lower()
+    positions = [lower.find(word) for word in words]
+    positions = [pos for pos in positions if pos >= 0]
+    if not positions:
+        return ""
+
+    pos = min(positions)
+    start = lower.rfind('\n', 0, pos) + 1
+    end = lower.find('\n', pos)
+    end = len(text) if end < 0 else end
+    if end - start > width:
+        start = max(start, pos - width // 3)
+        end = min(end, start + width)
+    return text[start:end].strip()
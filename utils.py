@@ -1,13 +1,18 @@
 import io
 import re
+import codecs
 import logging
+import zipfile
+import threading
+from collections import Counter, defaultdict
+import xml.etree.ElementTree as ET
 from typing import List, Optional
 import PyPDF2
 import pdfplumber
 from docx import Document
+from ocr import ocr_pages, pages_without_text
+from document import AnalyzedDocument, english_stop_words
 import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
 
 # Download required NLTK data
 try:
@@ -20,56 +25,197 @@ try:
 except LookupError:
     nltk.download('stopwords')
 
-def extract_text_from_file(file_content: bytes, filename: str) -> str:
+# WordprocessingML tags handled by the streaming DOCX reader
+_W_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_W_P = _W_NS + 'p'
+_W_T = _W_NS + 't'
+_W_TAB = _W_NS + 'tab'
+_W_TC = _W_NS + 'tc'
+_W_TR = _W_NS + 'tr'
+_W_BREAKS = (_W_NS + 'br', _W_NS + 'cr')
+_MC_FALLBACK = '{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback'
+
+# Format implied by each accepted file extension, compared with the detected format
+_EXTENSION_FORMATS = {'pdf': 'pdf', 'docx': 'docx', 'doc': 'doc', 'txt': 'txt'}
+
+# Byte order marks, longest first so UTF-32 LE is not taken for UTF-16 LE
+_BOMS = [
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+_CP1252_UNDEFINED = (0x81, 0x8D, 0x8F, 0x90, 0x9D)
+
+# Per-format extraction counters: files, mismatches, unsupported, failures
+EXTRACTION_STATS = defaultdict(Counter)
+_STATS_LOCK = threading.Lock()
+
+def extract_text_from_file(file_content: bytes, filename: str, ocr: bool = False) -> str:
     """
     Extract text from various file formats
-    
+
+    The format is identified from the content (see detect_format), not the
+    extension, so renamed files go straight to the right extractor. Per-format
+    counts of files, extension mismatches, unsupported files and failures
+    are kept in EXTRACTION_STATS.
+
     Args:
         file_content: Binary content of the file
-        filename: Name of the file to determine format
-        
+        filename: Name of the file, compared with the detected format
+        ocr: OCR PDF pages that have no text layer (needs the optional OCR engine)
+
     Returns:
         Extracted text as string
     """
-    
+
+    file_format = detect_format(file_content)
+    file_extension = filename.lower().rsplit('.', 1)[-1] if '.' in filename else ''
+    _count_extraction(file_format, 'files')
+
+    if _EXTENSION_FORMATS.get(file_extension) != file_format:
+        _count_extraction(file_format, 'mismatches')
+        logging.info(f"{filename}: extension '{file_extension}' but content is {file_format}")
+
+    extractor = _FORMAT_EXTRACTORS.get(file_format)
+    if extractor is None:
+        _count_extraction(file_format, 'unsupported')
+        logging.warning(f"Unsupported file format for {filename}: {file_format}")
+        return ""
+
     try:
-        file_extension = filename.lower().split('.')[-1]
-        
-        if file_extension == 'pdf':
-            return extract_text_from_pdf(file_content)
-        elif file_extension in ['docx', 'doc']:
-            return extract_text_from_docx(file_content)
-        elif file_extension == 'txt':
-            return extract_text_from_txt(file_content)
-        else:
-            logging.warning(f"Unsupported file format: {file_extension}")
-            return ""
-            
+        text = extractor(file_content, ocr=ocr) if file_format == 'pdf' else extractor(file_content)
     except Exception as e:
         logging.error(f"Error extracting text from {filename}: {str(e)}")
-        return ""
+        text = ""
 
-def extract_text_from_pdf(file_content: bytes) -> str:
-    """Extract text from PDF file"""
+    if not text:
+        _count_extraction(file_format, 'failures')
+    return text
+
+def detect_format(file_content: bytes) -> str:
+    """
+    Identify a document format from magic bytes and container structure
+
+    Returns:
+        'pdf', 'docx', 'doc' (legacy OLE2 Word), 'rtf', 'zip' (a zip that is
+        not a Word package), 'txt' or 'binary'
+    """
+
+    head = file_content[:1024]
+
+    # PDF readers accept the header anywhere in the first kilobyte
+    if b'%PDF-' in head:
+        return 'pdf'
+    if head.startswith(b'PK\x03\x04'):
+        try:
+            with zipfile.ZipFile(io.BytesIO(file_content)) as package:
+                package.getinfo('word/document.xml')
+            return 'docx'
+        except (zipfile.BadZipFile, KeyError):
+            return 'zip'
+    if head.startswith(b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'):
+        return 'doc'
+    if head.lstrip().startswith(b'{\\rtf'):
+        return 'rtf'
+
+    return 'txt' if detect_encoding(file_content) else 'binary'
+
+def detect_encoding(file_content: bytes, sample_size: int = 65536) -> Optional[str]:
+    """
+    Detect the text encoding from a bounded prefix in a single pass
+
+    Args:
+        file_content: Raw file content
+        sample_size: Bytes inspected from the start of the file
+
+    Returns:
+        Codec name, or None if the content does not look like text
+    """
+
+    for bom, encoding in _BOMS:
+        if file_content.startswith(bom):
+            return encoding
+
+    sample = file_content[:sample_size]
+    if not sample:
+        return 'utf-8'
+
+    # UTF-16 without a BOM puts NUL in every other byte of ASCII text
+    nul_count = sample.count(0)
+    if nul_count:
+        even_nuls = sample[0::2].count(0)
+        if nul_count > len(sample) // 4 and even_nuls > nul_count * 0.9:
+            return 'utf-16-be'
+        if nul_count > len(sample) // 4 and even_nuls < nul_count * 0.1:
+            return 'utf-16-le'
+        return None
+
+    # Incremental decoding tolerates a multi-byte character cut at the sample edge
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=len(sample) == len(file_content))
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+
+    # cp1252 leaves five bytes undefined; latin-1 maps every byte
+    if any(byte in sample for byte in _CP1252_UNDEFINED):
+        return 'latin-1'
+    return 'cp1252'
+
+def get_extraction_stats() -> dict:
+    """Snapshot of the per-format extraction counters"""
+    with _STATS_LOCK:
+        return {file_format: dict(counts) for file_format, counts in EXTRACTION_STATS.items()}
+
+def reset_extraction_stats() -> None:
+    """Clear the per-format extraction counters"""
+    with _STATS_LOCK:
+        EXTRACTION_STATS.clear()
+
+def merge_extraction_stats(stats: dict) -> None:
+    """Add counters recorded elsewhere (e.g. in a sandbox worker) to this process's"""
+    with _STATS_LOCK:
+        for file_format, counts in stats.items():
+            EXTRACTION_STATS[file_format].update(counts)
+
+def _count_extraction(file_format: str, counter: str) -> None:
+    with _STATS_LOCK:
+        EXTRACTION_STATS[file_format][counter] += 1
+
+def extract_text_from_pdf(file_content: bytes, ocr: bool = False) -> str:
+    """
+    Extract text from PDF file
+
+    With ocr set, only pages without a usable text layer are rasterized and
+    OCR'd, so text-based PDFs never pay the OCR cost.
+    """
+    
+    page_texts = _pdf_page_texts(file_content)
+    
+    if ocr:
+        for page_number, ocr_text in ocr_pages(file_content, pages_without_text(page_texts)).items():
+            if len(ocr_text.strip()) > len(page_texts[page_number].strip()):
+                page_texts[page_number] = ocr_text
+    
+    return clean_extracted_text(''.join(page_text + "\n" for page_text in page_texts))
+
+def _pdf_page_texts(file_content: bytes) -> List[str]:
+    """Per-page text from pdfplumber, or PyPDF2 when pdfplumber finds little"""
     
-    text = ""
+    page_texts = []
     
     try:
         # Try with pdfplumber first (better for complex layouts)
         with pdfplumber.open(io.BytesIO(file_content)) as pdf:
             for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
+                page_texts.append(page.extract_text() or "")
         
         # If pdfplumber didn't work well, try PyPDF2
-        if len(text.strip()) < 100:
-            text = ""
+        if len(''.join(page_texts).strip()) < 100:
             pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_content))
-            
-            for page_num in range(len(pdf_reader.pages)):
-                page = pdf_reader.pages[page_num]
-                text += page.extract_text() + "\n"
+            page_texts = [page.extract_text() or "" for page in pdf_reader.pages]
                 
     except Exception as e:
         logging.error(f"Error extracting PDF text: {str(e)}")
@@ -77,74 +223,132 @@ def extract_text_from_pdf(file_content: bytes) -> str:
         # Fallback to PyPDF2 if pdfplumber fails
         try:
             pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_content))
-            for page_num in range(len(pdf_reader.pages)):
-                page = pdf_reader.pages[page_num]
-                text += page.extract_text() + "\n"
+            page_texts = [page.extract_text() or "" for page in pdf_reader.pages]
         except Exception as e2:
             logging.error(f"Fallback PDF extraction also failed: {str(e2)}")
     
-    return clean_extracted_text(text)
+    return page_texts
 
 def extract_text_from_docx(file_content: bytes) -> str:
-    """Extract text from DOCX file"""
-    
+    """
+    Extract text from DOCX file
+
+    Streams word/document.xml straight out of the zip package and only
+    falls back to the python-docx object model for malformed files.
+    """
+
     try:
-        doc = Document(io.BytesIO(file_content))
-        text = ""
-        
-        # Extract text from paragraphs
-        for paragraph in doc.paragraphs:
-            text += paragraph.text + "\n"
-        
-        # Extract text from tables
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    text += cell.text + " "
-                text += "\n"
-        
-        return clean_extracted_text(text)
-        
-    except Exception as e:
-        logging.error(f"Error extracting DOCX text: {str(e)}")
-        return ""
+        text = _docx_text_streaming(file_content)
+    except (zipfile.BadZipFile, KeyError, ET.ParseError) as e:
+        logging.warning(f"Streaming DOCX extraction failed, falling back to python-docx: {str(e)}")
+        try:
+            text = _docx_text_python_docx(file_content)
+        except Exception as e2:
+            logging.error(f"Error extracting DOCX text: {str(e2)}")
+            return ""
+
+    return clean_extracted_text(text)
+
+def _docx_text_streaming(file_content: bytes) -> str:
+    """
+    Read paragraph and table text from word/document.xml with an incremental parser
+
+    Text is emitted in document order: paragraphs end with a newline, and
+    as in python-docx a table row is one line of cells each followed by a
+    space, the paragraphs within a cell joined by newlines. Merged cells are
+    read once, and mc:Fallback copies of text boxes are skipped.
+    """
+
+    parts = []
+    skip_depth = 0
+
+    with zipfile.ZipFile(io.BytesIO(file_content)) as package:
+        with package.open('word/document.xml') as document:
+            for event, element in ET.iterparse(document, events=('start', 'end')):
+                tag = element.tag
+
+                if tag == _MC_FALLBACK:
+                    skip_depth += 1 if event == 'start' else -1
+                    continue
+                if event == 'start' or skip_depth:
+                    continue
+
+                if tag == _W_T:
+                    if element.text:
+                        parts.append(element.text)
+                elif tag == _W_TAB:
+                    parts.append('\t')
+                elif tag in _W_BREAKS:
+                    parts.append('\n')
+                elif tag == _W_P:
+                    parts.append('\n')
+                    element.clear()
+                elif tag == _W_TC:
+                    # A cell ends with a paragraph; its newline becomes the cell separator
+                    if parts and parts[-1] == '\n':
+                        parts[-1] = ' '
+                    else:
+                        parts.append(' ')
+                elif tag == _W_TR:
+                    parts.append('\n')
+                    element.clear()
+
+    return ''.join(parts)
+
+def _docx_text_python_docx(file_content: bytes) -> str:
+    """Read paragraph and table text through the python-docx object model"""
+
+    doc = Document(io.BytesIO(file_content))
+    parts = []
+
+    # Extract text from paragraphs
+    for paragraph in doc.paragraphs:
+        parts.append(paragraph.text + "\n")
+
+    # Extract text from tables
+    for table in doc.tables:
+        for row in table.rows:
+            for cell in row.cells:
+                parts.append(cell.text + " ")
+            parts.append("\n")
+
+    return ''.join(parts)
 
 def extract_text_from_txt(file_content: bytes) -> str:
-    """Extract text from TXT file"""
+    """Extract text from TXT file, decoding once with the detected encoding"""
     
     try:
-        # Try different encodings
-        encodings = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
-        
-        for encoding in encodings:
-            try:
-                text = file_content.decode(encoding)
-                return clean_extracted_text(text)
-            except UnicodeDecodeError:
-                continue
-        
-        # If all encodings fail, use utf-8 with error handling
-        text = file_content.decode('utf-8', errors='ignore')
+        encoding = detect_encoding(file_content) or 'utf-8'
+        text = file_content.decode(encoding, errors='replace')
         return clean_extracted_text(text)
         
     except Exception as e:
         logging.error(f"Error extracting TXT text: {str(e)}")
         return ""
 
+# Extractor for each detected format; formats missing here are unsupported
+_FORMAT_EXTRACTORS = {
+    'pdf': extract_text_from_pdf,
+    'docx': extract_text_from_docx,
+    'txt': extract_text_from_txt,
+}
+
 def clean_extracted_text(text: str) -> str:
-    """Clean and normalize extracted text"""
+    """Clean and normalize extracted text, keeping line breaks for section segmentation"""
     
     if not text:
         return ""
     
-    # Remove excessive whitespace
-    text = re.sub(r'\s+', ' ', text)
+    # Remove excessive whitespace within lines
+    text = re.sub(r'[^\S\n]+', ' ', text.replace('\r\n', '\n').replace('\r', '\n'))
     
-    # Remove special characters but keep important punctuation
-    text = re.sub(r'[^\w\s@.,()-]', ' ', text)
+    # Remove special characters but keep important punctuation and field separators
+    text = re.sub(r'[^\w\s@.,()|:-]', ' ', text)
     
-    # Remove multiple spaces
+    # Remove multiple spaces, trim lines and keep at most one blank line
     text = re.sub(r' +', ' ', text)
+    text = re.sub(r' ?\n ?', '\n', text)
+    text = re.sub(r'\n{3,}', '\n\n', text)
     
     # Remove leading/trailing whitespace
     text = text.strip()
@@ -242,9 +446,9 @@ def extract_contact_info(text: str) -> dict:
     
     # Phone extraction
     phone_patterns = [
-        r'\+?1?[-.\s]?$$?([0-9]{3})$$?[-.\s]?([0-9]{3})[-.\s]?([0-9]{4})',
+        r'\+?1?[-.\s]?\(?([0-9]{3})\)?[-.\s]?([0-9]{3})[-.\s]?([0-9]{4})',
         r'\b\d{3}[-.\s]?\d{3}[-.\s]?\d{4}\b',
-        r'$$\d{3}$$\s?\d{3}[-.\s]?\d{4}'
+        r'\(\d{3}\)\s?\d{3}[-.\s]?\d{4}'
     ]
     
     for pattern in phone_patterns:
@@ -274,33 +478,39 @@ def extract_contact_info(text: str) -> dict:
     
     return contact_info
 
-def calculate_text_statistics(text: str) -> dict:
+def calculate_text_statistics(text) -> dict:
     """
     Calculate various text statistics
     
+    Words are the document's lowercased \\w+ tokens (punctuation is not a
+    word and "don't" is two) and sentences follow textstat, so the counts
+    differ from NLTK's word_tokenize/sent_tokenize.
+    
     Args:
-        text: Input text to analyze
+        text: Input text to analyze, or an AnalyzedDocument already built for it
         
     Returns:
         Dictionary containing text statistics
     """
     
+    document = text if isinstance(text, AnalyzedDocument) else AnalyzedDocument(text)
+    
     try:
-        # Basic statistics
-        word_count = len(word_tokenize(text))
-        char_count = len(text)
-        sentence_count = len(nltk.sent_tokenize(text))
+        # Basic statistics from the document's single tokenization
+        words = document.tokens
+        word_count = len(words)
+        char_count = len(document.text)
+        sentence_count = document.sentence_count
         
         # Average word length
-        words = word_tokenize(text.lower())
         avg_word_length = sum(len(word) for word in words) / len(words) if words else 0
         
         # Unique words
-        unique_words = len(set(words))
+        unique_words = len(document.vocabulary)
         
-        # Stop words ratio
-        stop_words = set(stopwords.words('english'))
-        stop_word_count = sum(1 for word in words if word in stop_words)
+        # Stop words ratio (the stop word list is loaded once per process)
+        stop_words = english_stop_words()
+        stop_word_count = sum(count for word, count in document.token_counts.items() if word in stop_words)
         stop_word_ratio = stop_word_count / len(words) if words else 0
         
         return {
@@ -317,7 +527,7 @@ def calculate_text_statistics(text: str) -> dict:
         logging.error(f"Error calculating text statistics: {str(e)}")
         return {
             'word_count': 0,
-            'character_count': len(text),
+            'character_count': len(document.text),
             'sentence_count': 0,
             'average_word_length': 0,
             'unique_words': 0,